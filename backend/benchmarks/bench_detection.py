@@ -0,0 +1,35 @@
+"""Throughput of FraudDetector, row loop vs vectorized scoring
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_detection [rows ...]
+"""
+import sys
+import time
+
+from fraud_detection import FraudDetector
+from benchmarks.synthetic import make_transactions
+
+# The row loop is timed on at most this many rows and extrapolated
+ROW_LOOP_LIMIT = 100_000
+
+
+def rate(fn, df) -> float:
+    start = time.perf_counter()
+    fn(df)
+    return len(df) / (time.perf_counter() - start)
+
+
+def main(sizes):
+    rows, vectorized = FraudDetector(vectorized=False), FraudDetector()
+    print(f'{"rows":>9} {"row loop":>12} {"detect_fraud":>14} {"score_frame":>13}')
+    for n in sizes:
+        df = make_transactions(n)
+        loop = rate(rows.detect_fraud, df.iloc[:ROW_LOOP_LIMIT])
+        detect = rate(vectorized.detect_fraud, df)
+        score = rate(vectorized.score_frame, df)
+        print(f'{n:>9} {loop:>10,.0f}/s {detect:>12,.0f}/s {score:>11,.0f}/s')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,53 @@
+"""VPA pattern matching throughput by pattern-set size
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_matcher [patterns ...]
+"""
+import random
+import sys
+import time
+
+import pandas as pd
+
+from vpa_matcher import AhoCorasickMatcher, SubstringMatcher
+from benchmarks.synthetic import make_transactions
+
+SAMPLE_VPAS = 2000
+
+
+def random_patterns(count: int, rnd: random.Random):
+    """count hex fragments of 3-6 characters, a tenth of them also as '^' prefixes"""
+    patterns = list(dict.fromkeys(
+        ''.join(rnd.choice('0123456789abcdef') for _ in range(rnd.randint(3, 6)))
+        for _ in range(count)
+    ))
+    return patterns + ['^' + p for p in patterns[:count // 10]]
+
+
+def rate(fn, vpas) -> float:
+    start = time.perf_counter()
+    fn(vpas)
+    return len(vpas) / (time.perf_counter() - start)
+
+
+def main(sizes):
+    df = make_transactions(20_000)
+    vpas = pd.unique(pd.concat([df['PAYER_VPA'], df['BENEFICIARY_VPA']]).str.lower()).tolist()[:SAMPLE_VPAS]
+    rnd = random.Random(1)
+    print(f'{"patterns":>8} {"naive":>12} {"substring":>12} {"automaton":>12} {"compile":>10}')
+    for count in sizes:
+        patterns = random_patterns(count, rnd)
+        terms = [p for p in patterns if not p.startswith('^')]
+        start = time.perf_counter()
+        automaton = AhoCorasickMatcher(patterns)
+        compile_ms = (time.perf_counter() - start) * 1000
+        substring = SubstringMatcher(patterns)
+
+        naive = rate(lambda values: [[p for p in terms if p in v] for v in values], vpas)
+        print(f'{len(patterns):>8} {naive:>10,.0f}/s {rate(substring.match_many, vpas):>10,.0f}/s '
+              f'{rate(automaton.match_many, vpas):>10,.0f}/s {compile_ms:>8.1f}ms')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10, 1000, 10000])
@@ -0,0 +1,32 @@
+"""Synthetic transaction frames built from the sample CSV"""
+import os
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'data', 'anonymized_sample_fraud_txn.csv')
+
+# VPA fragments, mostly the default fraud patterns plus a few harmless ones
+WORDS = ['pay', 'rzp', 'bonus', 'win', 'loan', 'cashback', 'credit', 'reward',
+         'prize', 'offer', 'lucky', 'abc', 'xyz', 'bank']
+
+
+def make_transactions(n: int, seed: int = 0) -> pd.DataFrame:
+    """n rows resampled from the sample CSV with fresh ids and VPAs
+
+    Payer and beneficiary VPAs are drawn from a pool of n // 3 accounts so
+    the transaction graph grows with n. About one VPA in eight contains a
+    pattern word.
+    """
+    base = pd.read_csv(SAMPLE_CSV)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    df['TRANSACTION_ID'] = [f'{i:020x}' for i in range(n)]
+
+    accounts = max(n // 3, 10)
+    for column, handle in [('PAYER_VPA', 'axl'), ('BENEFICIARY_VPA', 'ybl')]:
+        ids = rng.integers(0, accounts, n)
+        words = rng.integers(0, len(WORDS) * 8, n)
+        df[column] = [f'{a:08x}{WORDS[w] if w < len(WORDS) else ""}@{handle}' for a, w in zip(ids, words)]
+    return df
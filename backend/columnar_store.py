@@ -0,0 +1,271 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from identifiers import is_encoded
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+# Timestamp layouts seen in UPI extracts, tried in order
+TIMESTAMP_FORMATS = ['%d/%m/%Y %H:%M', '%m/%d/%Y %H:%M', '%Y-%m-%d %H:%M:%S']
+
+# Columns each stage reads; the rest of the extract is skipped at parse time.
+# Frames with TXN_TIMESTAMP also get TXN_TIME, the same time as datetimes
+# (see parse_timestamps). Fraud detection and graph building:
+DETECTION_COLUMNS = [
+    'TXN_TIMESTAMP', 'TRANSACTION_ID', 'AMOUNT',
+    'PAYER_VPA', 'BENEFICIARY_VPA', 'IS_FRAUD'
+]
+# Entity profiles, which add payer devices and IPs:
+ENTITY_COLUMNS = DETECTION_COLUMNS + ['DEVICE_ID', 'IP_ADDRESS']
+# The PDF report, which only counts rows:
+REPORT_COLUMNS = ['IS_FRAUD']
+
+# Leading bytes of a CSV read to find its header and timestamp layout
+SAMPLE_BYTES = 256 * 1024
+
+# Schema metadata key recording the timestamp layout found in the source CSV
+TIMESTAMP_FORMAT_KEY = b'fraudshield.timestamp_format'
+
+# Bumped whenever transaction_schema() changes, so older files are rewritten
+SCHEMA_VERSION_KEY = b'fraudshield.schema_version'
+SCHEMA_VERSION = b'5'
+
+# Schema metadata key recording the source CSV's mtime and size at conversion
+SOURCE_IDENTITY_KEY = b'fraudshield.source_identity'
+
+
+def transaction_schema():
+    """Explicit Arrow types for the 24-column UPI transaction extract
+
+    TXN_TIMESTAMP keeps the source text, which API responses echo as is;
+    parse_timestamps() gives the typed time. IS_FRAUD is float64 so
+    flags written as 1.0 parse as they do with pandas; every consumer
+    reads it as a truth value.
+    """
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('TXN_TIMESTAMP', category),
+        ('TRANSACTION_ID', pa.string()),
+        ('RRN', pa.string()),
+        ('TRN_STATUS', category),
+        ('AMOUNT', pa.float64()),
+        ('RESPONSE_CODE', category),
+        ('PAYER_VPA', category),
+        ('PAYER_CODE', category),
+        ('PAYER_IFSC', category),
+        ('PAYER_ACCOUNT', category),
+        ('BENEFICIARY_VPA', category),
+        ('BENEFICIARY_CODE', category),
+        ('BENEFICIARY_IFSC', category),
+        ('BENEFICIARY_ACCOUNT', category),
+        ('LONGITUDE', category),
+        ('LATITUDE', category),
+        ('DEVICE_ID', category),
+        ('INITIATION_MODE', category),
+        ('UPI_LITE_LRN', pa.string()),
+        ('CARD_NUMBER', pa.string()),
+        ('TRANSACTION_TYPE', category),
+        ('PAYMENT_INSTRUMENT', category),
+        ('IP_ADDRESS', category),
+        ('IS_FRAUD', pa.float64()),
+    ])
+
+
+def csv_convert_options(header: Sequence[str], columns: Optional[Sequence[str]] = None) -> "pa_csv.ConvertOptions":
+    """Arrow CSV options for the UPI extract profile
+
+    Only `columns` (all when None) are converted, with the types of
+    transaction_schema(). Empty and NA-like cells are missing values in
+    every column, as they are for pandas.
+    """
+    wanted = [c for c in (columns if columns is not None else header) if c in header]
+    return pa_csv.ConvertOptions(
+        column_types={field.name: field.type for field in transaction_schema() if field.name in wanted},
+        include_columns=wanted,
+        strings_can_be_null=True
+    )
+
+
+def sniff_csv(sample: bytes) -> Tuple[List[str], Optional[str]]:
+    """Header and timestamp layout of a CSV from its leading bytes
+
+    The layout is the first of TIMESTAMP_FORMATS that parses every
+    TXN_TIMESTAMP value in the sample, None when none does.
+    """
+    lines = sample.decode('utf-8', errors='replace').splitlines()
+    if len(sample) >= SAMPLE_BYTES:
+        # The last line may be cut off
+        lines = lines[:-1]
+    rows = list(csv.reader(io.StringIO('\n'.join(lines))))
+    if not rows:
+        return [], None
+    header = [name.strip() for name in rows[0]]
+    if 'TXN_TIMESTAMP' not in header:
+        return header, None
+    index = header.index('TXN_TIMESTAMP')
+    values = [row[index] for row in rows[1:] if len(row) > index and row[index]]
+    if not values:
+        return header, None
+    for timestamp_format in TIMESTAMP_FORMATS:
+        if all(_parses(value, timestamp_format) for value in values):
+            return header, timestamp_format
+    return header, None
+
+
+def _parses(value: str, timestamp_format: str) -> bool:
+    try:
+        datetime.strptime(value, timestamp_format)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_timestamps(text: pd.Series, timestamp_format: Optional[str] = None) -> pd.Series:
+    """TXN_TIMESTAMP text as datetimes, NaT where no known layout matches
+
+    Each value is tried in timestamp_format (the layout sniff_csv found)
+    first, then in the other TIMESTAMP_FORMATS, so rows in another layout
+    further down a file still parse. Extracts are minute-resolution, so
+    each distinct value is parsed once.
+    """
+    if is_encoded(text):
+        codes = text.cat.codes.to_numpy()
+        uniques = pd.Series(text.cat.categories.to_numpy(dtype=object))
+    else:
+        codes, uniques = pd.factorize(text)
+        uniques = pd.Series(np.asarray(uniques, dtype=object))
+    layouts = [timestamp_format] if timestamp_format else []
+    layouts += [layout for layout in TIMESTAMP_FORMATS if layout != timestamp_format]
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    for layout in layouts:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(uniques[missing], format=layout, errors='coerce')
+    values = parsed.to_numpy()[codes]
+    values[codes < 0] = np.datetime64('NaT')
+    return pd.Series(values, index=text.index, name='TXN_TIME')
+
+
+def transaction_times(df: pd.DataFrame) -> pd.Series:
+    """TXN_TIME of a frame, parsed from TXN_TIMESTAMP when the frame lacks it, NaT without either"""
+    if 'TXN_TIME' in df.columns:
+        return df['TXN_TIME']
+    if 'TXN_TIMESTAMP' in df.columns:
+        return parse_timestamps(df['TXN_TIMESTAMP'])
+    return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]', name='TXN_TIME')
+
+
+class ColumnarStore:
+    """Typed Arrow IPC copy of a transaction CSV, memory-mapped on read
+
+    The CSV is converted once into an uncompressed Arrow IPC file next to
+    it and re-converted whenever the CSV's mtime or size changes. Reads
+    memory-map the file and only materialize the requested columns, so
+    worker processes skip CSV parsing and read through the same
+    page-cache pages. The frames load() returns are still private to each
+    worker: to_pandas() copies the columns (about 28 MB per million rows
+    for DETECTION_COLUMNS).
+    """
+
+    def __init__(self, csv_path: str, store_path: Optional[str] = None):
+        self.csv_path = csv_path
+        self.store_path = store_path or os.path.splitext(csv_path)[0] + '.arrow'
+
+    def is_current(self) -> bool:
+        """True when the columnar file exists, has the current schema and was converted from the CSV as it is now"""
+        if not os.path.exists(self.store_path):
+            return False
+        with pa.memory_map(self.store_path, 'r') as source:
+            metadata = pa_ipc.open_file(source).schema.metadata or {}
+        return (metadata.get(SCHEMA_VERSION_KEY) == SCHEMA_VERSION
+                and metadata.get(SOURCE_IDENTITY_KEY) == self._source_identity())
+
+    def _source_identity(self) -> bytes:
+        """The CSV's mtime and size; any change, even to an older mtime, means a new file"""
+        stat = os.stat(self.csv_path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+    def ensure_current(self) -> bool:
+        """Convert the CSV if needed, returns True when a conversion ran"""
+        if not ARROW_AVAILABLE or self.is_current():
+            return False
+        self.convert()
+        return True
+
+    def convert(self):
+        """Parse the CSV with the explicit schema and write the Arrow IPC file"""
+        # Taken before reading, so a CSV replaced mid-read converts again
+        identity = self._source_identity()
+        # IPC files allow a single dictionary per field, so merge the
+        # per-block dictionaries produced by the multithreaded CSV reader
+        table = self._read_csv().unify_dictionaries().combine_chunks()
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}), SCHEMA_VERSION_KEY: SCHEMA_VERSION,
+            SOURCE_IDENTITY_KEY: identity
+        })
+
+        # Write to a temp file and rename so readers never see a partial file
+        directory = os.path.dirname(os.path.abspath(self.store_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.arrow.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as sink:
+                with pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.store_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _read_csv(self):
+        """Read the CSV into an Arrow table, recording the timestamp layout"""
+        with open(self.csv_path, 'rb') as f:
+            header, timestamp_format = sniff_csv(f.read(SAMPLE_BYTES))
+        table = pa_csv.read_csv(self.csv_path, convert_options=csv_convert_options(header))
+        if timestamp_format:
+            table = table.replace_schema_metadata({TIMESTAMP_FORMAT_KEY: timestamp_format.encode()})
+        return table
+
+    def load(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Load the requested columns, converting the CSV first if needed
+
+        Dictionary-encoded columns come back as pandas categoricals.
+        TXN_TIMESTAMP comes back as the source text, with TXN_TIME added.
+        """
+        if not ARROW_AVAILABLE:
+            df = pd.read_csv(self.csv_path, usecols=self._csv_usecols(columns))
+            timestamp_format = None
+        else:
+            self.ensure_current()
+            with pa.memory_map(self.store_path, 'r') as source:
+                table = pa_ipc.open_file(source).read_all()
+                if columns is not None:
+                    table = table.select([c for c in columns if c in table.column_names])
+                timestamp_format = (table.schema.metadata or {}).get(TIMESTAMP_FORMAT_KEY)
+                timestamp_format = timestamp_format.decode() if timestamp_format else None
+                df = table.to_pandas()
+
+        if 'TXN_TIMESTAMP' in df.columns:
+            df['TXN_TIME'] = parse_timestamps(df['TXN_TIMESTAMP'], timestamp_format)
+        return df
+
+    def _csv_usecols(self, columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+        """Requested columns that exist in the CSV header"""
+        if columns is None:
+            return None
+        header = pd.read_csv(self.csv_path, nrows=0).columns
+        return [c for c in columns if c in header]
@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    POSTGRES_AVAILABLE = True
+except ImportError:
+    psycopg2 = None
+    POSTGRES_AVAILABLE = False
+
+DEFAULT_DATABASE_URL = "sqlite:///./fraudshield.db"
+
+
+class Database:
+    """One connection to the DATABASE_URL database, opened on first use
+
+    SQLite by default, in WAL mode so readers in other connections and
+    workers do not wait for a writer; postgresql:// URLs go through
+    psycopg2. The schema script for the dialect runs when the connection
+    opens, then setup(cursor) in its own transaction. Calls are
+    serialized by a lock and block, so run them off the event loop.
+    """
+
+    def __init__(self, url: str = DEFAULT_DATABASE_URL, sqlite_schema: str = "",
+                 postgres_schema: str = "", setup: Optional[Callable] = None):
+        self.url = url
+        self.postgres = url.startswith(("postgresql://", "postgres://"))
+        if self.postgres and not POSTGRES_AVAILABLE:
+            raise RuntimeError("psycopg2 is required for a Postgres DATABASE_URL")
+        # Placeholder for query parameters in this dialect
+        self.param = "%s" if self.postgres else "?"
+        self.sqlite_schema = sqlite_schema
+        self.postgres_schema = postgres_schema
+        self.setup = setup
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def placeholders(self, count: int) -> str:
+        return ", ".join([self.param] * count)
+
+    @contextmanager
+    def transaction(self, write: bool = False):
+        """Cursor in a transaction, committed on success and rolled back on error"""
+        with self._lock:
+            connection = self._connect()
+            cursor = connection.cursor()
+            try:
+                if not self.postgres:
+                    # IMMEDIATE takes the write lock up front instead of failing
+                    # to upgrade a read lock when another worker writes first
+                    cursor.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+                yield cursor
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self):
+        if self._connection is not None:
+            return self._connection
+        if self.postgres:
+            connection = psycopg2.connect(self.url)
+            if self.postgres_schema:
+                with connection, connection.cursor() as cursor:
+                    cursor.execute(self.postgres_schema)
+        else:
+            path = self.url.split("sqlite:///", 1)[-1]
+            # Transactions are opened explicitly, see transaction()
+            connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if self.sqlite_schema:
+                connection.executescript(self.sqlite_schema)
+        if self.setup is not None:
+            cursor = connection.cursor()
+            try:
+                if not self.postgres:
+                    cursor.execute("BEGIN IMMEDIATE")
+                self.setup(cursor)
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                connection.close()
+                raise
+            finally:
+                cursor.close()
+        self._connection = connection
+        return connection
@@ -0,0 +1,307 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from columnar_store import parse_timestamps
+from identifiers import is_encoded, shared_codes
+
+# Entries per list (counterparties, devices, IPs, transactions) in a profile
+DEFAULT_PROFILE_LIMIT = 20
+MAX_PROFILE_LIMIT = 500
+
+# Nodes returned by a neighbourhood query; MAX_ is the hard cap
+DEFAULT_NEIGHBOR_LIMIT = 200
+MAX_NEIGHBOR_LIMIT = 2000
+MAX_HOPS = 3
+
+
+def _csr(keys: np.ndarray, size: int, *order_by: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row pointer and permutation grouping positions by key
+
+    Within a key, positions are sorted by order_by (last array first, as
+    np.lexsort does), else kept in their original order.
+    """
+    order = np.lexsort(order_by + (keys,)) if order_by else np.argsort(keys, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=indptr[1:])
+    return indptr, order
+
+
+def _codes(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Integer codes and distinct values, -1 for missing values"""
+    if is_encoded(values):
+        values = values.cat.remove_unused_categories()
+        return values.cat.codes.to_numpy(dtype=np.int64), values.cat.categories.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), np.asarray(uniques, dtype=object)
+
+
+class _Attribute:
+    """Distinct values of one payer-side column (device, IP) per VPA, most used first"""
+
+    def __init__(self, entity: np.ndarray, values: pd.Series, entity_count: int):
+        codes, self.values = _codes(values)
+        known = codes >= 0
+        pair_ids, pairs = pd.factorize(entity[known] * max(len(self.values), 1) + codes[known])
+        self.entity = pairs // max(len(self.values), 1)
+        self.value = pairs % max(len(self.values), 1)
+        self.count = np.bincount(pair_ids, minlength=len(pairs))
+        self.indptr, self.order = _csr(self.entity, entity_count, -self.count)
+
+    def get(self, entity_id: int, limit: int) -> Dict[str, Any]:
+        start, stop = self.indptr[entity_id], self.indptr[entity_id + 1]
+        top = self.order[start:min(stop, start + limit)]
+        return {
+            "count": int(stop - start),
+            "top": [
+                {"id": value, "transactions": count}
+                for value, count in zip(self.values[self.value[top]].tolist(), self.count[top].tolist())
+            ]
+        }
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.entity, self.value, self.count, self.indptr, self.order)
+        return sum(a.nbytes for a in arrays) + 64 * len(self.values)
+
+
+class EntityIndex:
+    """Per-VPA adjacency and rollups of a transaction table
+
+    VPAs get integer ids through a hash index. Counterparties are kept
+    as CSR adjacency in both directions, heaviest first, and each VPA's
+    transactions, devices and IP addresses as CSR lists, with totals
+    precomputed per VPA. A profile or a capped k-hop neighbourhood then
+    only touches the entries it returns, however large the table is.
+    Devices and IPs are attributed to the payer, as in the UPI extract.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        fallback = pd.Series([f"Unknown_{idx}" for idx in df.index], dtype=object)
+        payer = df["PAYER_VPA"] if "PAYER_VPA" in df.columns else fallback
+        beneficiary = df["BENEFICIARY_VPA"] if "BENEFICIARY_VPA" in df.columns else fallback
+
+        # Same node identity as the graph: values with the same str() share an id
+        (source, target), uniques = shared_codes([payer, beneficiary])
+        name_codes, names = pd.factorize(np.array([str(v) for v in uniques], dtype=object))
+        self.names = np.asarray(names, dtype=object)
+        self._index = pd.Index(self.names)
+        size = len(self.names)
+        source, target = name_codes[source].astype(np.int64), name_codes[target].astype(np.int64)
+
+        amount = df["AMOUNT"].to_numpy(dtype=np.float64) if "AMOUNT" in df.columns else np.zeros(n)
+        if "IS_FRAUD" in df.columns:
+            fraud = df["IS_FRAUD"].to_numpy(dtype=object).astype(bool)
+        else:
+            fraud = np.zeros(n, dtype=bool)
+        fraud_amount = np.where(fraud, amount, 0.0)
+
+        # Rollups per VPA
+        self.sent = np.bincount(source, minlength=size)
+        self.received = np.bincount(target, minlength=size)
+        self.sent_amount = np.bincount(source, weights=amount, minlength=size)
+        self.received_amount = np.bincount(target, weights=amount, minlength=size)
+        self.fraud_sent = np.bincount(source, weights=fraud, minlength=size).astype(np.int64)
+        self.fraud_received = np.bincount(target, weights=fraud, minlength=size).astype(np.int64)
+
+        # Transactions per VPA, oldest first (rows without a time first,
+        # ties in table order); self-transfers listed once
+        own = source != target
+        entity = np.concatenate([source, target[own]])
+        rows = np.concatenate([np.arange(n), np.flatnonzero(own)])
+        times = self._times(df)
+        self.row_indptr, order = _csr(entity, size, rows, times[rows])
+        self.rows = rows[order]
+        self.fraud_transactions = np.bincount(entity, weights=fraud[rows], minlength=size).astype(np.int64)
+        self.fraud_amount = np.bincount(entity, weights=fraud_amount[rows], minlength=size)
+
+        # Edges: one per (payer, beneficiary) pair with totals
+        edge_ids, pairs = pd.factorize(source * size + target)
+        edge_count = len(pairs)
+        self.edge_source = pairs // size
+        self.edge_target = pairs % size
+        self.edge_count = np.bincount(edge_ids, minlength=edge_count)
+        self.edge_amount = np.bincount(edge_ids, weights=amount, minlength=edge_count)
+        self.edge_fraud = np.bincount(edge_ids, weights=fraud, minlength=edge_count).astype(np.int64)
+        self.out_indptr, self.out_edges = _csr(self.edge_source, size, -self.edge_count)
+        self.in_indptr, self.in_edges = _csr(self.edge_target, size, -self.edge_count)
+
+        # Row columns for listing transactions
+        self.transaction_id = self._column(df, "TRANSACTION_ID", [f"TXN_{idx}" for idx in df.index])
+        self.timestamp = self._column(df, "TXN_TIMESTAMP", [""] * n)
+        self.amount = amount
+        self.fraud = fraud
+        self.source = source
+        self.target = target
+
+        self.attributes = {
+            name: _Attribute(source, df[column], size)
+            for name, column in (("devices", "DEVICE_ID"), ("ip_addresses", "IP_ADDRESS"))
+            if column in df.columns
+        }
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held, for the result cache budget"""
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        # Object arrays hold pointers; count the strings they point to roughly
+        strings = 64 * (len(self.names) + 2 * len(self.transaction_id))
+        return sum(a.nbytes for a in arrays) + strings + sum(a.nbytes for a in self.attributes.values())
+
+    def entity_id(self, vpa: str) -> int:
+        """Integer id of a VPA, -1 when unknown"""
+        return int(self._index.get_indexer([vpa])[0])
+
+    def profile(self, vpa: str, limit: int = DEFAULT_PROFILE_LIMIT) -> Optional[Dict[str, Any]]:
+        """Totals, top counterparties, devices, IPs and latest transactions of a VPA"""
+        entity = self.entity_id(vpa)
+        if entity < 0:
+            return None
+        start, stop = self.row_indptr[entity], self.row_indptr[entity + 1]
+        profile = {
+            "vpa": vpa,
+            "transactions": int(stop - start),
+            "sent": {"transactions": int(self.sent[entity]), "amount": float(self.sent_amount[entity])},
+            "received": {"transactions": int(self.received[entity]), "amount": float(self.received_amount[entity])},
+            "fraud": {
+                "transactions": int(self.fraud_transactions[entity]),
+                "sent": int(self.fraud_sent[entity]),
+                "received": int(self.fraud_received[entity]),
+                "amount": float(self.fraud_amount[entity])
+            },
+            "payees": self._counterparties(self.out_indptr, self.out_edges, self.edge_target, entity, limit),
+            "payers": self._counterparties(self.in_indptr, self.in_edges, self.edge_source, entity, limit),
+            # Latest first
+            "recent_transactions": self._transactions(self.rows[max(start, stop - limit):stop][::-1])
+        }
+        for name, attribute in self.attributes.items():
+            profile[name] = attribute.get(entity, limit)
+        return profile
+
+    def neighborhood(self, vpa: str, hops: int = 1, max_nodes: int = DEFAULT_NEIGHBOR_LIMIT) -> Optional[Dict[str, Any]]:
+        """Subgraph within `hops` transfers of a VPA, in either direction
+
+        At most max_nodes nodes, heaviest counterparties first at each hop.
+        Work is bounded by max_nodes per visited node, not by degree.
+        """
+        entity = self.entity_id(vpa)
+        if entity < 0:
+            return None
+        max_nodes = min(max_nodes, MAX_NEIGHBOR_LIMIT)
+        hops = min(hops, MAX_HOPS)
+        included = [np.array([entity])]
+        depth = [np.zeros(1, dtype=np.int64)]
+        scanned_edges = []
+        frontier = included[0]
+        count = 1
+        truncated = False
+        for hop in range(1, hops + 1):
+            if len(frontier) == 0:
+                break
+            # Fewer than max_nodes scanned neighbours can already be included,
+            # so max_nodes per list always finds every new node there is room for
+            out_edges = self._slices(self.out_indptr, self.out_edges, frontier, max_nodes)
+            in_edges = self._slices(self.in_indptr, self.in_edges, frontier, max_nodes)
+            scanned_edges.extend([out_edges, in_edges])
+            candidates = pd.unique(np.concatenate([self.edge_target[out_edges], self.edge_source[in_edges]]))
+            candidates = candidates[~np.isin(candidates, np.concatenate(included))]
+            if len(candidates) > max_nodes - count:
+                candidates = candidates[:max_nodes - count]
+                truncated = True
+            included.append(candidates)
+            depth.append(np.full(len(candidates), hop))
+            count += len(candidates)
+            frontier = candidates
+        if len(frontier) and frontier is not included[0]:
+            # Edges touching the outermost nodes that the scans above missed
+            scanned_edges.append(self._slices(self.out_indptr, self.out_edges, frontier, max_nodes))
+            scanned_edges.append(self._slices(self.in_indptr, self.in_edges, frontier, max_nodes))
+
+        nodes = np.concatenate(included)
+        depth = np.concatenate(depth)
+        edges = pd.unique(np.concatenate(scanned_edges)) if scanned_edges else np.array([], dtype=np.int64)
+        edges = edges[np.isin(self.edge_source[edges], nodes) & np.isin(self.edge_target[edges], nodes)]
+        return {
+            "vpa": vpa,
+            "hops": hops,
+            "truncated": truncated,
+            "nodes": [
+                {
+                    "id": name,
+                    "label": name.split('@')[0] if '@' in name else name[:10],
+                    "hop": hop,
+                    "fraud": fraud > 0,
+                    "transactions": transactions
+                }
+                for name, hop, fraud, transactions in zip(
+                    self.names[nodes].tolist(), depth.tolist(),
+                    self.fraud_transactions[nodes].tolist(),
+                    (self.row_indptr[nodes + 1] - self.row_indptr[nodes]).tolist()
+                )
+            ],
+            "edges": [
+                {"from": source, "to": target, "count": count, "amount": amount,
+                 "fraud_count": fraud_count, "fraud": fraud_count > 0}
+                for source, target, count, amount, fraud_count in zip(
+                    self.names[self.edge_source[edges]].tolist(), self.names[self.edge_target[edges]].tolist(),
+                    self.edge_count[edges].tolist(), self.edge_amount[edges].tolist(),
+                    self.edge_fraud[edges].tolist()
+                )
+            ]
+        }
+
+    def _slices(self, indptr: np.ndarray, values: np.ndarray, entities: np.ndarray, cap: int) -> np.ndarray:
+        """First `cap` values of each entity's CSR row, concatenated"""
+        starts = indptr[entities]
+        lengths = np.minimum(indptr[entities + 1] - starts, cap)
+        total = int(lengths.sum())
+        if total == 0:
+            return np.array([], dtype=np.int64)
+        # Position of every taken value: its row start plus its offset in the row
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return values[np.repeat(starts, lengths) + offsets]
+
+    def _counterparties(self, indptr: np.ndarray, edge_order: np.ndarray, other: np.ndarray,
+                        entity: int, limit: int) -> Dict[str, Any]:
+        start, stop = indptr[entity], indptr[entity + 1]
+        top = edge_order[start:min(stop, start + limit)]
+        return {
+            "count": int(stop - start),
+            "top": [
+                {"vpa": vpa, "transactions": count, "amount": amount, "fraud_count": fraud_count}
+                for vpa, count, amount, fraud_count in zip(
+                    self.names[other[top]].tolist(), self.edge_count[top].tolist(),
+                    self.edge_amount[top].tolist(), self.edge_fraud[top].tolist()
+                )
+            ]
+        }
+
+    def _transactions(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        return [
+            {"transaction_id": txn_id, "timestamp": timestamp, "amount": amount,
+             "payer_vpa": payer, "beneficiary_vpa": beneficiary, "is_fraud": fraud}
+            for txn_id, timestamp, amount, payer, beneficiary, fraud in zip(
+                self.transaction_id[rows].tolist(), self.timestamp[rows].tolist(), self.amount[rows].tolist(),
+                self.names[self.source[rows]].tolist(), self.names[self.target[rows]].tolist(),
+                self.fraud[rows].tolist()
+            )
+        ]
+
+    def _times(self, df: pd.DataFrame) -> np.ndarray:
+        """Transaction times as sortable integers, the smallest value where unknown"""
+        if "TXN_TIME" in df.columns:
+            times = df["TXN_TIME"]
+        elif "TXN_TIMESTAMP" in df.columns:
+            times = parse_timestamps(df["TXN_TIMESTAMP"])
+        else:
+            return np.zeros(len(df), dtype=np.int64)
+        # NaT is the smallest int64
+        return times.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+    def _column(self, df: pd.DataFrame, column: str, default: List[Any]) -> np.ndarray:
+        if column not in df.columns:
+            return np.array(default, dtype=object)
+        return np.asarray(df[column].tolist(), dtype=object)
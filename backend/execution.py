@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+# inline runs on the event loop (old behaviour), thread and process use a pool
+EXECUTION_MODES = ("inline", "thread", "process")
+
+
+def _frame_from_ipc(data: bytes) -> "SharedFrame":
+    reader = pa_ipc.open_stream(pa.py_buffer(data))
+    return SharedFrame(reader.read_all().to_pandas())
+
+
+class SharedFrame:
+    """DataFrame handed between processes as an Arrow IPC stream
+
+    Within one process the frame is passed by reference. Pickling, which
+    only happens when crossing into or out of a worker process, writes
+    the columns as Arrow buffers instead of pickling values one by one.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    def __reduce__(self):
+        if not ARROW_AVAILABLE:
+            return (SharedFrame, (self.frame,))
+        table = pa.Table.from_pandas(self.frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return (_frame_from_ipc, (sink.getvalue().to_pybytes(),))
+
+
+class ExecutionBackend:
+    """Runs CPU-bound stages off the event loop
+
+    inline:  call on the event loop, blocking it (no pool)
+    thread:  bounded thread pool in this process
+    process: bounded pool of spawned worker processes; functions and
+             arguments must be picklable, DataFrames go as SharedFrame
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+        self.submitted = 0
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """Pool for this backend, created on first use"""
+        if self._executor is None and self.mode != "inline":
+            if self.mode == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="detect"
+                )
+            else:
+                # Spawned workers start clean, without the app's threads and sockets
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the configured backend and await the result"""
+        self.submitted += 1
+        if self.mode == "inline":
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def spool(self, source: io.IOBase, directory: Optional[str] = None) -> Any:
+        """Upload source as the worker should receive it
+
+        Process workers cannot share file objects, so the upload is copied
+        to a temporary file whose path is passed instead. The caller
+        removes it with release().
+        """
+        if self.mode != "process":
+            return source
+        fd, path = tempfile.mkstemp(suffix=".csv", dir=directory)
+        with os.fdopen(fd, "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        return path
+
+    def release(self, spooled: Any):
+        """Remove a temporary file created by spool()"""
+        if isinstance(spooled, str) and os.path.exists(spooled):
+            os.remove(spooled)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers if self.mode != "inline" else 0,
+            "submitted": self.submitted
+        }
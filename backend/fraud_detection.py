@@ -1,23 +1,60 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Sequence
+from vpa_matcher import ReloadablePatternSet
+from identifiers import is_encoded, shared_codes
 
 class FraudDetector:
-    def __init__(self):
-        # Fraud indicators for VPA patterns
-        self.fraud_vpa_patterns = [
-            'pay', 'rzp', 'bonus', 'win', 'loan', 'cashback', 
-            'credit', 'reward', 'prize', 'offer', 'lucky'
-        ]
+    def __init__(self, vectorized: bool = True, patterns_file: Optional[str] = None):
+        # Fraud indicators for VPA patterns, compiled once and reloaded
+        # from patterns_file whenever it changes
+        self.pattern_set = ReloadablePatternSet(patterns_file=patterns_file)
+        # Score whole columns at once instead of walking rows
+        self.vectorized = vectorized
+
+    @property
+    def fraud_vpa_patterns(self) -> List[str]:
+        return self.pattern_set.patterns
+
+    @fraud_vpa_patterns.setter
+    def fraud_vpa_patterns(self, patterns: Sequence[str]):
+        self.pattern_set.set_patterns(patterns)
+
+    def reload_patterns(self) -> bool:
+        """Pick up changes to the pattern file without a restart"""
+        return self.pattern_set.reload()
     
-    def detect_fraud(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Detect fraud transactions based on IS_FRAUD column and patterns"""
+    def detect_fraud(self, df: pd.DataFrame, frame: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """Detect fraud transactions based on IS_FRAUD column and patterns
+
+        frame, when the caller already has it, is result_frame(df) and is
+        not computed again.
+        """
+        self.reload_patterns()
+        if self.vectorized:
+            return self._detect_fraud_vectorized(df, frame)
+        return self._detect_fraud_rows(df)
+
+    def detect_fraud_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """detect_fraud without the per-row detailed_results, only counts and fraud transactions"""
+        self.reload_patterns()
+        if self.vectorized:
+            frame = self.result_frame(df)
+            results = self._detect_fraud_vectorized(df, frame[frame["is_fraud"].to_numpy(dtype=bool)])
+        else:
+            results = self._detect_fraud_rows(df)
+        del results["detailed_results"]
+        return results
+
+    def _detect_fraud_rows(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Reference row-at-a-time implementation of detect_fraud"""
         results = {
             "fraud_count": 0,
             "fraud_transactions": [],
             "detailed_results": []
         }
         
+        matcher = self.pattern_set.matcher
         for idx, row in df.iterrows():
             # Check if it's marked as fraud in CSV
             is_fraud = bool(row.get('IS_FRAUD', 0))
@@ -27,10 +64,8 @@ class FraudDetector:
             beneficiary_vpa = str(row.get('BENEFICIARY_VPA', '')).lower()
             
             # Check for suspicious patterns
-            suspicious_patterns = []
-            for pattern in self.fraud_vpa_patterns:
-                if pattern in payer_vpa or pattern in beneficiary_vpa:
-                    suspicious_patterns.append(pattern)
+            matched = set(matcher.match(payer_vpa)) | set(matcher.match(beneficiary_vpa))
+            suspicious_patterns = matcher.pattern_names(sorted(matched))
             
             # Calculate risk score (0-100)
             risk_score = 0
@@ -76,6 +111,172 @@ class FraudDetector:
         
         return results
     
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Score all transactions column-wise, same rules as the row loop"""
+        n = len(df)
+
+        # Fraud flag from CSV, truthiness matches bool(value)
+        if 'IS_FRAUD' in df.columns:
+            is_fraud = df['IS_FRAUD'].to_numpy(dtype=object).astype(bool)
+        else:
+            is_fraud = np.zeros(n, dtype=bool)
+
+        # Matched pattern indices per row
+        matcher = self.pattern_set.matcher
+        matches = self._pattern_matches(df, matcher)
+        pattern_count = np.fromiter((len(m) for m in matches), dtype=np.int64, count=n)
+
+        # Risk score: 80 for flagged fraud, 60 + 10 per pattern when patterns hit
+        risk_score = np.where(is_fraud, 80, 0)
+        risk_score = np.where(
+            pattern_count > 0,
+            np.maximum(risk_score, 60 + pattern_count * 10),
+            risk_score
+        ).astype(np.int64)
+
+        risk_level = np.select(
+            [risk_score >= 70, risk_score >= 40],
+            ["High", "Medium"],
+            default="Low"
+        ).astype(object)
+
+        # Pattern lists and explanations, only rows with hits need Python work
+        suspicious_patterns = [[] for _ in range(n)]
+        explanation = np.where(
+            is_fraud,
+            self._generate_explanation(True, []),
+            self._generate_explanation(False, [])
+        ).astype(object)
+        # Rows share a handful of distinct hit combinations, build each once
+        combo_explanations = {}
+        for i in np.flatnonzero(pattern_count).tolist():
+            key = (matches[i], bool(is_fraud[i]))
+            if key not in combo_explanations:
+                names = matcher.pattern_names(matches[i])
+                combo_explanations[key] = (names, self._generate_explanation(key[1], names))
+            names, text = combo_explanations[key]
+            suspicious_patterns[i] = list(names)
+            explanation[i] = text
+
+        return pd.DataFrame({
+            "is_fraud": is_fraud,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "suspicious_patterns": pd.Series(suspicious_patterns, dtype=object).to_numpy(),
+            "explanation": explanation
+        }, index=df.index)
+
+    def _pattern_matches(self, df: pd.DataFrame, matcher) -> List[tuple]:
+        """Sorted pattern indices found in either VPA of each row"""
+        n = len(df)
+        if n == 0:
+            return []
+
+        # Match each distinct lowercased VPA once, then map back to rows
+        (payer, beneficiary), uniques = shared_codes([
+            self._text_column(df, 'PAYER_VPA', ''), self._text_column(df, 'BENEFICIARY_VPA', '')
+        ])
+        lowered, lowered_uniques = pd.factorize(np.array([str(v).lower() for v in uniques], dtype=object))
+        unique_matches = matcher.match_many(lowered_uniques.tolist())
+
+        matches = [()] * n
+        for i, (p, b) in enumerate(zip(lowered[payer].tolist(), lowered[beneficiary].tolist())):
+            payer_hits, beneficiary_hits = unique_matches[p], unique_matches[b]
+            if payer_hits and beneficiary_hits:
+                matches[i] = tuple(sorted(set(payer_hits) | set(beneficiary_hits)))
+            elif payer_hits or beneficiary_hits:
+                matches[i] = payer_hits or beneficiary_hits
+        return matches
+
+    def _text_column(self, df: pd.DataFrame, column: str, default: Any):
+        """Column as it is (encoded or not), or an object array of a default when it is missing"""
+        if column not in df.columns:
+            return np.full(len(df), default, dtype=object)
+        return df[column]
+
+    def result_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Per-transaction results as columns, one per transaction_result field"""
+        scored = self.score_frame(df)
+        n = len(df)
+
+        if 'AMOUNT' in df.columns:
+            amounts = df['AMOUNT'].to_numpy(dtype=np.float64)
+        else:
+            amounts = np.zeros(n)
+
+        return pd.DataFrame({
+            "transaction_id": self._object_values(df, 'TRANSACTION_ID', [f'TXN_{idx}' for idx in df.index]),
+            "timestamp": self._encoded_values(df, 'TXN_TIMESTAMP', ''),
+            "amount": amounts,
+            "payer_vpa": self._encoded_values(df, 'PAYER_VPA', 'Unknown'),
+            "beneficiary_vpa": self._encoded_values(df, 'BENEFICIARY_VPA', 'Unknown'),
+            "is_fraud": scored["is_fraud"].to_numpy(),
+            "risk_score": scored["risk_score"].to_numpy(),
+            "risk_level": scored["risk_level"].to_numpy(),
+            "suspicious_patterns": scored["suspicious_patterns"].to_numpy(),
+            "explanation": scored["explanation"].to_numpy()
+        })
+
+    def _detect_fraud_vectorized(self, df: pd.DataFrame, frame: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """Column-at-a-time implementation of detect_fraud"""
+        if frame is None:
+            frame = self.result_frame(df)
+
+        results = {
+            "fraud_count": 0,
+            "fraud_transactions": [],
+            "detailed_results": []
+        }
+        detailed_results = results["detailed_results"]
+        fraud_transactions = results["fraud_transactions"]
+
+        for txn_id, timestamp, amount, payer, beneficiary, is_fraud, risk_score, risk_level, patterns, explanation in zip(
+            *(frame[column].tolist() for column in frame.columns)
+        ):
+            transaction_result = {
+                "transaction_id": txn_id,
+                "timestamp": timestamp,
+                "amount": amount,
+                "payer_vpa": payer,
+                "beneficiary_vpa": beneficiary,
+                "is_fraud": is_fraud,
+                "risk_score": risk_score,
+                "risk_level": risk_level,
+                "suspicious_patterns": patterns,
+                "explanation": explanation
+            }
+
+            detailed_results.append({
+                "transaction": transaction_result,
+                "classification": {
+                    "label": "Fraud" if is_fraud else "Legitimate",
+                    "confidence": risk_score / 100,
+                    "risk": risk_level
+                },
+                "explanation": [explanation]
+            })
+
+            if is_fraud:
+                fraud_transactions.append(transaction_result)
+
+        results["fraud_count"] = len(fraud_transactions)
+        return results
+
+    def _object_values(self, df: pd.DataFrame, column: str, default: Any) -> np.ndarray:
+        """Column as an object array of Python values, or a default when it is missing"""
+        values = np.empty(len(df), dtype=object)
+        if column in df.columns:
+            values[:] = df[column].tolist()
+        else:
+            values[:] = default
+        return values
+
+    def _encoded_values(self, df: pd.DataFrame, column: str, default: Any):
+        """Dictionary-encoded columns kept as codes, others as _object_values"""
+        if column in df.columns and is_encoded(df[column]):
+            return df[column].array
+        return self._object_values(df, column, default)
+
     def _generate_explanation(self, is_fraud: bool, patterns: List[str]) -> str:
         """Generate explanation for fraud detection"""
         explanations = []
@@ -1,70 +1,336 @@
 import pandas as pd
-import networkx as nx
-from pyvis.network import Network
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from graph_analytics import GraphAnalytics
+from identifiers import shared_codes
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+# Level-of-detail views of the transaction graph
+GRAPH_VIEWS = ("full", "top", "fraud", "page")
+GRAPH_RANKINGS = ("fraud", "degree", "amount")
+
+# Node standing in for everything outside a top-K or fraud view
+OTHER_NODE_ID = "__other__"
+
+class GraphView:
+    """Which part of the graph to return and how much of it
+
+    full:  every node and edge
+    top:   the `limit` highest-ranked nodes
+    fraud: nodes of components containing fraud, ranked and capped at `limit`
+    page:  `limit` edges starting at `cursor`, with their endpoints
+    """
+
+    def __init__(self, mode: str = "full", limit: int = 200, rank_by: str = "fraud",
+                 cursor: int = 0, collapse: bool = True):
+        if mode not in GRAPH_VIEWS:
+            raise ValueError(f"Unknown graph view: {mode}")
+        if rank_by not in GRAPH_RANKINGS:
+            raise ValueError(f"Unknown graph ranking: {rank_by}")
+        if limit < 1 or cursor < 0:
+            raise ValueError("Graph limit must be positive and cursor non-negative")
+        self.mode = mode
+        self.limit = limit
+        self.rank_by = rank_by
+        self.cursor = cursor
+        self.collapse = collapse
+
+    def key(self) -> tuple:
+        """Hashable identity, used as a cache variant"""
+        if self.mode == "full":
+            return ("full",)
+        return (self.mode, self.limit, self.rank_by, self.cursor, self.collapse)
 
 class GraphAnalyzer:
-    def create_graph(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def __init__(self, analytics: Optional[GraphAnalytics] = None):
+        # Fraud-ring analytics attached to every graph payload
+        self.analytics = analytics or GraphAnalytics()
+
+    def create_graph(self, df: pd.DataFrame, view: Optional[GraphView] = None) -> Dict[str, Any]:
         """Create network graph data from transactions"""
+        return self.graph_payload(self.aggregate_edges(df), view)
+
+    def new_graph(self) -> pd.DataFrame:
+        """Empty edge table, one row per (payer, beneficiary) pair"""
+        return pd.DataFrame({
+            'source': pd.Series(dtype=object),
+            'target': pd.Series(dtype=object),
+            'count': pd.Series(dtype=np.int64),
+            'amount': pd.Series(dtype=np.float64),
+            'fraud_count': pd.Series(dtype=np.int64)
+        })
+
+    def add_transactions(self, edges: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+        """Merge a batch of transactions into an edge table, returns the new table"""
+        return self.merge_edges(edges, self.aggregate_edges(df))
+
+    def merge_edges(self, edges: pd.DataFrame, batch: pd.DataFrame) -> pd.DataFrame:
+        """Merge an aggregated batch into an edge table, returns the new table"""
+        if edges.empty:
+            return batch
+        return self._group_edges([edges, batch])
+
+    def aggregate_edges(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Group transactions by (payer, beneficiary) into an edge table
+
+        Each edge carries the transaction count, the total amount and the
+        number of fraudulent transactions between the pair.
+        """
+        n = len(df)
+        fallback = [f'Unknown_{idx}' for idx in df.index]
+        if 'AMOUNT' in df.columns:
+            amount = df['AMOUNT'].to_numpy(dtype=np.float64)
+        else:
+            amount = np.zeros(n)
+        if 'IS_FRAUD' in df.columns:
+            fraud = df['IS_FRAUD'].to_numpy(dtype=object).astype(bool)
+        else:
+            fraud = np.zeros(n, dtype=bool)
+
+        # Integer node ids; values with the same str() share a node, as
+        # they would as networkx keys
+        (source, target), uniques = shared_codes([
+            self._raw_column(df, 'PAYER_VPA', fallback), self._raw_column(df, 'BENEFICIARY_VPA', fallback)
+        ])
+        name_codes, names = pd.factorize(np.array([str(v) for v in uniques], dtype=object))
+
+        return self._edges_from_codes(
+            name_codes[source], name_codes[target], names,
+            np.ones(n, dtype=np.int64), amount, fraud.astype(np.int64)
+        )
+
+    def _raw_column(self, df: pd.DataFrame, column: str, fallback: List[str]):
+        """Column as it is (encoded or not), or the fallback when it is missing"""
+        if column not in df.columns:
+            return np.array(fallback, dtype=object)
+        return df[column]
+
+    def _group_edges(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """Sum the rows of edge tables sharing a (source, target) pair"""
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return self.new_graph()
+        codes, names = shared_codes([f['source'] for f in frames] + [f['target'] for f in frames])
+        return self._edges_from_codes(
+            np.concatenate(codes[:len(frames)]), np.concatenate(codes[len(frames):]), names,
+            *(np.concatenate([f[column].to_numpy() for f in frames]) for column in ('count', 'amount', 'fraud_count'))
+        )
+
+    def _edges_from_codes(self, source: np.ndarray, target: np.ndarray, names: np.ndarray,
+                          count: np.ndarray, amount: np.ndarray, fraud_count: np.ndarray) -> pd.DataFrame:
+        """Group rows by node-id pair into an edge table, keeping first-seen order"""
+        if len(source) == 0:
+            return self.new_graph()
+
+        # One int64 key per ordered pair
+        node_count = len(names)
+        pair_key = source.astype(np.int64) * node_count + target
+        edge_ids, pair_keys = pd.factorize(pair_key)
+        edge_count = len(pair_keys)
+
+        # Decoded: nearly every edge has its own pair of names, so a
+        # dictionary would not make the table any smaller
+        return pd.DataFrame({
+            'source': names[pair_keys // node_count],
+            'target': names[pair_keys % node_count],
+            'count': np.bincount(edge_ids, weights=count, minlength=edge_count).astype(np.int64),
+            'amount': np.bincount(edge_ids, weights=amount, minlength=edge_count),
+            'fraud_count': np.bincount(edge_ids, weights=fraud_count, minlength=edge_count).astype(np.int64)
+        })
+
+    def to_networkx(self, edges: pd.DataFrame) -> "networkx.DiGraph":
+        """Build a networkx graph from an edge table, for analytics that need one"""
+        # networkx is imported on first use to keep app startup fast
+        import networkx as nx
         G = nx.DiGraph()
-        
-        # Add nodes and edges
-        for idx, row in df.iterrows():
-            payer = str(row.get('PAYER_VPA', f'Unknown_{idx}'))
-            beneficiary = str(row.get('BENEFICIARY_VPA', f'Unknown_{idx}'))
-            amount = float(row.get('AMOUNT', 0))
-            is_fraud = bool(row.get('IS_FRAUD', 0))
-            
-            # Add nodes
-            G.add_node(payer, type='user', fraud=is_fraud)
-            G.add_node(beneficiary, type='user', fraud=is_fraud)
-            
-            # Add edge (transaction)
-            G.add_edge(
-                payer, 
-                beneficiary, 
-                amount=amount,
-                fraud=is_fraud,
-                transaction_id=row.get('TRANSACTION_ID', f'TXN_{idx}')
+        G.add_edges_from(
+            (source, target, {"count": count, "amount": amount, "fraud": fraud_count > 0})
+            for source, target, count, amount, fraud_count in zip(
+                edges['source'].tolist(), edges['target'].tolist(), edges['count'].tolist(),
+                edges['amount'].tolist(), edges['fraud_count'].tolist()
+            )
+        )
+        return G
+
+    def node_codes(self, edges: pd.DataFrame):
+        """Integer node ids for edge sources and targets, plus the node names"""
+        (source, target), names = shared_codes([edges['source'], edges['target']])
+        return source, target, names
+
+    def node_metrics(self, edges: pd.DataFrame, node_codes=None, component=None) -> pd.DataFrame:
+        """Per-node degree, amount, fraud count and weak component id"""
+        source, target, names = node_codes or self.node_codes(edges)
+        codes = np.concatenate([source, target])
+        node_count = len(names)
+        amount = edges['amount'].to_numpy()
+        fraud_count = edges['fraud_count'].to_numpy()
+
+        if component is None:
+            adjacency = coo_matrix(
+                (np.ones(len(source), dtype=np.int8), (source, target)),
+                shape=(node_count, node_count)
             )
-        
+            _, component = connected_components(adjacency, directed=True, connection='weak')
+
+        return pd.DataFrame({
+            'degree': np.bincount(codes, minlength=node_count),
+            'amount': np.bincount(codes, weights=np.concatenate([amount, amount]), minlength=node_count),
+            'fraud_count': np.bincount(codes, weights=np.concatenate([fraud_count, fraud_count]), minlength=node_count).astype(np.int64),
+            'component': component
+        }, index=pd.Index(names, dtype=object))
+
+    def graph_payload(self, edges: pd.DataFrame, view: Optional[GraphView] = None) -> Dict[str, Any]:
+        """Convert an edge table to vis.js nodes, edges and statistics
+
+        Without a view (or with the full view) every node and edge is
+        returned. Other views bound the payload by view.limit.
+        """
+        node_codes = self.node_codes(edges)
+        statistics = self._statistics(edges, node_codes)
+        analysis = self.analytics.analyze(*node_codes, edges)
+        statistics["analytics"] = analysis["summary"]
+        node_analytics = analysis["nodes"]
+        if view is None or view.mode == "full":
+            return self._payload(edges, None, self._fraud_node_ids(edges), statistics, node_analytics)
+
+        if view.mode == "page":
+            page = edges.iloc[view.cursor:view.cursor + view.limit]
+            next_cursor = view.cursor + view.limit
+            statistics["view"] = {
+                "mode": view.mode,
+                "cursor": view.cursor,
+                "next_cursor": next_cursor if next_cursor < len(edges) else None
+            }
+            return self._payload(page, None, self._fraud_node_ids(edges), statistics, node_analytics)
+
+        # Rank candidate nodes and keep the top `limit`
+        metrics = self.node_metrics(edges, node_codes, node_analytics['component'].to_numpy())
+        candidates = metrics
+        if view.mode == "fraud":
+            fraud_components = metrics.loc[metrics['fraud_count'] > 0, 'component'].unique()
+            candidates = metrics[metrics['component'].isin(fraud_components)]
+        rank_column = "fraud_count" if view.rank_by == "fraud" else view.rank_by
+        ranking = [rank_column] + [c for c in ("fraud_count", "degree", "amount") if c != rank_column]
+        selected = candidates.sort_values(ranking, ascending=False, kind='stable').index[:view.limit]
+
+        is_selected = np.zeros(len(metrics), dtype=bool)
+        is_selected[metrics.index.get_indexer(selected)] = True
+        in_source = is_selected[node_codes[0]]
+        in_target = is_selected[node_codes[1]]
+        view_edges = edges[in_source & in_target]
+        node_ids = selected.tolist()
+        fraud_ids = set(metrics.index[metrics['fraud_count'] > 0].intersection(selected))
+
+        # Fold edges to unselected nodes into a single aggregate node
+        collapsed = len(metrics) - len(selected)
+        if view.collapse and collapsed:
+            boundary = edges[in_source ^ in_target].copy()
+            boundary.loc[~in_target[in_source ^ in_target], 'target'] = OTHER_NODE_ID
+            boundary.loc[~in_source[in_source ^ in_target], 'source'] = OTHER_NODE_ID
+            if not boundary.empty:
+                view_edges = pd.concat([view_edges, self._group_edges([boundary])], ignore_index=True)
+
+        statistics["view"] = {
+            "mode": view.mode,
+            "rank_by": view.rank_by,
+            "limit": view.limit,
+            "candidate_nodes": len(candidates),
+            "collapsed_nodes": collapsed if view.collapse else 0
+        }
+        payload = self._payload(view_edges, node_ids, fraud_ids, statistics, node_analytics)
+        if view.collapse and collapsed:
+            other_fraud = bool((metrics['fraud_count'] > 0).sum() > len(fraud_ids))
+            payload["nodes"].append({
+                "id": OTHER_NODE_ID,
+                "label": f"Other ({collapsed:,} nodes)",
+                "color": "#ef4444" if other_fraud else "#94a3b8",
+                "size": 25,
+                "fraud": other_fraud,
+                "collapsed": collapsed
+            })
+        return payload
+
+    def _fraud_node_ids(self, edges: pd.DataFrame) -> set:
+        """Nodes touching at least one fraudulent transaction"""
+        fraud_edges = edges[edges['fraud_count'] > 0]
+        return set(fraud_edges['source'].tolist()) | set(fraud_edges['target'].tolist())
+
+    def _statistics(self, edges: pd.DataFrame, node_codes) -> Dict[str, Any]:
+        """Whole-graph counts, independent of the requested view"""
+        source, target, names = node_codes
+        fraud = (edges['fraud_count'] > 0).to_numpy()
+        return {
+            "total_nodes": len(names),
+            "fraud_nodes": len(np.unique(np.concatenate([source[fraud], target[fraud]]))),
+            "total_edges": len(edges),
+            "fraud_edges": int((edges['fraud_count'] > 0).sum()),
+            "total_transactions": int(edges['count'].sum()),
+            "fraud_transactions": int(edges['fraud_count'].sum())
+        }
+
+    def _payload(self, edges: pd.DataFrame, node_ids: Optional[List[str]], fraud_ids: set,
+                 statistics: Dict[str, Any], node_analytics: pd.DataFrame) -> Dict[str, Any]:
+        """vis.js nodes and edges for an edge table
+
+        Nodes default to the edge endpoints in first-seen order and carry
+        their fraud-ring analytics.
+        """
+        sources = edges['source'].tolist()
+        targets = edges['target'].tolist()
+        edge_fraud = (edges['fraud_count'] > 0).tolist()
+
+        if node_ids is None:
+            node_ids = list(dict.fromkeys(v for pair in zip(sources, targets) for v in pair))
+
+        node_ids = [node for node in node_ids if node != OTHER_NODE_ID]
+        metrics = node_analytics.reindex(node_ids)
+
         # Convert to format suitable for visualization
         nodes = []
-        edges = []
-        
-        for node in G.nodes():
-            node_data = G.nodes[node]
+        edge_list = []
+
+        for node, component, component_ratio, in_cycle, round_trip, fan_in, fan_out, pagerank, mule_score in zip(
+            node_ids, metrics['component'].tolist(), metrics['component_fraud_ratio'].round(4).tolist(),
+            metrics['in_cycle'].tolist(), metrics['round_trip'].tolist(), metrics['fan_in'].tolist(),
+            metrics['fan_out'].tolist(), metrics['pagerank'].tolist(), metrics['mule_score'].round(4).tolist()
+        ):
+            fraud = node in fraud_ids
             nodes.append({
                 "id": node,
                 "label": node.split('@')[0] if '@' in node else node[:10],
-                "color": "#ef4444" if node_data.get('fraud', False) else "#22c55e",
+                "color": "#ef4444" if fraud else "#22c55e",
                 "size": 25,
-                "fraud": node_data.get('fraud', False)
+                "fraud": fraud,
+                "component": component,
+                "component_fraud_ratio": component_ratio,
+                "in_cycle": in_cycle,
+                "round_trip": round_trip,
+                "fan_in": fan_in,
+                "fan_out": fan_out,
+                "pagerank": pagerank,
+                "mule_score": mule_score
             })
-        
-        for edge in G.edges():
-            edge_data = G.edges[edge]
-            edges.append({
-                "from": edge[0],
-                "to": edge[1],
-                "color": "#ef4444" if edge_data.get('fraud', False) else "#3b82f6",
-                "width": 2 if edge_data.get('fraud', False) else 1,
-                "label": f"₹{edge_data.get('amount', 0):,.0f}",
-                "fraud": edge_data.get('fraud', False)
+
+        for source, target, count, amount, fraud_count, fraud in zip(
+            sources, targets, edges['count'].tolist(), edges['amount'].tolist(),
+            edges['fraud_count'].tolist(), edge_fraud
+        ):
+            edge_list.append({
+                "from": source,
+                "to": target,
+                "color": "#ef4444" if fraud else "#3b82f6",
+                "width": 2 if fraud else 1,
+                "label": f"₹{amount:,.0f}",
+                "fraud": fraud,
+                "count": count,
+                "amount": amount,
+                "fraud_count": fraud_count
             })
-        
-        # Calculate statistics
-        fraud_nodes = len([n for n in nodes if n['fraud']])
-        fraud_edges = len([e for e in edges if e['fraud']])
-        
+
         return {
             "nodes": nodes,
-            "edges": edges,
-            "statistics": {
-                "total_nodes": len(nodes),
-                "fraud_nodes": fraud_nodes,
-                "total_transactions": len(edges),
-                "fraud_transactions": fraud_edges
-            }
-        }
\ No newline at end of file
+            "edges": edge_list,
+            "statistics": statistics
+        }
@@ -0,0 +1,492 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from identifiers import shared_codes
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (Windows): every process is treated as the writer
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+# Batches absorbed between automatic snapshots
+DEFAULT_SNAPSHOT_EVERY = 20
+
+MANIFEST_FILE = "manifest.json"
+
+# Held by the one process allowed to write snapshots into a directory
+WRITER_LOCK_FILE = "writer.lock"
+
+
+class _AppendIndex:
+    """Key -> position lookup for an append-only sequence of unique keys
+
+    Older keys live in a pandas Index (hash table built once), recent ones
+    in a dict. The dict is folded into the Index once it outgrows a
+    fraction of it, so lookups and inserts stay amortized O(batch).
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None, fold_ratio: float = 0.25,
+                 min_fold: int = 65536):
+        self._frozen = pd.Index(keys if keys is not None else [])
+        self._recent: Dict[Any, int] = {}
+        self.fold_ratio = fold_ratio
+        self.min_fold = min_fold
+
+    def __len__(self):
+        return len(self._frozen) + len(self._recent)
+
+    def get(self, keys: np.ndarray) -> np.ndarray:
+        """Positions of keys, -1 where unknown"""
+        positions = self._frozen.get_indexer(keys) if len(self._frozen) else np.full(len(keys), -1)
+        if self._recent:
+            missing = np.flatnonzero(positions < 0)
+            positions[missing] = [self._recent.get(k, -1) for k in keys[missing].tolist()]
+        return positions
+
+    def add(self, keys: np.ndarray, all_keys) -> np.ndarray:
+        """Append new keys, returns their positions
+
+        all_keys() returns every key in position order, used when folding.
+        """
+        start = len(self)
+        self._recent.update(zip(keys.tolist(), range(start, start + len(keys))))
+        if len(self._recent) > max(self.min_fold, self.fold_ratio * len(self._frozen)):
+            self._frozen = pd.Index(all_keys())
+            self._recent = {}
+        return np.arange(start, start + len(keys))
+
+
+class _Columns:
+    """Growable numpy columns sharing one length, doubling on overflow"""
+
+    def __init__(self, dtypes: Dict[str, Any]):
+        self.size = 0
+        self.data = {name: np.zeros(1024, dtype=dtype) for name, dtype in dtypes.items()}
+
+    def reserve(self, extra: int):
+        needed = self.size + extra
+        capacity = len(next(iter(self.data.values())))
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name, column in self.data.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.data[name] = grown
+
+    def view(self, name: str) -> np.ndarray:
+        return self.data[name][:self.size]
+
+
+def _subtract_edges(edges: pd.DataFrame, removed: pd.DataFrame) -> pd.DataFrame:
+    """Edge table minus another's totals, dropping pairs left without transactions"""
+    totals = ['count', 'amount', 'fraud_count']
+    negated = removed.assign(**{column: -removed[column] for column in totals})
+    combined = pd.concat([edges, negated], ignore_index=True).astype({'source': object, 'target': object})
+    merged = combined.groupby(['source', 'target'], sort=False, as_index=False)[totals].sum()
+    return merged[merged['count'] > 0].reset_index(drop=True)
+
+
+class GraphStore:
+    """Long-lived transaction graph that new batches are appended to
+
+    Nodes are VPAs with integer ids in first-seen order; edges are
+    (payer, beneficiary) pairs with count, amount and fraud totals, in the
+    same layout as GraphAnalyzer's edge tables. Each batch updates edge
+    aggregates, per-node degrees and totals, and weak-component membership
+    (union-find) in place, in time proportional to the batch.
+
+    The store starts from a seed (the reference data's edges), tagged
+    with a version; reseed() swaps it for a newer one and keeps every
+    batch appended since.
+
+    Snapshots are Arrow IPC files in snapshot_dir, written under a new
+    generation and published by atomically replacing a small manifest.
+    A snapshot directory has a single writer: the first process to open
+    the store (or snapshot it) takes an exclusive lock on WRITER_LOCK_FILE
+    and keeps it until it exits. Stores in other processes, e.g. other
+    uvicorn workers, load the snapshot but do not write one, so batches
+    they absorb live only in their memory.
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY):
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self.opened = False
+        # None until the writer lock was tried, then whether this process holds it
+        self.writer: Optional[bool] = None
+        self._writer_file = None
+        self._reset()
+
+    def _reset(self):
+        self.nodes = _Columns({
+            'parent': np.int64, 'component_size': np.int64,
+            'out_degree': np.int64, 'in_degree': np.int64,
+            'transactions': np.int64, 'amount': np.float64, 'fraud_count': np.int64
+        })
+        self.names = np.empty(1024, dtype=object)
+        self.edges = _Columns({
+            'source': np.int64, 'target': np.int64,
+            'count': np.int64, 'amount': np.float64, 'fraud_count': np.int64
+        })
+        self._node_index = _AppendIndex()
+        self._edge_index = _AppendIndex()
+        self.component_count = 0
+        # Bumped by every change, lets callers cache derived payloads
+        self.version = 0
+        self.pending_batches = 0
+        self.generation = 0
+        self.seed_version: Optional[str] = None
+        self.seed_edges: Optional[pd.DataFrame] = None
+
+    def add_edges(self, batch: pd.DataFrame):
+        """Merge an aggregated edge table (GraphAnalyzer.aggregate_edges) into the store"""
+        if batch.empty:
+            return
+        with self._lock:
+            (source, target), batch_names = shared_codes([batch['source'], batch['target']])
+            node_ids = self._node_ids(batch_names)
+            source = node_ids[source]
+            target = node_ids[target]
+            count = batch['count'].to_numpy(dtype=np.int64)
+            amount = batch['amount'].to_numpy(dtype=np.float64)
+            fraud_count = batch['fraud_count'].to_numpy(dtype=np.int64)
+
+            # Pairs are unique within an aggregated batch
+            pair_keys = (source << 32) | target
+            rows = self._edge_index.get(pair_keys)
+            new = rows < 0
+            if new.any():
+                rows[new] = self._add_edges(source[new], target[new], pair_keys[new])
+
+            edges = self.edges.data
+            edges['count'][rows] += count
+            edges['amount'][rows] += amount
+            edges['fraud_count'][rows] += fraud_count
+
+            nodes = self.nodes.data
+            np.add.at(nodes['out_degree'], source[new], 1)
+            np.add.at(nodes['in_degree'], target[new], 1)
+            endpoints = np.concatenate([source, target])
+            np.add.at(nodes['transactions'], endpoints, np.concatenate([count, count]))
+            np.add.at(nodes['amount'], endpoints, np.concatenate([amount, amount]))
+            np.add.at(nodes['fraud_count'], endpoints, np.concatenate([fraud_count, fraud_count]))
+
+            self._union(source[new], target[new])
+            self.version += 1
+            self.pending_batches += 1
+
+    def reseed(self, edges: pd.DataFrame, version: str):
+        """Replace the seed edges with a new version's, keeping the batches added since
+
+        Rebuilds the store, in time proportional to the whole graph. A
+        store holding edges but no seed (a snapshot from before seeds
+        were recorded) is taken to hold these edges already.
+        """
+        with self._lock:
+            if self.seed_edges is None and self.edges.size:
+                self.seed_edges, self.seed_version = edges, version
+                return
+            appended = self.edge_table()
+            if self.seed_edges is not None and len(self.seed_edges):
+                appended = _subtract_edges(appended, self.seed_edges)
+            version_before, generation = self.version, self.generation
+            self._reset()
+            self.add_edges(edges)
+            self.add_edges(appended)
+            self.version = version_before + 1
+            self.generation = generation
+            self.pending_batches = 1
+            self.seed_edges, self.seed_version = edges, version
+
+    def _node_ids(self, names: np.ndarray) -> np.ndarray:
+        """Ids for node names, assigning new ids to unseen names"""
+        ids = self._node_index.get(names)
+        new = ids < 0
+        if new.any():
+            added = names[new]
+            count = len(added)
+            start = self.nodes.size
+            self.nodes.reserve(count)
+            if len(self.names) < start + count:
+                grown = np.empty(max(start + count, len(self.names) * 2), dtype=object)
+                grown[:start] = self.names[:start]
+                self.names = grown
+            self.names[start:start + count] = added
+            self.nodes.size += count
+            self.nodes.data['parent'][start:start + count] = np.arange(start, start + count)
+            self.nodes.data['component_size'][start:start + count] = 1
+            self.component_count += count
+            ids[new] = self._node_index.add(added, lambda: self.names[:self.nodes.size])
+        return ids
+
+    def _add_edges(self, source: np.ndarray, target: np.ndarray, pair_keys: np.ndarray) -> np.ndarray:
+        """Append new (source, target) rows with zero totals"""
+        count = len(source)
+        start = self.edges.size
+        self.edges.reserve(count)
+        self.edges.data['source'][start:start + count] = source
+        self.edges.data['target'][start:start + count] = target
+        self.edges.size += count
+        return self._edge_index.add(pair_keys, self._pair_keys)
+
+    def _pair_keys(self) -> np.ndarray:
+        return (self.edges.view('source') << 32) | self.edges.view('target')
+
+    def _find(self, nodes: np.ndarray) -> np.ndarray:
+        """Component roots, compressing the paths of the given nodes"""
+        parent = self.nodes.data['parent']
+        roots = parent[nodes]
+        while True:
+            above = parent[roots]
+            if np.array_equal(above, roots):
+                break
+            roots = above
+        parent[nodes] = roots
+        return roots
+
+    def _union(self, source: np.ndarray, target: np.ndarray):
+        """Merge the components joined by new edges, larger component wins"""
+        if len(source) == 0:
+            return
+        source_roots = self._find(source)
+        target_roots = self._find(target)
+        joined = source_roots != target_roots
+        if not joined.any():
+            return
+
+        # Connected components over the touched roots only
+        codes, roots = pd.factorize(np.concatenate([source_roots[joined], target_roots[joined]]))
+        m = int(joined.sum())
+        groups, labels = connected_components(
+            coo_matrix((np.ones(m, dtype=np.int8), (codes[:m], codes[m:])), shape=(len(roots), len(roots))),
+            directed=False
+        )
+        sizes = self.nodes.data['component_size'][roots]
+        order = np.lexsort((-sizes, labels))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = labels[order][1:] != labels[order][:-1]
+        representative = np.empty(groups, dtype=np.int64)
+        representative[labels[order][first]] = roots[order][first]
+
+        self.nodes.data['parent'][roots] = representative[labels]
+        self.nodes.data['component_size'][representative] = np.bincount(labels, weights=sizes, minlength=groups)
+        self.component_count -= len(roots) - groups
+
+    def edge_table(self) -> pd.DataFrame:
+        """Edge table in GraphAnalyzer layout, one row per pair in first-seen order"""
+        with self._lock:
+            names = self.names[:self.nodes.size]
+            return pd.DataFrame({
+                'source': names[self.edges.view('source')],
+                'target': names[self.edges.view('target')],
+                'count': self.edges.view('count').copy(),
+                'amount': self.edges.view('amount').copy(),
+                'fraud_count': self.edges.view('fraud_count').copy()
+            })
+
+    def node(self, name: str) -> Optional[Dict[str, Any]]:
+        """Degrees, totals and component of one VPA, None when unknown"""
+        with self._lock:
+            node_id = int(self._node_index.get(np.array([name], dtype=object))[0])
+            if node_id < 0:
+                return None
+            root = int(self._find(np.array([node_id]))[0])
+            nodes = self.nodes.data
+            return {
+                "id": name,
+                "out_degree": int(nodes['out_degree'][node_id]),
+                "in_degree": int(nodes['in_degree'][node_id]),
+                "transactions": int(nodes['transactions'][node_id]),
+                "amount": float(nodes['amount'][node_id]),
+                "fraud_count": int(nodes['fraud_count'][node_id]),
+                "component": root,
+                "component_size": int(nodes['component_size'][root])
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Store size and snapshot state"""
+        with self._lock:
+            return {
+                "nodes": self.nodes.size,
+                "edges": self.edges.size,
+                "components": self.component_count,
+                "transactions": int(self.edges.view('count').sum()),
+                "fraud_transactions": int(self.edges.view('fraud_count').sum()),
+                "version": self.version,
+                "generation": self.generation,
+                "pending_batches": self.pending_batches,
+                "seed_version": self.seed_version,
+                "writer": self.writer
+            }
+
+    def open(self) -> bool:
+        """Load the latest snapshot once, returns True when one was loaded"""
+        with self._lock:
+            if self.opened:
+                return False
+            self.opened = True
+            self._acquire_writer()
+            return self.load()
+
+    def _acquire_writer(self) -> bool:
+        """Try once to become the snapshot directory's writer, returns whether this store is"""
+        if self.writer is not None:
+            return self.writer
+        if not self.snapshot_dir or fcntl is None:
+            self.writer = True
+            return True
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        lock_file = open(os.path.join(self.snapshot_dir, WRITER_LOCK_FILE), 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            self.writer = False
+            return False
+        # Released when the file is closed, i.e. when the process exits
+        self._writer_file = lock_file
+        self.writer = True
+        return True
+
+    def snapshot_if_due(self) -> bool:
+        """Snapshot once snapshot_every batches have arrived since the last one"""
+        if self.pending_batches < self.snapshot_every:
+            return False
+        return self.snapshot()
+
+    def snapshot(self) -> bool:
+        """Write the store to snapshot_dir, returns False when snapshots are off or another process writes them"""
+        if not self.snapshot_dir or not ARROW_AVAILABLE:
+            return False
+        with self._lock:
+            if not self._acquire_writer():
+                return False
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            generation = self.generation + 1
+            roots = self._find(np.arange(self.nodes.size))
+            nodes = pa.table({
+                'name': pa.array(self.names[:self.nodes.size].tolist(), type=pa.string()),
+                'component': roots
+            })
+            edges = pa.table({name: self.edges.view(name) for name in self.edges.data})
+            files = {
+                "nodes": f"nodes-{generation}.arrow",
+                "edges": f"edges-{generation}.arrow"
+            }
+            self._write_table(nodes, files["nodes"])
+            self._write_table(edges, files["edges"])
+            if self.seed_edges is not None:
+                files["seed"] = f"seed-{generation}.arrow"
+                self._write_table(pa.Table.from_pandas(self.seed_edges, preserve_index=False), files["seed"])
+            self._write_manifest({
+                "generation": generation,
+                "files": files,
+                "nodes": self.nodes.size,
+                "edges": self.edges.size,
+                "seed_version": self.seed_version,
+                "created": time.time()
+            })
+
+            # Previous generations are unreachable once the manifest moved on
+            for name in os.listdir(self.snapshot_dir):
+                if name.endswith('.arrow') and name not in files.values():
+                    os.remove(os.path.join(self.snapshot_dir, name))
+            self.generation = generation
+            self.pending_batches = 0
+            return True
+
+    def load(self) -> bool:
+        """Replace the store with the snapshot in snapshot_dir, if there is one"""
+        if not self.snapshot_dir or not ARROW_AVAILABLE:
+            return False
+        manifest_path = os.path.join(self.snapshot_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return False
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        nodes = self._read_table(manifest["files"]["nodes"])
+        edges = self._read_table(manifest["files"]["edges"])
+        seed = self._read_table(manifest["files"]["seed"]) if "seed" in manifest["files"] else None
+        with self._lock:
+            self._reset()
+            if seed is not None:
+                self.seed_edges = seed.to_pandas()
+                self.seed_version = manifest.get("seed_version")
+            names = nodes.column('name').to_numpy(zero_copy_only=False)
+            node_count = len(names)
+            self.names = names
+            self.nodes.reserve(node_count)
+            self.nodes.size = node_count
+            self.edges.reserve(edges.num_rows)
+            self.edges.size = edges.num_rows
+            for name in self.edges.data:
+                self.edges.data[name][:edges.num_rows] = edges.column(name).to_numpy()
+
+            # Degrees, totals and component sizes are derived from edges
+            source = self.edges.view('source')
+            target = self.edges.view('target')
+            count = self.edges.view('count')
+            amount = self.edges.view('amount')
+            fraud_count = self.edges.view('fraud_count')
+            endpoints = np.concatenate([source, target])
+            component = nodes.column('component').to_numpy()
+            data = self.nodes.data
+            data['parent'][:node_count] = component
+            data['component_size'][:node_count] = np.bincount(component, minlength=node_count)
+            data['out_degree'][:node_count] = np.bincount(source, minlength=node_count)
+            data['in_degree'][:node_count] = np.bincount(target, minlength=node_count)
+            data['transactions'][:node_count] = np.bincount(
+                endpoints, weights=np.concatenate([count, count]), minlength=node_count
+            )
+            data['amount'][:node_count] = np.bincount(
+                endpoints, weights=np.concatenate([amount, amount]), minlength=node_count
+            )
+            data['fraud_count'][:node_count] = np.bincount(
+                endpoints, weights=np.concatenate([fraud_count, fraud_count]), minlength=node_count
+            )
+            self.component_count = int(np.count_nonzero(component == np.arange(node_count)))
+
+            self._node_index = _AppendIndex(names)
+            self._edge_index = _AppendIndex((source << 32) | target)
+            self.generation = manifest["generation"]
+            self.version += 1
+            return True
+
+    def _write_table(self, table, filename: str):
+        """Write an Arrow IPC file via a temp file and rename"""
+        path = os.path.join(self.snapshot_dir, filename)
+        tmp_path = path + '.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _read_table(self, filename: str):
+        # The table's buffers keep the memory map open
+        source = pa.memory_map(os.path.join(self.snapshot_dir, filename), 'r')
+        return pa_ipc.open_file(source).read_all()
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        path = os.path.join(self.snapshot_dir, MANIFEST_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,114 @@
+from typing import Any, List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Anonymized identifiers of the UPI extract (hex/base64 strings, VPAs)
+# that repeat across rows and are only ever compared for equality.
+# TRANSACTION_ID and RRN are unique per row, so a dictionary would not
+# save anything; they stay plain strings.
+IDENTIFIER_COLUMNS = (
+    'PAYER_VPA', 'PAYER_IFSC', 'PAYER_ACCOUNT',
+    'BENEFICIARY_VPA', 'BENEFICIARY_IFSC', 'BENEFICIARY_ACCOUNT',
+    'LONGITUDE', 'LATITUDE', 'DEVICE_ID', 'IP_ADDRESS'
+)
+
+# Columns dictionary-encoded at parse time; minute-resolution timestamp
+# text repeats as much as the identifiers do
+ENCODED_COLUMNS = IDENTIFIER_COLUMNS + ('TXN_TIMESTAMP',)
+
+
+def is_encoded(values: Any) -> bool:
+    return isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype)
+
+
+def encode_column(values: Any) -> pd.Categorical:
+    """Integer codes plus one table of distinct values, in first-seen order"""
+    if is_encoded(values):
+        return pd.Categorical(values)
+    codes, uniques = pd.factorize(values)
+    return pd.Categorical.from_codes(codes, categories=uniques)
+
+
+def encode_identifiers(df: pd.DataFrame, columns: Sequence[str] = ENCODED_COLUMNS) -> pd.DataFrame:
+    """Text columns of df as categoricals, decoded again by tolist() at the API boundary
+
+    Columns that are missing, numeric or already encoded are left alone;
+    missing values stay missing.
+    """
+    encoded = {
+        column: encode_column(df[column]) for column in columns
+        if column in df.columns and _is_text(df[column])
+    }
+    if not encoded:
+        return df
+    return df.assign(**encoded)
+
+
+def _is_text(values: pd.Series) -> bool:
+    # Object columns holding NaN do not count as string dtype, but are text all the same
+    return not is_encoded(values) and (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values))
+
+
+def shared_codes(columns: Sequence[Any]) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Codes of several columns into one table of distinct values
+
+    Same result as pd.factorize over the columns concatenated, with
+    missing values kept as a value of their own: the table is in
+    first-seen order. Encoded columns are recoded through their
+    dictionaries, so only distinct values are hashed, not rows.
+    """
+    if not any(is_encoded(c) for c in columns):
+        codes, table = pd.factorize(
+            np.concatenate([np.asarray(c, dtype=object) for c in columns]), use_na_sentinel=False
+        )
+        split = np.cumsum([len(c) for c in columns[:-1]])
+        return np.split(codes.astype(np.int64), split), np.asarray(table, dtype=object)
+
+    local_codes = []
+    tables = []
+    shared = all(is_encoded(c) for c in columns) and all(
+        c.dtype.categories.equals(columns[0].dtype.categories) for c in columns
+    )
+    for column in columns:
+        if is_encoded(column):
+            codes = np.asarray(column.cat.codes if isinstance(column, pd.Series) else column.codes, dtype=np.int64)
+            table = column.dtype.categories.to_numpy(dtype=object)
+            if (codes < 0).any():
+                # Missing values go to an extra slot after the dictionary
+                codes = np.where(codes < 0, len(table), codes)
+                table = np.append(table, np.nan)
+        else:
+            codes, table = pd.factorize(np.asarray(column, dtype=object), use_na_sentinel=False)
+            codes = codes.astype(np.int64)
+        local_codes.append(codes)
+        tables.append(np.asarray(table, dtype=object))
+
+    if shared:
+        # One dictionary for all columns: codes are comparable as they are,
+        # including the missing-value slot
+        codes = np.concatenate(local_codes)
+        table = max(tables, key=len)
+    else:
+        offsets = np.cumsum([0] + [len(t) for t in tables[:-1]])
+        codes = np.concatenate([c + offset for c, offset in zip(local_codes, offsets)])
+        merged, table = pd.factorize(np.concatenate(tables), use_na_sentinel=False)
+        codes = merged[codes]
+    # Renumber in order of first appearance across the rows
+    codes, order = pd.factorize(codes)
+    table = np.asarray(table, dtype=object)[order]
+
+    split = np.cumsum([len(c) for c in columns[:-1]])
+    return np.split(codes.astype(np.int64), split), table
+
+
+def concat_encoded(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat that keeps categorical columns encoded, merging their dictionaries"""
+    columns = {}
+    for column in frames[0].columns:
+        pieces = [frame[column] for frame in frames]
+        if len(pieces) > 1 and all(is_encoded(p) for p in pieces):
+            columns[column] = union_categoricals(pieces, ignore_order=True)
+        else:
+            columns[column] = pd.concat(pieces, ignore_index=True)
+    return pd.DataFrame(columns)
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Sequence, Tuple, Union
+from columnar_store import (
+    ARROW_AVAILABLE, DETECTION_COLUMNS, SAMPLE_BYTES, csv_convert_options, parse_timestamps, sniff_csv,
+    transaction_times
+)
+from fraud_detection import FraudDetector
+from graph_analyzer import GraphAnalyzer, GraphView
+from graph_store import GraphStore
+from identifiers import concat_encoded, encode_identifiers
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+# Rows parsed and scored per chunk; bounds peak memory during ingestion
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Bytes parsed per Arrow CSV block; larger blocks parse no faster but
+# keep more decoded rows alive at once
+CSV_BLOCK_BYTES = 256 * 1024
+
+
+def iter_csv_chunks(source: Union[str, BinaryIO], chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                    columns: Optional[Sequence[str]] = DETECTION_COLUMNS) -> Iterator[pd.DataFrame]:
+    """Parse a CSV path or file object lazily, chunk_rows rows at a time
+
+    Uses the UPI extract profile (see columnar_store): only `columns`
+    (all when None) are parsed, with fixed types, by Arrow's CSV reader.
+    TXN_TIMESTAMP stays the source text and TXN_TIME is added, parsed in
+    the layout found in the first rows where it matches. Identifier
+    columns come out dictionary-encoded (see identifiers).
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            header, timestamp_format = sniff_csv(f.read(SAMPLE_BYTES))
+    else:
+        start = source.tell()
+        header, timestamp_format = sniff_csv(source.read(SAMPLE_BYTES))
+        source.seek(start)
+    if not header:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+
+    if not ARROW_AVAILABLE:
+        usecols = (lambda column: column in columns) if columns is not None else None
+        with pd.read_csv(source, chunksize=chunk_rows, usecols=usecols) as reader:
+            for chunk in reader:
+                yield _with_times(encode_identifiers(chunk), timestamp_format)
+        return
+
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+        convert_options=csv_convert_options(header, columns)
+    )
+    pending = []
+    rows = 0
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunk_rows:
+            table = pa.Table.from_batches(pending)
+            yield _with_times(encode_identifiers(table.slice(0, chunk_rows).to_pandas()), timestamp_format)
+            rest = table.slice(chunk_rows)
+            pending = rest.to_batches()
+            rows = rest.num_rows
+    if rows:
+        yield _with_times(encode_identifiers(pa.Table.from_batches(pending).to_pandas()), timestamp_format)
+
+
+def _with_times(chunk: pd.DataFrame, timestamp_format: Optional[str]) -> pd.DataFrame:
+    if 'TXN_TIMESTAMP' in chunk.columns:
+        chunk['TXN_TIME'] = parse_timestamps(chunk['TXN_TIMESTAMP'], timestamp_format)
+    return chunk
+
+
+class DetectionAccumulator:
+    """Folds scored chunks into running counters, fraud list and graph
+
+    With a graph_store, each chunk's edges are also appended to it. When
+    paged, per-row results are kept as a columnar frame (results_frame)
+    instead of dicts, for serving page by page. With keep_frame that
+    frame is also returned as scored_frame alongside the usual results,
+    with the rows' TXN_TIME as an extra txn_time column.
+    """
+
+    def __init__(self, fraud_detector: FraudDetector, graph_analyzer: GraphAnalyzer,
+                 include_results: bool = True, graph_view: Optional[GraphView] = None,
+                 graph_store: Optional[GraphStore] = None, paged: bool = False,
+                 keep_frame: bool = False):
+        self.fraud_detector = fraud_detector
+        self.graph_analyzer = graph_analyzer
+        self.include_results = include_results
+        self.graph_view = graph_view
+        self.graph_store = graph_store
+        self.paged = paged
+        self.keep_frame = keep_frame
+        self.result_frames = []
+        self.txn_times = []
+        if paged or keep_frame:
+            # One pattern set for the whole upload
+            fraud_detector.reload_patterns()
+
+        self.total_transactions = 0
+        self.fraud_count = 0
+        self.fraud_transactions = []
+        self.detailed_results = []
+        self.graph = graph_analyzer.new_graph()
+
+    def add_chunk(self, df: pd.DataFrame):
+        """Score one chunk and merge it into the running totals"""
+        self.total_transactions += len(df)
+        frame = None
+        if self.paged or self.keep_frame:
+            frame = self.fraud_detector.result_frame(df)
+            self.result_frames.append(frame)
+        if self.keep_frame:
+            self.txn_times.append(transaction_times(df).to_numpy())
+        if self.paged:
+            self.fraud_count += int(frame["is_fraud"].sum())
+        else:
+            fraud_results = self.fraud_detector.detect_fraud(df, frame)
+            self.fraud_count += fraud_results["fraud_count"]
+            self.fraud_transactions.extend(fraud_results["fraud_transactions"])
+            if self.include_results:
+                self.detailed_results.extend(fraud_results["detailed_results"])
+
+        batch = self.graph_analyzer.aggregate_edges(df)
+        self.graph = self.graph_analyzer.merge_edges(self.graph, batch)
+        if self.graph_store is not None:
+            self.graph_store.add_edges(batch)
+
+    def result(self) -> Dict[str, Any]:
+        """Response payload in the same shape as the /detect/ endpoint
+
+        Paged results carry results_frame in place of fraud_transactions
+        and results.
+        """
+        result = {
+            "total_transactions": self.total_transactions,
+            "fraud_detected": self.fraud_count,
+            "graph_data": self.graph_analyzer.graph_payload(self.graph, self.graph_view)
+        }
+        if self.paged or self.keep_frame:
+            if self.result_frames:
+                frame = concat_encoded(self.result_frames)
+            else:
+                frame = self.fraud_detector.result_frame(pd.DataFrame())
+            if self.keep_frame:
+                # Shallow copy, so results_frame keeps only the result fields
+                scored = frame.copy(deep=False)
+                if self.txn_times:
+                    scored["txn_time"] = np.concatenate(self.txn_times)
+                else:
+                    scored["txn_time"] = np.array([], dtype="datetime64[ns]")
+                result["scored_frame"] = scored
+        if self.paged:
+            result["results_frame"] = frame
+            return result
+
+        result["fraud_transactions"] = self.fraud_transactions
+        if self.include_results:
+            result["results"] = self.detailed_results
+        return result
+
+
+def detect_stream(source: Union[str, BinaryIO], fraud_detector: FraudDetector, graph_analyzer: GraphAnalyzer,
+                  chunk_rows: Optional[int] = None, include_results: bool = True,
+                  graph_view: Optional[GraphView] = None,
+                  graph_store: Optional[GraphStore] = None) -> Dict[str, Any]:
+    """Stream a CSV upload through fraud scoring and graph building chunk by chunk"""
+    return detect_stream_with_graph(
+        source, fraud_detector, graph_analyzer, chunk_rows, include_results, graph_view, graph_store
+    )[0]
+
+
+def detect_stream_with_graph(source: Union[str, BinaryIO], fraud_detector: FraudDetector,
+                             graph_analyzer: GraphAnalyzer, chunk_rows: Optional[int] = None,
+                             include_results: bool = True, graph_view: Optional[GraphView] = None,
+                             graph_store: Optional[GraphStore] = None,
+                             progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             paged: bool = False, keep_frame: bool = False) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """Like detect_stream, also returning the upload's aggregated edge table
+
+    progress, when given, receives zero counts as soon as the work starts,
+    then running counts after every chunk.
+    """
+    accumulator = DetectionAccumulator(
+        fraud_detector, graph_analyzer, include_results, graph_view, graph_store, paged, keep_frame
+    )
+    if progress is not None:
+        progress({"rows_processed": 0, "fraud_detected": 0, "chunks": 0})
+    for chunks, chunk in enumerate(iter_csv_chunks(source, chunk_rows or DEFAULT_CHUNK_ROWS), 1):
+        accumulator.add_chunk(chunk)
+        if progress is not None:
+            progress({
+                "rows_processed": accumulator.total_transactions,
+                "fraud_detected": accumulator.fraud_count,
+                "chunks": chunks
+            })
+    return accumulator.result(), accumulator.graph
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Finished jobs and their results are kept this long
+DEFAULT_JOB_TTL_SECONDS = 3600
+
+# Queued or running jobs allowed per user
+DEFAULT_MAX_ACTIVE_JOBS = 2
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobLimitExceeded(Exception):
+    """The user already has the maximum number of active jobs"""
+
+
+class ProgressFile:
+    """Progress counters shared with a job's worker through a small JSON file
+
+    Picklable, so update() also works from a worker process. The first
+    update marks the job as started and records when.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started_at: Optional[float] = None
+
+    def update(self, counts: Dict[str, Any]):
+        if self.started_at is None:
+            self.started_at = time.time()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({**counts, "started_at": self.started_at}, f)
+        os.replace(tmp_path, self.path)
+
+    def read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def remove(self):
+        for path in (self.path, self.path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class DetectionJob:
+    """One background detection run and its outcome"""
+
+    def __init__(self, owner: str, source: str, options: Dict[str, Any], progress: ProgressFile):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.source = source
+        self.options = options
+        self.progress = progress
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expires_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+
+    def refresh(self) -> Dict[str, Any]:
+        """Worker progress counts, marking a queued job running once its worker has started"""
+        counts = self.progress.read()
+        started_at = counts.pop("started_at", None)
+        if started_at is not None and self.status == "queued":
+            self.status = "running"
+            self.started_at = started_at
+        return counts
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """Status payload; counts come from the worker until the result is in"""
+        if self.result is not None:
+            counts = {
+                "rows_processed": self.result["total_transactions"],
+                "fraud_detected": self.result["fraud_detected"]
+            }
+        else:
+            counts = {"rows_processed": 0, "fraud_detected": 0, **self.refresh()}
+        payload = {
+            "job_id": self.id,
+            "status": self.status,
+            **counts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at
+        }
+        if self.error is not None:
+            payload["error"] = self.error
+        if include_result and self.result is not None:
+            payload["result"] = self.result
+        return payload
+
+
+def _copy_upload(upload, path: str):
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(upload, target, 1024 * 1024)
+
+
+class JobManager:
+    """Runs detection jobs in the background and keeps results for a TTL
+
+    Uploads are spooled to spool_dir so they outlive the request. Each
+    user may have max_active jobs queued or running at once; the
+    execution backend bounds how many run in parallel overall.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS,
+                 max_active: int = DEFAULT_MAX_ACTIVE_JOBS, spool_dir: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_active = max_active
+        self.spool_dir = spool_dir or tempfile.gettempdir()
+        self._jobs: Dict[str, DetectionJob] = {}
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    async def submit(self, owner: str, upload, options: Dict[str, Any],
+                     runner: Callable[[DetectionJob], Awaitable[Dict[str, Any]]]) -> DetectionJob:
+        """Spool the upload and schedule runner(job) on the running event loop
+
+        The copy runs on a thread, outside the lock, so a large upload
+        holds up neither the event loop nor other callers.
+        """
+        with self._lock:
+            self._purge_expired()
+            active = sum(1 for job in self._jobs.values() if job.owner == owner and job.status in ACTIVE_STATUSES)
+            if active >= self.max_active:
+                raise JobLimitExceeded(f"At most {self.max_active} active detection jobs per user")
+
+            os.makedirs(self.spool_dir, exist_ok=True)
+            fd, source = tempfile.mkstemp(suffix='.csv', dir=self.spool_dir)
+            os.close(fd)
+            job = DetectionJob(owner, source, options, ProgressFile(source + '.progress'))
+            # Registered before the copy so it already counts against the limit
+            self._jobs[job.id] = job
+
+        try:
+            await asyncio.to_thread(_copy_upload, upload, source)
+        except BaseException:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            os.remove(source)
+            raise
+
+        task = asyncio.get_running_loop().create_task(self._run(job, runner))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: DetectionJob, runner: Callable[[DetectionJob], Awaitable[Dict[str, Any]]]):
+        # The job stays queued until its worker reports progress (see refresh())
+        try:
+            job.result = await runner(job)
+            job.refresh()
+            job.status = "completed"
+        except Exception as e:
+            job.refresh()
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.expires_at = job.finished_at + self.ttl_seconds
+            if os.path.exists(job.source):
+                os.remove(job.source)
+            job.progress.remove()
+
+    def get(self, job_id: str) -> Optional[DetectionJob]:
+        """Job by id, None when unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def list(self, owner: Optional[str] = None) -> List[DetectionJob]:
+        """Jobs of one user (or all users), newest first"""
+        with self._lock:
+            self._purge_expired()
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items() if job.expires_at is not None and job.expires_at <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -1,42 +1,73 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import FileResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 import pandas as pd
+import asyncio
 import json
 import os
-from fraud_detection import FraudDetector
-from graph_analyzer import GraphAnalyzer
-from report_generator import ReportGenerator
-from typing import List, Dict, Any
+import time
+import uuid
+import pipeline
+from pipeline import fraud_detector
+from graph_analyzer import GraphView
+from execution import ExecutionBackend, SharedFrame
+from result_cache import ResultCache, file_identity
+from graph_store import GraphStore, DEFAULT_SNAPSHOT_EVERY
+from jobs import JobManager, JobLimitExceeded, DetectionJob, DEFAULT_JOB_TTL_SECONDS, DEFAULT_MAX_ACTIVE_JOBS
+from result_store import (
+    ResultStore, ResultQuery, compact_results, page_results, page_columns, page_table,
+    summarize_results, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MAX_BULK_PAGE_SIZE, DEFAULT_RESULT_TTL_SECONDS
+)
+from status_store import StatusStore
+from transaction_repository import TransactionRepository, TransactionQuery, DEFAULT_UPLOAD_TTL_SECONDS
+from entity_index import (
+    EntityIndex, DEFAULT_PROFILE_LIMIT, MAX_PROFILE_LIMIT, DEFAULT_NEIGHBOR_LIMIT, MAX_NEIGHBOR_LIMIT, MAX_HOPS
+)
+from responses import FastJSONResponse, ArrowResponse, negotiate_format, ARROW_AVAILABLE
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import uvicorn
 import ssl
 import os
 
-# Redis setup with proper error handling
-try:
-    import redis
-    redis_client = redis.from_url(os.environ.get('REDIS_URL', 'redis://localhost:6379'))
-    redis_client.ping()
-    REDIS_AVAILABLE = True
-    print("Redis connected successfully")
-except Exception as e:
-    redis_client = None
-    REDIS_AVAILABLE = False
-    print(f"Running without Redis: {e}")
+# Redis is connected on first use rather than at import, so a slow or
+# missing Redis does not hold up startup
+redis_client = None
+REDIS_AVAILABLE: Optional[bool] = None
+# After a failed connection, no new attempt before this time
+redis_retry_at = 0.0
+
+def connect_redis() -> bool:
+    """Connect to Redis, retrying REDIS_RETRY_SECONDS after a failure"""
+    global redis_client, REDIS_AVAILABLE, redis_retry_at
+    if REDIS_AVAILABLE or time.time() < redis_retry_at:
+        return bool(REDIS_AVAILABLE)
+    try:
+        import redis
+        redis_client = redis.from_url(
+            os.environ.get('REDIS_URL', 'redis://localhost:6379'), socket_connect_timeout=2
+        )
+        redis_client.ping()
+        REDIS_AVAILABLE = True
+        print("Redis connected successfully")
+    except Exception as e:
+        redis_client = None
+        REDIS_AVAILABLE = False
+        redis_retry_at = time.time() + REDIS_RETRY_SECONDS
+        print(f"Running without Redis: {e}")
+    return REDIS_AVAILABLE
 
 # Import security modules
 from security.auth import (
-    authenticate_user, create_access_token, get_current_active_user,
-    Token, User, ACCESS_TOKEN_EXPIRE_MINUTES
+    authenticate_user, create_access_token, get_current_active_user, revoke_token,
+    oauth2_scheme, token_cache, revocation_list, Token, User, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from security.rbac import check_permissions, RoleChecker
-from security.anomaly_detection import anomaly_detector
-from security.rate_limiter import limiter, rate_limit_handler
-from slowapi.errors import RateLimitExceeded
+from security.anomaly_detection import anomaly_detector, audit_log_writer, REDIS_RETRY_SECONDS
+from security.rate_limiter import limiter, rate_limit_handler, RateLimitExceeded
 
 # Create logs directory
 os.makedirs("logs", exist_ok=True)
@@ -44,11 +75,11 @@ os.makedirs("logs", exist_ok=True)
 app = FastAPI(
     title="FraudShield API",
     description="Secure Fraud Detection System",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Add rate limiter
-app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
 
 # Security Middleware - Updated for deployment
@@ -67,10 +98,47 @@ app.add_middleware(
     max_age=3600,
 )
 
-# Initialize components
-fraud_detector = FraudDetector()
-graph_analyzer = GraphAnalyzer()
-report_generator = ReportGenerator()
+# Parse/score/graph/report stages run on this backend, off the event loop;
+# EXECUTION_WORKERS unset or 0 sizes the pool to the CPU count
+execution = ExecutionBackend(
+    os.environ.get('EXECUTION_BACKEND', 'thread'),
+    int(os.environ.get('EXECUTION_WORKERS', '0')) or None
+)
+
+# Cache for the reference dataset, its detection results and graph
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_MB', '512')) * 1024 * 1024
+)
+REFERENCE_CSV = os.path.join("data", "anonymized_sample_fraud_txn.csv")
+
+# Long-lived graph of the reference data plus every /detect/ upload
+graph_store = GraphStore(
+    os.environ.get('GRAPH_STORE_DIR', os.path.join("data", "graph_store")),
+    snapshot_every=int(os.environ.get('GRAPH_SNAPSHOT_EVERY', DEFAULT_SNAPSHOT_EVERY))
+)
+store_graph_payloads = {}
+# Serializes opening and reseeding the graph store; created on first use
+# so it belongs to the running event loop
+graph_store_lock: Optional[asyncio.Lock] = None
+
+# Paged detection results, served by /results/{result_id}
+result_store = ResultStore(
+    ttl_seconds=int(os.environ.get('RESULT_STORE_TTL', DEFAULT_RESULT_TTL_SECONDS)),
+    max_bytes=int(os.environ.get('RESULT_STORE_MAX_MB', '1024')) * 1024 * 1024
+)
+# Results of the unauthenticated /test/detect/, kept apart so they
+# cannot evict authenticated users' results
+test_result_store = ResultStore(
+    ttl_seconds=int(os.environ.get('RESULT_STORE_TTL', DEFAULT_RESULT_TTL_SECONDS)),
+    max_bytes=int(os.environ.get('TEST_RESULT_STORE_MAX_MB', '64')) * 1024 * 1024
+)
+
+# Background detection jobs, results kept for DETECTION_JOB_TTL seconds
+job_manager = JobManager(
+    ttl_seconds=int(os.environ.get('DETECTION_JOB_TTL', DEFAULT_JOB_TTL_SECONDS)),
+    max_active=int(os.environ.get('DETECTION_JOBS_PER_USER', DEFAULT_MAX_ACTIVE_JOBS)),
+    spool_dir=os.environ.get('DETECTION_JOB_DIR')
+)
 
 # Role checkers
 admin_only = RoleChecker(["admin"])
@@ -80,8 +148,242 @@ class TransactionAction(BaseModel):
     transaction_id: str
     action: str  # "verify" or "block"
 
-# Store for transaction statuses
-transaction_statuses = {}
+class BulkTransactionAction(BaseModel):
+    actions: List[TransactionAction]
+
+# Analyst verify/block decisions, shared by all workers and kept across restarts
+status_store = StatusStore(os.environ.get('DATABASE_URL', 'sqlite:///./fraudshield.db'))
+
+# Actions accepted by one bulk request
+MAX_BULK_ACTIONS = 100000
+
+# Scored reference and stored uploads, queried through /transactions/
+transaction_repository = TransactionRepository(os.environ.get('DATABASE_URL', 'sqlite:///./fraudshield.db'))
+# CSV path -> version last loaded into the repository by this worker
+repository_versions = {}
+# Uploads stored with store=true are deleted this many seconds after loading
+TRANSACTION_UPLOAD_TTL = int(os.environ.get('TRANSACTION_UPLOAD_TTL', DEFAULT_UPLOAD_TTL_SECONDS))
+
+def ensure_reference_csv(csv_path: str = REFERENCE_CSV):
+    """Create a small sample dataset if the reference CSV is missing"""
+    if not os.path.exists(csv_path):
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        sample_data = {
+            'TRANSACTION_ID': ['TXN001', 'TXN002', 'TXN003', 'TXN004', 'TXN005'],
+            'TXN_TIMESTAMP': ['2024-01-15 10:30:00', '2024-01-15 11:45:00', '2024-01-15 12:15:00', '2024-01-15 13:20:00', '2024-01-15 14:10:00'],
+            'AMOUNT': [1500.00, 50000.00, 750.50, 25000.00, 2250.00],
+            'IS_FRAUD': [0, 1, 0, 1, 0],
+            'PAYER_VPA': ['user1@paytm', 'user2@phonepe', 'user3@gpay', 'victim@upi', 'user5@paytm'],
+            'BENEFICIARY_VPA': ['merchant1@gpay', 'scammer@pay', 'shop@upi', 'bonus@win', 'restaurant@pay']
+        }
+        df = pd.DataFrame(sample_data)
+        df.to_csv(csv_path, index=False)
+
+async def load_reference_data(csv_path: str = REFERENCE_CSV) -> Dict[str, Any]:
+    """Fraud summary for the reference CSV, served from the result cache
+
+    Detection runs on the execution backend against the memory-mapped
+    columnar copy of the CSV. The result holds fraud_count,
+    fraud_transactions and total_transactions, not per-row results.
+    """
+    ensure_reference_csv(csv_path)
+    
+    # Detection output depends on the active pattern set as well as the file
+    fraud_detector.reload_patterns()
+    return await result_cache.get_or_compute_async(
+        csv_path, "detection", lambda: execution.run(pipeline.detect_file, csv_path),
+        variant=fraud_detector.pattern_set.version
+    )
+
+async def load_reference_edges(csv_path: str = REFERENCE_CSV) -> pd.DataFrame:
+    """Aggregated edge table of the reference CSV, served from the result cache"""
+    ensure_reference_csv(csv_path)
+    
+    async def compute():
+        return (await execution.run(pipeline.file_edges, csv_path)).frame
+    return await result_cache.get_or_compute_async(csv_path, "edges", compute)
+
+async def load_reference_entities(csv_path: str = REFERENCE_CSV) -> EntityIndex:
+    """Entity index of the reference CSV, served from the result cache"""
+    ensure_reference_csv(csv_path)
+    return await result_cache.get_or_compute_async(
+        csv_path, "entities", lambda: execution.run(pipeline.entity_index, csv_path)
+    )
+
+async def load_reference_graph(view: GraphView, csv_path: str = REFERENCE_CSV):
+    """Graph payload for the reference CSV, served from the result cache"""
+    edges = await load_reference_edges(csv_path)
+    return await result_cache.get_or_compute_async(
+        csv_path, "graph", lambda: execution.run(pipeline.graph_payload, SharedFrame(edges), view),
+        variant=view.key()
+    )
+
+async def ensure_reference_transactions(csv_path: str = REFERENCE_CSV):
+    """Load the scored reference CSV into the transaction repository when it or the patterns changed"""
+    ensure_reference_csv(csv_path)
+    fraud_detector.reload_patterns()
+    _, mtime_ns, size = file_identity(csv_path)
+    version = f"{mtime_ns}:{size}:{fraud_detector.pattern_set.version}"
+    if repository_versions.get(csv_path) == version:
+        return
+    if await asyncio.to_thread(transaction_repository.source_version, "reference") != version:
+        scored = await execution.run(pipeline.score_file, csv_path)
+        await asyncio.to_thread(transaction_repository.replace_source, "reference", scored.frame, version)
+    repository_versions[csv_path] = version
+
+async def store_upload(results: Dict[str, Any], owner: Optional[str]) -> Dict[str, Any]:
+    """Bulk-load an upload's scored rows into the transaction repository, expiring old uploads"""
+    scored = results.pop("scored_frame", None)
+    if scored is None:
+        return results
+    source = f"upload:{uuid.uuid4().hex}"
+    rows = await asyncio.to_thread(transaction_repository.append, source, scored.frame, owner)
+    await asyncio.to_thread(transaction_repository.expire_sources, TRANSACTION_UPLOAD_TTL)
+    results["repository"] = {"source": source, "rows": rows}
+    return results
+
+def reference_version(csv_path: str = REFERENCE_CSV) -> str:
+    ensure_reference_csv(csv_path)
+    _, mtime_ns, size = file_identity(csv_path)
+    return f"{mtime_ns}:{size}"
+
+async def ensure_graph_store():
+    """Open the graph store, seeded with the current reference CSV's edges
+
+    The store is loaded from its snapshot once. When the reference CSV
+    has changed since the store was seeded, its old edges are swapped
+    for the new ones; uploads absorbed so far are kept. Callers wait
+    until the store is ready.
+    """
+    global graph_store_lock
+    version = reference_version()
+    if graph_store.opened and graph_store.seed_version == version:
+        return
+    if graph_store_lock is None:
+        graph_store_lock = asyncio.Lock()
+    async with graph_store_lock:
+        if not graph_store.opened:
+            await asyncio.to_thread(graph_store.open)
+        if graph_store.seed_version != version:
+            edges = await load_reference_edges()
+            await asyncio.to_thread(graph_store.reseed, edges, version)
+            await asyncio.to_thread(graph_store.snapshot)
+
+async def load_store_graph(view: GraphView):
+    """Graph payload for the graph store, rebuilt when new batches arrive"""
+    await ensure_graph_store()
+    key = (graph_store.version, view.key())
+    if key not in store_graph_payloads:
+        edges = SharedFrame(graph_store.edge_table())
+        payload = await execution.run(pipeline.graph_payload, edges, view)
+        store_graph_payloads.clear()
+        store_graph_payloads[key] = payload
+    return store_graph_payloads[key]
+
+async def run_detection(file: UploadFile, include_results: bool, graph_view: GraphView,
+                        paged: bool = False, store: bool = False):
+    """Score an upload on the execution backend, returns the response and its edge table"""
+    source = await asyncio.to_thread(execution.spool, file.file)
+    try:
+        results, edges = await execution.run(
+            pipeline.detect_upload, source, include_results, graph_view, paged=paged, keep_frame=store
+        )
+    finally:
+        execution.release(source)
+    return results, edges.frame
+
+def publish_results(results: Dict[str, Any], owner: Optional[str], page_size: int,
+                    store: ResultStore = result_store) -> Dict[str, Any]:
+    """Move a paged result frame into a result store, adding summary counts and the first page"""
+    frame = results.pop("results_frame", None)
+    if frame is None:
+        return results
+    frame = compact_results(frame.frame)
+    results["result_id"] = store.put(frame, owner)
+    results["summary"] = summarize_results(frame)
+    results["page"] = page_results(frame, ResultQuery(limit=page_size))
+    return results
+
+async def run_detection_job(job: DetectionJob) -> Dict[str, Any]:
+    """Job runner: score the spooled upload and append it to the graph store"""
+    await ensure_graph_store()
+    results, edges = await execution.run(
+        pipeline.detect_upload, job.source, job.options["include_results"],
+        job.options["graph_view"], job.progress.update, job.options["paged"], job.options["store"]
+    )
+    results = await store_upload(results, job.owner)
+    results = publish_results(results, job.owner, job.options["page_size"])
+    await asyncio.to_thread(graph_store.add_edges, edges.frame)
+    await asyncio.to_thread(graph_store.snapshot_if_due)
+    
+    try:
+        await anomaly_detector.log_event("fraud_detection", job.owner, {
+            "job_id": job.id,
+            "total_transactions": results["total_transactions"],
+            "fraud_detected": results["fraud_detected"]
+        })
+    except:
+        pass
+    return results
+
+def graph_view_params(
+    graph_view: str = Query("full", pattern="^(full|top|fraud|page)$"),
+    graph_limit: int = Query(200, ge=1, le=5000),
+    graph_rank: str = Query("fraud", pattern="^(fraud|degree|amount)$"),
+    graph_cursor: int = Query(0, ge=0),
+    graph_collapse: bool = True
+) -> GraphView:
+    """Level of detail for graph_data: full, top-K nodes, fraud components or an edge page"""
+    return GraphView(graph_view, graph_limit, graph_rank, graph_cursor, graph_collapse)
+
+def upload_graph_view_params(
+    request: Request,
+    paged: bool = False,
+    view: GraphView = Depends(graph_view_params)
+) -> GraphView:
+    """graph_view_params for uploads; paged responses default to the top view so they stay bounded"""
+    if paged and "graph_view" not in request.query_params:
+        return GraphView("top", view.limit, view.rank_by, view.cursor, view.collapse)
+    return view
+
+def result_query_params(
+    request: Request,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_BULK_PAGE_SIZE),
+    fraud_only: bool = False,
+    risk_level: Optional[str] = Query(None, pattern="^(High|Medium|Low)$"),
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated result fields"),
+    result_format: Optional[str] = Query(
+        None, alias="format", pattern="^(rows|columns|arrow)$",
+        description="Overrides the Accept header: rows, columns or arrow"
+    )
+) -> ResultQuery:
+    """Page, filters, field projection and format for stored detection results"""
+    result_format = negotiate_format(request.headers.get("accept"), result_format)
+    if result_format == "arrow" and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=406, detail="Arrow results need pyarrow on the server")
+    try:
+        return ResultQuery(
+            cursor, limit, fraud_only, risk_level, min_amount, max_amount,
+            [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            result_format
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def results_response(frame: pd.DataFrame, query: ResultQuery):
+    """Page of stored results in the negotiated format"""
+    if query.format == "arrow":
+        table, next_cursor = page_table(frame, query)
+        headers = {"X-Result-Count": str(table.num_rows)}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+        return ArrowResponse(table, headers=headers)
+    if query.format == "columns":
+        return FastJSONResponse(page_columns(frame, query))
+    return FastJSONResponse(page_results(frame, query))
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -100,8 +402,9 @@ async def log_requests(request: Request, call_next):
     else:
         user_id = "anonymous"
     
+    # Recorded in the background so Redis never adds request latency
     try:
-        await anomaly_detector.log_event("api_request", user_id, {
+        anomaly_detector.log_event_nowait("api_request", user_id, {
             "method": request.method,
             "path": request.url.path,
             "client": request.client.host if request.client else "unknown"
@@ -126,7 +429,7 @@ async def health_check():
     """Health check endpoint for deployment"""
     return {
         "status": "healthy",
-        "redis_available": REDIS_AVAILABLE,
+        "redis_available": await asyncio.to_thread(connect_redis),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -164,14 +467,36 @@ async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.post("/auth/logout")
+async def logout(token: str = Depends(oauth2_scheme), current_user: User = Depends(get_current_active_user)):
+    """Revoke the access token used for this request, in every worker while Redis is up"""
+    shared = await revoke_token(token)
+    try:
+        await anomaly_detector.log_event("logout", current_user.username, {})
+    except:
+        pass
+    return {"status": "success", "revoked_in_all_workers": shared}
+
 @app.post("/detect/")
 @limiter.limit("10/minute")
 async def detect_fraud(
     request: Request,
     file: UploadFile = File(...),
+    include_results: bool = True,
+    paged: bool = False,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    store: bool = Query(False, description="Also load the scored rows into the transaction repository"),
+    graph_view: GraphView = Depends(upload_graph_view_params),
     current_user: User = Depends(analyst_or_admin)
 ):
-    """Upload CSV and detect fraud transactions"""
+    """Upload CSV and detect fraud transactions
+
+    With paged=true the per-transaction results stay on the server: the
+    response carries summary counts, a result_id and the first page, and
+    /results/{result_id} serves the rest. graph_data then defaults to the
+    top view rather than the full graph. With store=true the scored rows
+    are also loaded into the transaction repository, see /transactions/.
+    """
     try:
         # Log file upload
         try:
@@ -182,32 +507,26 @@ async def detect_fraud(
         except:
             pass
         
-        # Process file
-        contents = await file.read()
-        df = pd.read_csv(pd.io.common.BytesIO(contents))
-        
-        # Detect fraud
-        fraud_results = fraud_detector.detect_fraud(df)
-        
-        # Generate graph data
-        graph_data = graph_analyzer.create_graph(df)
+        # Stream the upload through detection and graph building in chunks,
+        # then append its edges to the persistent graph store
+        await ensure_graph_store()
+        results, edges = await run_detection(file, include_results, graph_view, paged, store)
+        results = await store_upload(results, current_user.username)
+        results = publish_results(results, current_user.username, page_size)
+        await asyncio.to_thread(graph_store.add_edges, edges)
+        await asyncio.to_thread(graph_store.snapshot_if_due)
         
         # Log fraud detection results
         try:
             await anomaly_detector.log_event("fraud_detection", current_user.username, {
-                "total_transactions": len(df),
-                "fraud_detected": fraud_results["fraud_count"]
+                "total_transactions": results["total_transactions"],
+                "fraud_detected": results["fraud_detected"]
             })
         except:
             pass
         
-        return {
-            "total_transactions": len(df),
-            "fraud_detected": fraud_results["fraud_count"],
-            "fraud_transactions": fraud_results["fraud_transactions"],
-            "graph_data": graph_data,
-            "results": fraud_results["detailed_results"]
-        }
+        # Results are plain JSON types already, skip jsonable_encoder's walk
+        return FastJSONResponse(results)
     except Exception as e:
         try:
             await anomaly_detector.log_event("error", current_user.username, {
@@ -218,54 +537,199 @@ async def detect_fraud(
             pass
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/detect/jobs")
+@limiter.limit("10/minute")
+async def submit_detection_job(
+    request: Request,
+    file: UploadFile = File(...),
+    include_results: bool = True,
+    paged: bool = False,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    store: bool = Query(False, description="Also load the scored rows into the transaction repository"),
+    graph_view: GraphView = Depends(upload_graph_view_params),
+    current_user: User = Depends(analyst_or_admin)
+):
+    """Queue a CSV upload for background fraud detection, returns a job id"""
+    try:
+        job = await job_manager.submit(
+            current_user.username, file.file,
+            {"include_results": include_results, "graph_view": graph_view,
+             "paged": paged, "page_size": page_size, "store": store},
+            run_detection_job
+        )
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    try:
+        await anomaly_detector.log_event("file_upload", current_user.username, {
+            "filename": file.filename,
+            "job_id": job.id
+        })
+    except:
+        pass
+    
+    return FastJSONResponse(job.to_dict(include_result=False), status_code=202)
+
+@app.get("/detect/jobs")
+async def list_detection_jobs(current_user: User = Depends(analyst_or_admin)):
+    """Status of the current user's detection jobs, without results"""
+    return [job.to_dict(include_result=False) for job in job_manager.list(current_user.username)]
+
+@app.get("/detect/jobs/{job_id}")
+async def get_detection_job(job_id: str, current_user: User = Depends(analyst_or_admin)):
+    """Job status, progress counts and, once completed, the detection results"""
+    job = job_manager.get(job_id)
+    if job is None or (job.owner != current_user.username and "admin" not in current_user.roles):
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return FastJSONResponse(job.to_dict())
+
+@app.get("/results/{result_id}")
+async def get_results_page(
+    result_id: str,
+    query: ResultQuery = Depends(result_query_params),
+    current_user: User = Depends(analyst_or_admin)
+):
+    """Page of stored detection results, filtered and projected
+
+    Rows of dicts by default; Accept: application/vnd.apache.arrow.stream
+    (or format=arrow) returns an Arrow IPC stream and
+    application/vnd.fraudshield.columns+json (or format=columns) one
+    array per field. Both columnar formats allow much larger pages.
+    """
+    frame = result_store.get(result_id, current_user.username)
+    if frame is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return results_response(frame, query)
+
+def transaction_query_params(
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    transaction_id: Optional[str] = None,
+    payer_vpa: Optional[str] = None,
+    beneficiary_vpa: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="TXN_TIMESTAMP at or after"),
+    end: Optional[datetime] = Query(None, description="TXN_TIMESTAMP before"),
+    risk_level: Optional[str] = Query(None, pattern="^(High|Medium|Low)$"),
+    fraud_only: bool = False,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    source: Optional[str] = Query(None, description="reference or upload:<id>"),
+    current_user: User = Depends(analyst_or_admin)
+) -> TransactionQuery:
+    """Filters and keyset cursor for the transaction repository
+
+    Non-admins see the reference data and their own stored uploads only.
+    """
+    try:
+        return TransactionQuery(
+            cursor, limit, transaction_id, payer_vpa, beneficiary_vpa, start, end,
+            risk_level, fraud_only, min_amount, max_amount, source,
+            owner=None if "admin" in current_user.roles else current_user.username
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/transactions/")
+async def query_transactions(
+    query: TransactionQuery = Depends(transaction_query_params),
+    current_user: User = Depends(analyst_or_admin)
+):
+    """Scored transactions from the repository, filtered through its indexes
+
+    Covers the reference dataset and uploads detected with store=true.
+    Pass next_cursor back as cursor for the following page.
+    """
+    await ensure_reference_transactions()
+    return FastJSONResponse(await asyncio.to_thread(transaction_repository.query, query))
+
+@app.delete("/transactions/sources/{source}")
+async def delete_transaction_source(source: str, current_user: User = Depends(analyst_or_admin)):
+    """Delete a stored upload and its rows; analysts can delete their own uploads only"""
+    if source == "reference":
+        raise HTTPException(status_code=400, detail="The reference dataset cannot be deleted")
+    owner = None if "admin" in current_user.roles else current_user.username
+    if not await asyncio.to_thread(transaction_repository.delete_source, source, owner):
+        raise HTTPException(status_code=404, detail="Source not found")
+    
+    try:
+        await anomaly_detector.log_event("transactions_deleted", current_user.username, {"source": source})
+    except:
+        pass
+    return {"status": "success", "source": source}
+
+@app.get("/entities/{vpa}")
+async def get_entity_profile(
+    vpa: str,
+    limit: int = Query(DEFAULT_PROFILE_LIMIT, ge=1, le=MAX_PROFILE_LIMIT),
+    current_user: User = Depends(analyst_or_admin)
+):
+    """Everything about one VPA in the reference data
+
+    Sent/received totals, fraud involvement, top counterparties, devices,
+    IP addresses and latest transactions; lists hold up to `limit` entries.
+    """
+    entities = await load_reference_entities()
+    profile = entities.profile(vpa, limit)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown VPA")
+    return FastJSONResponse(profile)
+
+@app.get("/entities/{vpa}/neighborhood")
+async def get_entity_neighborhood(
+    vpa: str,
+    hops: int = Query(1, ge=1, le=MAX_HOPS),
+    max_nodes: int = Query(DEFAULT_NEIGHBOR_LIMIT, ge=1, le=MAX_NEIGHBOR_LIMIT),
+    current_user: User = Depends(analyst_or_admin)
+):
+    """Nodes and edges within `hops` transfers of a VPA, at most max_nodes nodes"""
+    entities = await load_reference_entities()
+    neighborhood = entities.neighborhood(vpa, hops, max_nodes)
+    if neighborhood is None:
+        raise HTTPException(status_code=404, detail="Unknown VPA")
+    return FastJSONResponse(neighborhood)
+
+@app.get("/admin/transactions/sources/")
+async def get_transaction_sources(current_user: User = Depends(admin_only)):
+    """Datasets loaded into the transaction repository - Admin only"""
+    return await asyncio.to_thread(transaction_repository.sources)
+
 @app.get("/admin/data/")
 @limiter.limit("20/minute")
 async def get_admin_data(
     request: Request,
+    graph_view: GraphView = Depends(graph_view_params),
     current_user: User = Depends(admin_only)
 ):
     """Load data from backend CSV file - Admin only"""
     try:
-        csv_path = os.path.join("data", "anonymized_sample_fraud_txn.csv")
+        # Load data and detect fraud (cached until the CSV changes)
+        fraud_results = await load_reference_data()
         
-        # Check if file exists, create sample if not
-        if not os.path.exists(csv_path):
-            os.makedirs("data", exist_ok=True)
-            sample_data = {
-                'TRANSACTION_ID': ['TXN001', 'TXN002', 'TXN003', 'TXN004', 'TXN005'],
-                'TXN_TIMESTAMP': ['2024-01-15 10:30:00', '2024-01-15 11:45:00', '2024-01-15 12:15:00', '2024-01-15 13:20:00', '2024-01-15 14:10:00'],
-                'AMOUNT': [1500.00, 50000.00, 750.50, 25000.00, 2250.00],
-                'IS_FRAUD': [0, 1, 0, 1, 0],
-                'PAYER_VPA': ['user1@paytm', 'user2@phonepe', 'user3@gpay', 'victim@upi', 'user5@paytm'],
-                'BENEFICIARY_VPA': ['merchant1@gpay', 'scammer@pay', 'shop@upi', 'bonus@win', 'restaurant@pay']
-            }
-            df = pd.DataFrame(sample_data)
-            df.to_csv(csv_path, index=False)
-        else:
-            df = pd.read_csv(csv_path)
-        
-        # Detect fraud
-        fraud_results = fraud_detector.detect_fraud(df)
-        
-        # Generate graph data
-        graph_data = graph_analyzer.create_graph(df)
+        # Graph of the reference data and all uploads so far; its own
+        # totals are in graph_data["statistics"]
+        graph_data = await load_store_graph(graph_view)
         
-        # Get transaction statuses
-        fraud_transactions = fraud_results["fraud_transactions"]
-        for txn in fraud_transactions:
-            txn_id = txn["transaction_id"]
-            if txn_id in transaction_statuses:
-                txn["status"] = transaction_statuses[txn_id]
+        # Get transaction statuses, copying so cached results stay untouched
+        statuses = await asyncio.to_thread(
+            status_store.get_many, [txn["transaction_id"] for txn in fraud_results["fraud_transactions"]]
+        )
+        status_counts = await asyncio.to_thread(status_store.counts)
+        fraud_transactions = [
+            {**txn, "status": statuses[txn["transaction_id"]]}
+            if txn["transaction_id"] in statuses else txn
+            for txn in fraud_results["fraud_transactions"]
+        ]
         
-        return {
-            "total_transactions": len(df),
+        return FastJSONResponse({
+            # Totals and detections of the reference data, the ones analysts act on
+            "total_transactions": fraud_results["total_transactions"],
             "fraud_detected": fraud_results["fraud_count"],
             "fraud_transactions": fraud_transactions,
             "graph_data": graph_data,
-            "blocked_accounts": len([s for s in transaction_statuses.values() if s == "blocked"]),
-            "verified_accounts": len([s for s in transaction_statuses.values() if s == "verified"]),
+            "blocked_accounts": status_counts["blocked"],
+            "verified_accounts": status_counts["verified"],
             "system_health": 99.5
-        }
+        })
     except Exception as e:
         try:
             await anomaly_detector.log_event("error", current_user.username, {
@@ -282,7 +746,10 @@ async def update_transaction_status(
     current_user: User = Depends(admin_only)
 ):
     """Update transaction status (verify/block) - Admin only"""
-    transaction_statuses[action.transaction_id] = action.action
+    try:
+        await asyncio.to_thread(status_store.set, action.transaction_id, action.action, current_user.username)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Log action
     try:
@@ -299,36 +766,63 @@ async def update_transaction_status(
         "action": action.action
     }
 
+@app.post("/admin/transaction-actions/")
+async def update_transaction_statuses(
+    bulk: BulkTransactionAction,
+    current_user: User = Depends(admin_only)
+):
+    """Apply many verify/block actions in one database transaction - Admin only
+
+    All or nothing: one unknown action rejects the whole request.
+    """
+    if len(bulk.actions) > MAX_BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ACTIONS} actions per request")
+    try:
+        updated = await asyncio.to_thread(
+            status_store.set_many,
+            [(action.transaction_id, action.action) for action in bulk.actions],
+            current_user.username
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One audit record for the batch rather than one per transaction
+    try:
+        await anomaly_detector.log_event("transaction_action", current_user.username, {
+            "transactions": updated,
+            "bulk": True
+        })
+    except:
+        pass
+    
+    return {"status": "success", "updated": updated, **await asyncio.to_thread(status_store.counts)}
+
+@app.get("/admin/transaction-status/")
+async def get_transaction_statuses(
+    status: str = Query(..., pattern="^(blocked|verified)$"),
+    limit: int = Query(1000, ge=1, le=MAX_BULK_ACTIONS),
+    current_user: User = Depends(admin_only)
+):
+    """Transactions with a status, most recently changed first - Admin only"""
+    transaction_ids = await asyncio.to_thread(status_store.with_status, status, limit)
+    return {"status": status, "transaction_ids": transaction_ids, "count": len(transaction_ids)}
+
 @app.get("/admin/generate-report/")
 async def generate_report(current_user: User = Depends(admin_only)):
     """Generate PDF report - Admin only"""
     try:
-        csv_path = os.path.join("data", "anonymized_sample_fraud_txn.csv")
-        
-        # Check if file exists, create sample if not
-        if not os.path.exists(csv_path):
-            os.makedirs("data", exist_ok=True)
-            sample_data = {
-                'TRANSACTION_ID': ['TXN001', 'TXN002', 'TXN003', 'TXN004', 'TXN005'],
-                'TXN_TIMESTAMP': ['2024-01-15 10:30:00', '2024-01-15 11:45:00', '2024-01-15 12:15:00', '2024-01-15 13:20:00', '2024-01-15 14:10:00'],
-                'AMOUNT': [1500.00, 50000.00, 750.50, 25000.00, 2250.00],
-                'IS_FRAUD': [0, 1, 0, 1, 0],
-                'PAYER_VPA': ['user1@paytm', 'user2@phonepe', 'user3@gpay', 'victim@upi', 'user5@paytm'],
-                'BENEFICIARY_VPA': ['merchant1@gpay', 'scammer@pay', 'shop@upi', 'bonus@win', 'restaurant@pay']
-            }
-            df = pd.DataFrame(sample_data)
-            df.to_csv(csv_path, index=False)
-        else:
-            df = pd.read_csv(csv_path)
-        
-        # Detect fraud
-        fraud_results = fraud_detector.detect_fraud(df)
+        # Load data and detect fraud (cached until the CSV changes)
+        fraud_results = await load_reference_data()
         
         # Generate report
-        report_path = report_generator.generate_report(
-            df, 
+        report_path = await execution.run(
+            pipeline.generate_report,
+            REFERENCE_CSV,
             fraud_results["fraud_transactions"],
-            transaction_statuses
+            await asyncio.to_thread(
+                status_store.get_many, [txn["transaction_id"] for txn in fraud_results["fraud_transactions"]]
+            ),
+            await asyncio.to_thread(status_store.counts)
         )
         
         # Log report generation
@@ -354,6 +848,81 @@ async def generate_report(current_user: User = Depends(admin_only)):
             pass
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/admin/patterns/reload/")
+async def reload_fraud_patterns(current_user: User = Depends(admin_only)):
+    """Reload VPA fraud patterns from FRAUD_PATTERNS_FILE - Admin only"""
+    reloaded = fraud_detector.reload_patterns()
+    
+    # Log reload
+    try:
+        await anomaly_detector.log_event("patterns_reloaded", current_user.username, {
+            "reloaded": reloaded,
+            "pattern_count": len(fraud_detector.fraud_vpa_patterns)
+        })
+    except:
+        pass
+    
+    return {
+        "status": "success",
+        "reloaded": reloaded,
+        "pattern_count": len(fraud_detector.fraud_vpa_patterns)
+    }
+
+@app.get("/admin/cache/stats/")
+async def get_cache_stats(current_user: User = Depends(admin_only)):
+    """Result cache hit/miss counters - Admin only"""
+    return result_cache.stats()
+
+@app.get("/admin/graph/stats/")
+async def get_graph_store_stats(current_user: User = Depends(admin_only)):
+    """Graph store size and snapshot state - Admin only"""
+    await ensure_graph_store()
+    return graph_store.stats()
+
+@app.get("/admin/auth/stats/")
+async def get_auth_stats(current_user: User = Depends(admin_only)):
+    """Verified-token cache and shared revocation counters - Admin only"""
+    return {**token_cache.stats(), "revocations": revocation_list.stats()}
+
+@app.get("/admin/rate-limits/stats/")
+async def get_rate_limit_stats(current_user: User = Depends(admin_only)):
+    """Rate limit checks, Redis round trips and rejections - Admin only"""
+    return limiter.stats()
+
+@app.get("/admin/audit-log/stats/")
+async def get_audit_log_stats(current_user: User = Depends(admin_only)):
+    """Audit log queue, batch, rotation and drop counters - Admin only"""
+    return audit_log_writer.stats()
+
+@app.post("/admin/graph/snapshot/")
+async def snapshot_graph_store(current_user: User = Depends(admin_only)):
+    """Write a graph store snapshot now - Admin only"""
+    await ensure_graph_store()
+    written = await asyncio.to_thread(graph_store.snapshot)
+    return {"status": "success", "snapshot": written, **graph_store.stats()}
+
+@app.on_event("startup")
+def start_audit_log():
+    """Start the background audit log writer"""
+    audit_log_writer.start()
+
+@app.on_event("shutdown")
+def snapshot_graph_on_shutdown():
+    """Persist batches absorbed since the last snapshot and stop workers"""
+    if graph_store.opened and graph_store.pending_batches:
+        graph_store.snapshot()
+    execution.shutdown()
+
+@app.on_event("shutdown")
+async def close_anomaly_detector():
+    """Flush background security event writes"""
+    await anomaly_detector.close()
+
+@app.on_event("shutdown")
+def close_databases():
+    status_store.close()
+    transaction_repository.close()
+
 @app.get("/security/alerts/")
 async def get_security_alerts(current_user: User = Depends(admin_only)):
     """Get recent security alerts - Admin only"""
@@ -364,70 +933,49 @@ async def get_security_alerts(current_user: User = Depends(admin_only)):
 
 # TEST ENDPOINTS (No Authentication Required)
 @app.get("/test/data/")
-async def get_test_data():
+async def get_test_data(graph_view: GraphView = Depends(graph_view_params)):
     """Test endpoint without authentication for public dashboard"""
     try:
-        csv_path = os.path.join("data", "anonymized_sample_fraud_txn.csv")
-        
-        # Check if CSV file exists, if not create sample data
-        if not os.path.exists(csv_path):
-            # Create sample data
-            sample_data = {
-                'TRANSACTION_ID': ['TXN001', 'TXN002', 'TXN003', 'TXN004', 'TXN005'],
-                'TXN_TIMESTAMP': ['2024-01-15 10:30:00', '2024-01-15 11:45:00', '2024-01-15 12:15:00', '2024-01-15 13:20:00', '2024-01-15 14:10:00'],
-                'AMOUNT': [1500.00, 50000.00, 750.50, 25000.00, 2250.00],
-                'IS_FRAUD': [0, 1, 0, 1, 0],
-                'PAYER_VPA': ['user1@paytm', 'user2@phonepe', 'user3@gpay', 'victim@upi', 'user5@paytm'],
-                'BENEFICIARY_VPA': ['merchant1@gpay', 'scammer@pay', 'shop@upi', 'bonus@win', 'restaurant@pay']
-            }
-            df = pd.DataFrame(sample_data)
-            
-            # Ensure data directory exists
-            os.makedirs("data", exist_ok=True)
-            df.to_csv(csv_path, index=False)
-        else:
-            df = pd.read_csv(csv_path)
-        
-        # Detect fraud
-        fraud_results = fraud_detector.detect_fraud(df)
+        # Load data and detect fraud (cached until the CSV changes)
+        fraud_results = await load_reference_data()
         
         # Generate graph data
-        graph_data = graph_analyzer.create_graph(df)
+        graph_data = await load_reference_graph(graph_view)
         
-        return {
-            "total_transactions": len(df),
+        return FastJSONResponse({
+            "total_transactions": fraud_results["total_transactions"],
             "fraud_detected": fraud_results["fraud_count"],
             "fraud_transactions": fraud_results["fraud_transactions"],
             "graph_data": graph_data,
             "status": "success"
-        }
+        })
     except Exception as e:
         return {"error": str(e), "status": "failed"}
 
 @app.post("/test/detect/")
-async def test_detect_fraud(file: UploadFile = File(...)):
+async def test_detect_fraud(
+    file: UploadFile = File(...),
+    include_results: bool = True,
+    paged: bool = False,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    graph_view: GraphView = Depends(upload_graph_view_params)
+):
     """Test fraud detection endpoint without authentication"""
     try:
-        # Process file
-        contents = await file.read()
-        df = pd.read_csv(pd.io.common.BytesIO(contents))
-        
-        # Detect fraud
-        fraud_results = fraud_detector.detect_fraud(df)
-        
-        # Generate graph data
-        graph_data = graph_analyzer.create_graph(df)
-        
-        return {
-            "total_transactions": len(df),
-            "fraud_detected": fraud_results["fraud_count"],
-            "fraud_transactions": fraud_results["fraud_transactions"],
-            "graph_data": graph_data,
-            "results": fraud_results["detailed_results"]
-        }
+        # Stream the upload through detection and graph building in chunks
+        results, _ = await run_detection(file, include_results, graph_view, paged)
+        return FastJSONResponse(publish_results(results, None, page_size, test_result_store))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/test/results/{result_id}")
+async def get_test_results_page(result_id: str, query: ResultQuery = Depends(result_query_params)):
+    """Page of results stored by /test/detect/?paged=true"""
+    frame = test_result_store.get(result_id)
+    if frame is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return results_response(frame, query)
+
 if __name__ == "__main__":
     # Get port from environment (Render uses PORT env var)
     port = int(os.environ.get("PORT", 8000))
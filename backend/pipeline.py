@@ -0,0 +1,75 @@
+import os
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+from fraud_detection import FraudDetector
+from graph_analyzer import GraphAnalyzer, GraphView
+from report_generator import ReportGenerator
+from ingestion import detect_stream_with_graph
+from columnar_store import ColumnarStore, DETECTION_COLUMNS, ENTITY_COLUMNS, REPORT_COLUMNS, transaction_times
+from entity_index import EntityIndex
+from execution import SharedFrame
+
+# Components used by the stage functions below. Each worker process of a
+# process-pool backend builds its own; inline and thread backends share
+# these with the app.
+fraud_detector = FraudDetector(patterns_file=os.environ.get('FRAUD_PATTERNS_FILE'))
+graph_analyzer = GraphAnalyzer()
+report_generator = ReportGenerator()
+
+
+def detect_upload(source: Union[str, BinaryIO], include_results: bool = True,
+                  graph_view: Optional[GraphView] = None,
+                  progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  paged: bool = False, keep_frame: bool = False) -> Tuple[Dict[str, Any], SharedFrame]:
+    """Score an uploaded CSV (path or file object); returns the response and its edge table"""
+    results, edges = detect_stream_with_graph(
+        source, fraud_detector, graph_analyzer,
+        include_results=include_results, graph_view=graph_view, progress=progress, paged=paged,
+        keep_frame=keep_frame
+    )
+    for key in ("results_frame", "scored_frame"):
+        if key in results:
+            results[key] = SharedFrame(results[key])
+    return results, SharedFrame(edges)
+
+
+def detect_file(csv_path: str) -> Dict[str, Any]:
+    """Fraud count, fraud transactions and row count for a CSV, read through its memory-mapped columnar copy"""
+    df = ColumnarStore(csv_path).load(DETECTION_COLUMNS)
+    results = fraud_detector.detect_fraud_summary(df)
+    results["total_transactions"] = len(df)
+    return results
+
+
+def score_file(csv_path: str) -> SharedFrame:
+    """Per-transaction results for a CSV, as a result frame with the rows' txn_time"""
+    df = ColumnarStore(csv_path).load(DETECTION_COLUMNS)
+    fraud_detector.reload_patterns()
+    frame = fraud_detector.result_frame(df)
+    frame["txn_time"] = transaction_times(df).to_numpy()
+    return SharedFrame(frame)
+
+
+def entity_index(csv_path: str) -> EntityIndex:
+    """Per-VPA adjacency and rollups for a CSV, including payer devices and IPs"""
+    df = ColumnarStore(csv_path).load(ENTITY_COLUMNS)
+    return EntityIndex(df)
+
+
+def file_edges(csv_path: str) -> SharedFrame:
+    """Aggregated edge table for a CSV"""
+    df = ColumnarStore(csv_path).load(DETECTION_COLUMNS)
+    return SharedFrame(graph_analyzer.aggregate_edges(df))
+
+
+def graph_payload(edges: SharedFrame, view: Optional[GraphView] = None) -> Dict[str, Any]:
+    """vis.js payload for an edge table"""
+    return graph_analyzer.graph_payload(edges.frame, view)
+
+
+def generate_report(csv_path: str, fraud_transactions: List[Dict],
+                    transaction_statuses: Dict[str, str],
+                    status_counts: Optional[Dict[str, int]] = None) -> str:
+    """Write the PDF report for a CSV, returns its path"""
+    # The report only counts rows; fraud details come decoded in fraud_transactions
+    df = ColumnarStore(csv_path).load(REPORT_COLUMNS)
+    return report_generator.generate_report(df, fraud_transactions, transaction_statuses, status_counts)
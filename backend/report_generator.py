@@ -1,14 +1,7 @@
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
 import pandas as pd
 from datetime import datetime
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class ReportGenerator:
     def __init__(self):
@@ -17,8 +10,18 @@ class ReportGenerator:
             os.makedirs(self.reports_dir)
     
     def generate_report(self, df: pd.DataFrame, fraud_transactions: List[Dict], 
-                       transaction_statuses: Dict[str, str]) -> str:
-        """Generate PDF report for fraud transactions"""
+                       transaction_statuses: Dict[str, str],
+                       status_counts: Optional[Dict[str, int]] = None) -> str:
+        """Generate PDF report for fraud transactions
+
+        status_counts, when given, are the totals across all transactions;
+        otherwise they are counted from transaction_statuses.
+        """
+        # reportlab is imported on first use to keep app startup fast
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"fraud_report_{timestamp}.pdf"
         filepath = os.path.join(self.reports_dir, filename)
@@ -49,8 +52,13 @@ class ReportGenerator:
         c.drawString(100, height - 200, f"Fraud Rate: {fraud_percentage:.2f}%")
         
         # Status counts
-        blocked_count = sum(1 for status in transaction_statuses.values() if status == "blocked")
-        verified_count = sum(1 for status in transaction_statuses.values() if status == "verified")
+        if status_counts is None:
+            status_counts = {
+                "blocked": sum(1 for status in transaction_statuses.values() if status == "blocked"),
+                "verified": sum(1 for status in transaction_statuses.values() if status == "verified")
+            }
+        blocked_count = status_counts.get("blocked", 0)
+        verified_count = status_counts.get("verified", 0)
         c.drawString(100, height - 220, f"Blocked Transactions: {blocked_count}")
         c.drawString(100, height - 240, f"Verified Transactions: {verified_count}")
         
@@ -0,0 +1,61 @@
+from typing import Any, Optional
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNS_MEDIA_TYPE = "application/vnd.fraudshield.columns+json"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed
+
+    Falls back to the standard encoder otherwise. Content must already be
+    plain JSON types (or numpy values, which orjson handles natively).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if not ORJSON_AVAILABLE:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+class ArrowResponse(Response):
+    """pyarrow Table sent as an Arrow IPC stream"""
+
+    media_type = ARROW_STREAM_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        sink = pa.BufferOutputStream()
+        with pa_ipc.new_stream(sink, content.schema) as writer:
+            writer.write_table(content)
+        return sink.getvalue().to_pybytes()
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """Result format from an explicit format parameter or the Accept header
+
+    Returns "rows" (JSON list of dicts, the default), "columns" (JSON
+    object of per-field arrays) or "arrow" (Arrow IPC stream).
+    """
+    if requested:
+        return requested
+    accept = (accept or "").lower()
+    if ARROW_STREAM_MEDIA_TYPE in accept and ARROW_AVAILABLE:
+        return "arrow"
+    if COLUMNS_MEDIA_TYPE in accept:
+        return "columns"
+    return "rows"
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import pandas as pd
+
+# Default memory budget for cached datasets and results
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_identity(path: str) -> Tuple[str, int, int]:
+    """Identity of a file on disk: absolute path, mtime and size"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(getattr(value, "nbytes", None), int):
+        # numpy arrays and index structures that report their own size
+        return value.nbytes
+
+    # Walk JSON-like containers, counting each object once
+    seen = set()
+    total = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set)):
+            stack.extend(obj)
+    return total
+
+
+class ResultCache:
+    """LRU cache of parsed files and derived results, keyed on file identity
+
+    Entries are stored under (file identity, name, variant). When a file's
+    mtime or size changes, every entry built from the old version is dropped
+    on the next lookup. The total estimated size is capped at max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._current: Dict[str, Tuple[str, int, int]] = {}
+        self._lock = threading.RLock()
+        # Computations in progress, so concurrent misses on a key share one
+        self._pending: Dict[Tuple, "asyncio.Future"] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, path: str, name: str, compute: Callable[[], Any],
+                       variant: Hashable = None) -> Any:
+        """Return the cached value for a file, computing and storing it on a miss"""
+        key, entry = self._lookup(path, name, variant)
+        if entry is not None:
+            return entry[0]
+
+        value = compute()
+        self._store(key, value)
+        return value
+
+    async def get_or_compute_async(self, path: str, name: str, compute: Callable[[], Awaitable[Any]],
+                                   variant: Hashable = None) -> Any:
+        """get_or_compute for an awaitable compute, e.g. work run on an executor
+
+        Callers that miss while the same key is being computed await that
+        computation instead of starting another one.
+        """
+        key, entry = self._lookup(path, name, variant)
+        if entry is not None:
+            return entry[0]
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compute_and_store(key, compute))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shielded so one cancelled caller does not cancel the others
+        return await asyncio.shield(pending)
+
+    async def _compute_and_store(self, key: Tuple, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        self._store(key, value)
+        return value
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drop entries for one file, or everything when no path is given"""
+        with self._lock:
+            if path is None:
+                keys = list(self._entries)
+                self._current.clear()
+            else:
+                abspath = os.path.abspath(path)
+                keys = [k for k in self._entries if k[0][0] == abspath]
+                self._current.pop(abspath, None)
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def _lookup(self, path: str, name: str, variant: Hashable):
+        """Cache key for a file result and its entry, None on a miss"""
+        identity = file_identity(path)
+        key = (identity, name, variant)
+
+        with self._lock:
+            self._invalidate_stale(identity)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return key, entry
+
+    def _invalidate_stale(self, identity: Tuple[str, int, int]):
+        """Drop entries built from an older version of the same file"""
+        path = identity[0]
+        if self._current.get(path) == identity:
+            return
+        stale = [k for k in self._entries if k[0][0] == path and k[0] != identity]
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+        self._current[path] = identity
+
+    def _store(self, key: Tuple, value: Any):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Values bigger than the whole budget are returned but not kept
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        _, size = self._entries.pop(key)
+        self.bytes -= size
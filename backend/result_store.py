@@ -0,0 +1,219 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from result_cache import estimate_size
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+# Fields of a transaction result, in response order
+RESULT_FIELDS = (
+    "transaction_id", "timestamp", "amount", "payer_vpa", "beneficiary_vpa",
+    "is_fraud", "risk_score", "risk_level", "suspicious_patterns", "explanation"
+)
+RISK_LEVELS = ("High", "Medium", "Low")
+
+# rows: list of dicts, columns: one array per field, arrow: Arrow IPC stream
+RESULT_FORMATS = ("rows", "columns", "arrow")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Columnar formats encode cheaply enough to hand out whole result sets
+MAX_BULK_PAGE_SIZE = 1000000
+DEFAULT_RESULT_TTL_SECONDS = 3600
+DEFAULT_RESULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class ResultQuery:
+    """Filters, projection and cursor for one page of stored results
+
+    cursor is a row position in the stored results; pages hold up to
+    `limit` matching rows at or after it. Columnar formats allow pages
+    of up to MAX_BULK_PAGE_SIZE rows.
+    """
+
+    def __init__(self, cursor: int = 0, limit: int = DEFAULT_PAGE_SIZE, fraud_only: bool = False,
+                 risk_level: Optional[str] = None, min_amount: Optional[float] = None,
+                 max_amount: Optional[float] = None, fields: Optional[Sequence[str]] = None,
+                 format: str = "rows"):
+        if format not in RESULT_FORMATS:
+            raise ValueError(f"Unknown result format: {format}")
+        max_limit = MAX_PAGE_SIZE if format == "rows" else MAX_BULK_PAGE_SIZE
+        if cursor < 0 or not 1 <= limit <= max_limit:
+            raise ValueError(f"Cursor must be non-negative and limit between 1 and {max_limit}")
+        if risk_level is not None and risk_level not in RISK_LEVELS:
+            raise ValueError(f"Unknown risk level: {risk_level}")
+        fields = list(fields) if fields else list(RESULT_FIELDS)
+        unknown = [f for f in fields if f not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown result fields: {', '.join(unknown)}")
+        self.cursor = cursor
+        self.limit = limit
+        self.fraud_only = fraud_only
+        self.risk_level = risk_level
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.fields = fields
+        self.format = format
+
+    def mask(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        """Boolean row filter, None when no filter applies"""
+        conditions = []
+        if self.fraud_only:
+            conditions.append(frame["is_fraud"].to_numpy(dtype=bool))
+        if self.risk_level is not None:
+            conditions.append((frame["risk_level"] == self.risk_level).to_numpy())
+        if self.min_amount is not None:
+            conditions.append(frame["amount"].to_numpy() >= self.min_amount)
+        if self.max_amount is not None:
+            conditions.append(frame["amount"].to_numpy() <= self.max_amount)
+        mask = None
+        for condition in conditions:
+            mask = condition if mask is None else mask & condition
+        return mask
+
+
+def page_positions(frame: pd.DataFrame, query: ResultQuery) -> Tuple[np.ndarray, Optional[int]]:
+    """Row positions on the requested page and the cursor of the next page"""
+    mask = query.mask(frame)
+    if mask is None:
+        positions = np.arange(query.cursor, min(query.cursor + query.limit, len(frame)))
+        has_more = query.cursor + query.limit < len(frame)
+    else:
+        # One extra match tells whether another page exists
+        matches = np.flatnonzero(mask[query.cursor:])[:query.limit + 1] + query.cursor
+        has_more = len(matches) > query.limit
+        positions = matches[:query.limit]
+    return positions, int(positions[-1]) + 1 if has_more else None
+
+
+def _field_values(frame: pd.DataFrame, field: str, positions: np.ndarray) -> List[Any]:
+    values = frame[field].iloc[positions].tolist()
+    if field == "suspicious_patterns":
+        # Arrow round trips hand lists back as arrays; leave real lists alone
+        values = [v if isinstance(v, list) else v.tolist() for v in values]
+    return values
+
+
+def page_results(frame: pd.DataFrame, query: ResultQuery) -> Dict[str, Any]:
+    """One page of result rows as dicts, with the cursor of the next page"""
+    positions, next_cursor = page_positions(frame, query)
+    # Take only the requested fields, column by column
+    columns = [_field_values(frame, field, positions) for field in query.fields]
+    items = [dict(zip(query.fields, row)) for row in zip(*columns)] if columns else []
+    return {
+        "items": items,
+        "count": len(items),
+        "cursor": query.cursor,
+        "next_cursor": next_cursor
+    }
+
+
+def page_columns(frame: pd.DataFrame, query: ResultQuery) -> Dict[str, Any]:
+    """One page of results as one array per field"""
+    positions, next_cursor = page_positions(frame, query)
+    return {
+        "columns": {field: _field_values(frame, field, positions) for field in query.fields},
+        "count": len(positions),
+        "cursor": query.cursor,
+        "next_cursor": next_cursor
+    }
+
+
+def page_table(frame: pd.DataFrame, query: ResultQuery) -> Tuple["pa.Table", Optional[int]]:
+    """One page of results as an Arrow table, with the cursor of the next page"""
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for Arrow results")
+    positions, next_cursor = page_positions(frame, query)
+    table = pa.Table.from_pandas(frame[query.fields].iloc[positions], preserve_index=False)
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            # Encoded columns go out as plain strings, whatever their dictionary
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+    if "suspicious_patterns" in query.fields:
+        # Pages without any match would otherwise come out as list<null>
+        index = table.schema.get_field_index("suspicious_patterns")
+        table = table.set_column(
+            index, "suspicious_patterns", table.column(index).cast(pa.list_(pa.string()))
+        )
+    return table, next_cursor
+
+
+def compact_results(frame: pd.DataFrame) -> pd.DataFrame:
+    """Low-cardinality text columns as categoricals, for memory and fast filters"""
+    return frame.astype({"risk_level": "category", "explanation": "category"})
+
+
+def summarize_results(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Whole-result counts returned alongside the first page"""
+    risk_counts = frame["risk_level"].value_counts()
+    return {
+        "total_transactions": len(frame),
+        "fraud_detected": int(frame["is_fraud"].to_numpy(dtype=bool).sum()),
+        "risk_levels": {level: int(risk_counts.get(level, 0)) for level in RISK_LEVELS}
+    }
+
+
+class ResultStore:
+    """Detection results kept server-side under a result id
+
+    Entries expire ttl_seconds after their last use; the least recently
+    used ones are dropped once the estimated size exceeds max_bytes.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_RESULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_RESULT_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+    def put(self, frame: pd.DataFrame, owner: Optional[str] = None) -> str:
+        """Store a result frame, returns its id"""
+        result_id = uuid.uuid4().hex
+        size = estimate_size(frame)
+        with self._lock:
+            self._entries[result_id] = {
+                "frame": frame,
+                "owner": owner,
+                "size": size,
+                "expires_at": time.time() + self.ttl_seconds
+            }
+            self.bytes += size
+            self._evict()
+        return result_id
+
+    def get(self, result_id: str, owner: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Stored frame, None when unknown, expired or owned by someone else"""
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(result_id)
+            if entry is None or entry["owner"] != owner:
+                return None
+            entry["expires_at"] = time.time() + self.ttl_seconds
+            self._entries.move_to_end(result_id)
+            return entry["frame"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+    def _evict(self):
+        now = time.time()
+        expired = [k for k, entry in self._entries.items() if entry["expires_at"] <= now]
+        for key in expired:
+            self._remove(key)
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        self.bytes -= self._entries.pop(key)["size"]
@@ -1,34 +1,166 @@
+import atexit
 import logging
 import json
+import os
+import time
+import uuid
+from array import array
 from datetime import datetime
-from typing import Dict, Any
-import redis
-from collections import defaultdict
+from typing import Dict, Any, Optional
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from collections import OrderedDict
 import asyncio
+from security.audit_log import AuditLogWriter, JsonMessage, DEFAULT_QUEUE_SIZE
 
-# Configure logging
+# Configure logging: records are queued and a background thread writes
+# them in batches, so logging never does disk I/O on the request path.
+# The app starts the writer on startup; records queue up until then.
+audit_log_writer = AuditLogWriter(
+    os.getenv("ANOMALY_LOG_FILE", "logs/anomaly_detection.log"),
+    max_bytes=int(os.getenv("ANOMALY_LOG_MAX_MB", "50")) * 1024 * 1024,
+    backup_count=int(os.getenv("ANOMALY_LOG_BACKUPS", "5")),
+    rotate_seconds=float(os.getenv("ANOMALY_LOG_ROTATE_SECONDS", "0")) or None,
+    queue_size=int(os.getenv("ANOMALY_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+    formatter=logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+)
+# Fraction of api_request events written to the log (1 keeps all)
+API_REQUEST_SAMPLE_RATE = float(os.getenv("ANOMALY_LOG_API_SAMPLE_RATE", "1"))
 logging.basicConfig(
-    filename='logs/anomaly_detection.log',
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[audit_log_writer.handler(
+        {"api_request": API_REQUEST_SAMPLE_RATE} if API_REQUEST_SAMPLE_RATE < 1 else None
+    )]
 )
+atexit.register(audit_log_writer.stop)
 
 logger = logging.getLogger('anomaly_detection')
 
+# Events are only counted over windows shorter than this
+EVENT_RETENTION_SECONDS = 3600
+
+# Per user and event type; windows never need more to cross a threshold
+MAX_EVENTS_PER_KEY = 10000
+
+# Window each checked event type is counted over, in seconds
+EVENT_WINDOWS = {
+    "failed_login": 300,
+    "api_request": 60
+}
+
+# Connections in the shared asyncio Redis pool
+DEFAULT_REDIS_POOL_SIZE = 20
+
+# Background writes from log_event_nowait allowed in flight; more are dropped
+MAX_PENDING_EVENTS = 1000
+
+# Memory fallback: one-second buckets covering the longest checked window
+MEMORY_BUCKET_HORIZON = max(EVENT_WINDOWS.values())
+
+# User and event type pairs the memory fallback tracks at once
+DEFAULT_MEMORY_MAX_KEYS = 10000
+
+# After a Redis failure, events are counted in memory this long before retrying
+REDIS_RETRY_SECONDS = 30
+
+# Connect and read timeout for Redis calls, like the other Redis clients
+REDIS_TIMEOUT_SECONDS = 2
+
+class MemoryEventStore:
+    """Per-second event counters used when Redis is unavailable
+
+    Each key keeps a ring of one-second buckets covering `horizon`
+    seconds, so memory per key is fixed and window counts never look at
+    single events. Keys idle for longer than the horizon are evicted, as
+    are the least recently written ones beyond max_keys.
+    """
+
+    def __init__(self, horizon: int = MEMORY_BUCKET_HORIZON, max_keys: int = DEFAULT_MEMORY_MAX_KEYS):
+        self.horizon = horizon
+        self.max_keys = max_keys
+        # key -> [last written second, bucket counts], least recently written first
+        self._keys: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, now: Optional[float] = None):
+        second = int(time.time() if now is None else now)
+        entry = self._keys.get(key)
+        if entry is None:
+            entry = self._keys[key] = [second, array('I', bytes(4 * self.horizon))]
+        else:
+            self._advance(entry, second)
+            self._keys.move_to_end(key)
+        entry[1][second % self.horizon] += 1
+        self._evict(second)
+
+    def count(self, key: str, window: int, now: Optional[float] = None) -> int:
+        """Events in the last `window` seconds (at most the horizon), to the second"""
+        entry = self._keys.get(key)
+        if entry is None:
+            return 0
+        second = int(time.time() if now is None else now)
+        self._advance(entry, second)
+        counts = entry[1]
+        start = (second - min(int(window), self.horizon) + 1) % self.horizon
+        end = second % self.horizon + 1
+        if start < end:
+            return sum(counts[start:end])
+        return sum(counts[start:]) + sum(counts[:end])
+
+    def _advance(self, entry: list, second: int):
+        """Clear the buckets of seconds elapsed since the last write"""
+        last = entry[0]
+        if second <= last:
+            return
+        if second - last >= self.horizon:
+            entry[1] = array('I', bytes(4 * self.horizon))
+        else:
+            counts = entry[1]
+            for elapsed in range(last + 1, second + 1):
+                counts[elapsed % self.horizon] = 0
+        entry[0] = second
+
+    def _evict(self, second: int):
+        while self._keys:
+            key, (last, _) = next(iter(self._keys.items()))
+            if len(self._keys) <= self.max_keys and last > second - self.horizon:
+                break
+            del self._keys[key]
+
 class AnomalyDetector:
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(self, redis_url: str = "redis://localhost:6379",
+                 max_connections: int = DEFAULT_REDIS_POOL_SIZE):
+        self._pending = set()
+        self.dropped_events = 0
+        self.anomaly_thresholds = {
+            "failed_login_attempts": 5,
+            "rapid_requests": 100,  # per minute
+            "large_transaction_count": 50,  # per hour
+            "suspicious_pattern_score": 0.8
+        }
+        # Used while Redis is missing or failing
+        self.memory_store = MemoryEventStore()
+        self._redis_retry_at = 0.0
         try:
-            self.redis_client = redis.from_url(redis_url)
-            self.anomaly_thresholds = {
-                "failed_login_attempts": 5,
-                "rapid_requests": 100,  # per minute
-                "large_transaction_count": 50,  # per hour
-                "suspicious_pattern_score": 0.8
-            }
+            # Callers wait for a free pooled connection instead of failing;
+            # the socket timeouts bound how long an unreachable host holds them
+            pool = aioredis.BlockingConnectionPool.from_url(
+                redis_url, max_connections=max_connections,
+                socket_connect_timeout=REDIS_TIMEOUT_SECONDS, socket_timeout=REDIS_TIMEOUT_SECONDS
+            )
+            self.redis_client = aioredis.Redis(connection_pool=pool)
         except:
             logger.warning("Redis not available, using in-memory storage")
             self.redis_client = None
-            self.memory_store = defaultdict(list)
+    
+    def _redis_ready(self) -> bool:
+        return self.redis_client is not None and time.time() >= self._redis_retry_at
+    
+    def _redis_failed(self, error: Exception):
+        logger.warning(f"Redis unavailable, counting events in memory for {REDIS_RETRY_SECONDS}s: {error}")
+        self._redis_retry_at = time.time() + REDIS_RETRY_SECONDS
     
     async def log_event(self, event_type: str, user_id: str, details: Dict[str, Any]):
         """Log security event"""
@@ -39,24 +171,79 @@ class AnomalyDetector:
             "details": details
         }
         
-        # Log to file
-        logger.info(json.dumps(event))
+        # Log to file; serialized by the background writer
+        logger.info(JsonMessage(event), extra={"event_type": event_type})
         
-        # Store in Redis or memory
-        if self.redis_client:
-            key = f"security_events:{user_id}:{event_type}"
-            self.redis_client.lpush(key, json.dumps(event))
-            self.redis_client.expire(key, 3600)  # Expire after 1 hour
+        # Store the event in Redis, falling back to memory counters while
+        # Redis is unavailable, and get its window count along the way
+        now = time.time()
+        window = EVENT_WINDOWS.get(event_type)
+        if self._redis_ready():
+            try:
+                count = await self._record_in_redis(event_type, user_id, now, window)
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+                count = self._record_in_memory(event_type, user_id, now, window)
         else:
-            self.memory_store[f"{user_id}:{event_type}"].append(event)
+            count = self._record_in_memory(event_type, user_id, now, window)
         
         # Check for anomalies
-        await self.check_anomalies(event_type, user_id)
+        await self.check_anomalies(event_type, user_id, count)
+    
+    async def _record_in_redis(self, event_type: str, user_id: str, now: float,
+                               window: Optional[int]) -> Optional[int]:
+        """Add the event to its sorted set, trimming entries older than the
+        retention period; the write and the window count share one round trip"""
+        key = f"security_event_times:{user_id}:{event_type}"
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zadd(key, {uuid.uuid4().hex: now})
+        pipe.zremrangebyscore(key, "-inf", now - EVENT_RETENTION_SECONDS)
+        pipe.zremrangebyrank(key, 0, -MAX_EVENTS_PER_KEY - 1)
+        pipe.expire(key, EVENT_RETENTION_SECONDS)
+        if window:
+            pipe.zcount(key, now - window, "+inf")
+        replies = await pipe.execute()
+        return replies[-1] if window else None
     
-    async def check_anomalies(self, event_type: str, user_id: str):
-        """Check for anomalous patterns"""
+    def _record_in_memory(self, event_type: str, user_id: str, now: float,
+                          window: Optional[int]) -> Optional[int]:
+        key = f"{user_id}:{event_type}"
+        self.memory_store.add(key, now)
+        return self.memory_store.count(key, window, now) if window else None
+    
+    def log_event_nowait(self, event_type: str, user_id: str, details: Dict[str, Any]):
+        """Log a security event in the background, without waiting on Redis
+
+        Errors are swallowed like the awaited callers do. Events beyond
+        MAX_PENDING_EVENTS in flight are dropped and counted instead of
+        queueing without bound when Redis is slow.
+        """
+        if len(self._pending) >= MAX_PENDING_EVENTS:
+            self.dropped_events += 1
+            return
+        task = asyncio.get_running_loop().create_task(self._log_event_quietly(event_type, user_id, details))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    async def _log_event_quietly(self, event_type: str, user_id: str, details: Dict[str, Any]):
+        try:
+            await self.log_event(event_type, user_id, details)
+        except Exception:
+            pass
+    
+    async def close(self):
+        """Wait for background writes, then release the Redis pool"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self.redis_client:
+            await self.redis_client.aclose()
+    
+    async def check_anomalies(self, event_type: str, user_id: str, count: Optional[int] = None):
+        """Check for anomalous patterns; count is the event's window count when already known"""
         if event_type == "failed_login":
-            count = await self.get_event_count(user_id, event_type, 300)  # Last 5 minutes
+            if count is None:
+                count = await self.get_event_count(user_id, event_type, EVENT_WINDOWS[event_type])
             if count >= self.anomaly_thresholds["failed_login_attempts"]:
                 await self.raise_alert("Multiple failed login attempts", user_id, {
                     "count": count,
@@ -64,7 +251,8 @@ class AnomalyDetector:
                 })
         
         elif event_type == "api_request":
-            count = await self.get_event_count(user_id, event_type, 60)  # Last minute
+            if count is None:
+                count = await self.get_event_count(user_id, event_type, EVENT_WINDOWS[event_type])
             if count >= self.anomaly_thresholds["rapid_requests"]:
                 await self.raise_alert("Rapid API requests detected", user_id, {
                     "count": count,
@@ -72,28 +260,15 @@ class AnomalyDetector:
                 })
     
     async def get_event_count(self, user_id: str, event_type: str, time_window: int) -> int:
-        """Get event count within time window"""
-        if self.redis_client:
-            key = f"security_events:{user_id}:{event_type}"
-            events = self.redis_client.lrange(key, 0, -1)
-            count = 0
-            cutoff_time = datetime.utcnow().timestamp() - time_window
-            
-            for event_str in events:
-                event = json.loads(event_str)
-                event_time = datetime.fromisoformat(event['timestamp']).timestamp()
-                if event_time >= cutoff_time:
-                    count += 1
-            return count
-        else:
-            # Use memory store
-            key = f"{user_id}:{event_type}"
-            events = self.memory_store.get(key, [])
-            cutoff_time = datetime.utcnow().timestamp() - time_window
-            
-            count = sum(1 for event in events 
-                       if datetime.fromisoformat(event['timestamp']).timestamp() >= cutoff_time)
-            return count
+        """Get event count within time window (O(log n) in Redis, O(1) in memory)"""
+        if self._redis_ready():
+            key = f"security_event_times:{user_id}:{event_type}"
+            try:
+                return await self.redis_client.zcount(key, time.time() - time_window, "+inf")
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+        # Memory counters only cover the last MEMORY_BUCKET_HORIZON seconds
+        return self.memory_store.count(f"{user_id}:{event_type}", time_window)
     
     async def raise_alert(self, alert_type: str, user_id: str, details: Dict[str, Any]):
         """Raise security alert"""
@@ -109,9 +284,14 @@ class AnomalyDetector:
         
         # In production, this would trigger notifications
         # For now, just log it
-        if self.redis_client:
-            self.redis_client.lpush("security_alerts", json.dumps(alert))
-            self.redis_client.expire("security_alerts", 86400)  # 24 hours
+        if self._redis_ready():
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.lpush("security_alerts", json.dumps(alert))
+                pipe.expire("security_alerts", 86400)  # 24 hours
+                await pipe.execute()
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
 
 # Global instance
 anomaly_detector = AnomalyDetector()
\ No newline at end of file
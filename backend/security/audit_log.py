@@ -0,0 +1,279 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (Windows): rotation is only safe with one writing process
+    fcntl = None
+
+# Records waiting for the writer; more are dropped and counted
+DEFAULT_QUEUE_SIZE = 10000
+
+# Records written with one write() and flush()
+DEFAULT_BATCH_SIZE = 500
+
+# Seconds the writer waits for records before checking for time rotation
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Seconds between stderr reports while writes keep failing
+ERROR_REPORT_INTERVAL = 60.0
+
+
+class JsonMessage:
+    """Log message serialized to JSON only when the record is formatted"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data)
+
+
+class AuditQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the AuditLogWriter without touching disk
+
+    The queue is bounded: when it is full the record is dropped and
+    counted rather than blocking the caller. Records carrying an
+    `event_type` listed in sample_rates are kept with that probability.
+    Such audit records are handed over as they are and formatted by the
+    writer; other records are formatted here, as QueueHandler does.
+    """
+
+    def __init__(self, record_queue: queue.Queue, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__(record_queue)
+        # The writer applies the real format; this only merges msg and args
+        self.setFormatter(logging.Formatter("%(message)s"))
+        self.sample_rates = sample_rates or {}
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def emit(self, record: logging.LogRecord):
+        rate = self.sample_rates.get(getattr(record, "event_type", None))
+        if rate is not None and random.random() >= rate:
+            self.sampled_out += 1
+            return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if hasattr(record, "event_type"):
+            return record
+        return super().prepare(record)
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AuditLogWriter:
+    """Background thread writing queued log records to a rotating file
+
+    Each pass drains up to batch_size records and writes them with a
+    single write() and flush(). The file rotates like
+    RotatingFileHandler (path.1 ... path.N) once it would exceed
+    max_bytes, or after being open rotate_seconds when that is set.
+    A batch that cannot be written is counted as lost and reported on
+    stderr; the file is reopened for the next batch.
+
+    Several processes (uvicorn workers) may append to the same path. The
+    size check uses the file's real size, rotation happens under an
+    exclusive lock on path.lock, and a writer whose file was rotated
+    away by another process reopens the new one instead of rotating again.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 backup_count: int = DEFAULT_BACKUP_COUNT, rotate_seconds: Optional[float] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 formatter: Optional[logging.Formatter] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_seconds = rotate_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.formatter = formatter or logging.Formatter()
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.write_errors = 0
+        self.lost = 0
+        self._last_error_report = 0.0
+        self._stream = None
+        self._identity = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._handler: Optional[AuditQueueHandler] = None
+
+    def handler(self, sample_rates: Optional[Dict[str, float]] = None) -> AuditQueueHandler:
+        """Logging handler feeding this writer"""
+        self._handler = AuditQueueHandler(self.queue, sample_rates)
+        return self._handler
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Write what is queued, then stop the thread and close the file"""
+        if self._thread is None:
+            return
+        # Blocks briefly if the queue is full so the sentinel is not lost
+        self.queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        handler = self._handler
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+            "lost": self.lost,
+            "dropped": handler.dropped if handler else 0,
+            "sampled_out": handler.sampled_out if handler else 0
+        }
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = self._STOP in batch
+            records = [record for record in batch if record is not self._STOP]
+            try:
+                self._write(records)
+            except Exception as e:
+                # Same policy as logging handlers: never take the app down
+                self._write_failed(e, len(records))
+            if stopping:
+                if self._stream is not None:
+                    self._stream.close()
+                    self._stream = None
+                return
+
+    def _write(self, records: List[logging.LogRecord]):
+        if self._stream is not None and self._moved():
+            self._stream.close()
+            self._stream = None
+        if self._stream is None:
+            self._open()
+        # Other processes append to the same file
+        self._size = os.fstat(self._stream.fileno()).st_size
+        if self.rotate_seconds and time.time() - self._opened_at >= self.rotate_seconds and self._size:
+            self._rotate()
+        if not records:
+            return
+        lines = []
+        for index, record in enumerate(records):
+            lines.append(self.formatter.format(record) + "\n")
+            if index % 64 == 63:
+                # Hand the GIL back so request threads are not held up
+                # for a whole switch interval by a large batch
+                time.sleep(0)
+        data = "".join(lines)
+        size = len(data.encode("utf-8"))
+        if self.max_bytes and self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        self._stream.write(data)
+        self._stream.flush()
+        self._size += size
+        self.written += len(records)
+        self.batches += 1
+
+    def _write_failed(self, error: Exception, records: int):
+        self.write_errors += 1
+        self.lost += records
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        now = time.time()
+        if now - self._last_error_report >= ERROR_REPORT_INTERVAL:
+            self._last_error_report = now
+            print(
+                f"Audit log write to {self.path} failed ({self.write_errors} failures, "
+                f"{self.lost} records lost so far): {error!r}",
+                file=sys.stderr
+            )
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._stream = open(self.path, "a", encoding="utf-8")
+        stat = os.fstat(self._stream.fileno())
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._size = stat.st_size
+        self._opened_at = time.time()
+
+    def _moved(self) -> bool:
+        """True when path no longer names the open file, e.g. another process rotated it"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_dev, stat.st_ino) != self._identity
+
+    @contextmanager
+    def _rotation_lock(self):
+        """Exclusive lock on path.lock, held by one process at a time while rotating"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _rotate(self):
+        with self._rotation_lock():
+            # Another process may have rotated since this one opened the file
+            moved = self._moved()
+            self._stream.close()
+            # Reopened by the next write if renaming fails below
+            self._stream = None
+            if not moved:
+                if self.backup_count > 0:
+                    for index in range(self.backup_count - 1, 0, -1):
+                        source = f"{self.path}.{index}"
+                        if os.path.exists(source):
+                            os.replace(source, f"{self.path}.{index + 1}")
+                    os.replace(self.path, f"{self.path}.1")
+                else:
+                    os.remove(self.path)
+                self.rotations += 1
+            self._open()
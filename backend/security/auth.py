@@ -1,3 +1,6 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
@@ -15,6 +18,19 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-default-secret-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Verified tokens kept in memory, and how long a cached token is trusted
+# before its signature is checked and its user looked up again
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Revoked tokens are shared between workers through Redis; cached tokens
+# are checked against that list again after this many seconds
+REVOCATION_REDIS_URL = os.getenv("REVOCATION_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
+REVOCATION_CHECK_SECONDS = int(os.getenv("REVOCATION_CHECK_SECONDS", "10"))
+
+# After a Redis failure, only this worker's revocations are known for this long
+REDIS_RETRY_SECONDS = 30
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -39,13 +55,22 @@ class User(BaseModel):
 class UserInDB(User):
     hashed_password: str
 
+# Precomputed bcrypt hashes of the demo passwords (admin123, analyst123);
+# hashing them at import cost a full bcrypt round each on every start
+CENTRALBANK_PASSWORD_HASH = os.getenv(
+    "CENTRALBANK_PASSWORD_HASH", "$2b$12$tuDAE1oqNvUMSMO0myhJXOXb6jbwLI1mhsrDUBBsjNfSB29Rh2VJe"
+)
+ANALYST_PASSWORD_HASH = os.getenv(
+    "ANALYST_PASSWORD_HASH", "$2b$12$SYtrR1SnRokgFYlbqsKVrualTCSlmDOLBkxfVBOfb8sKXRsoknxu6"
+)
+
 # Mock database - replace with real database in production
 fake_users_db = {
     "centralbank": {
         "username": "centralbank",
         "full_name": "Central Bank Admin",
         "email": "admin@centralbank.gov.in",
-        "hashed_password": pwd_context.hash("admin123"),
+        "hashed_password": CENTRALBANK_PASSWORD_HASH,
         "disabled": False,
         "roles": ["admin", "fraud_analyst"]
     },
@@ -53,12 +78,141 @@ fake_users_db = {
         "username": "analyst",
         "full_name": "Fraud Analyst",
         "email": "analyst@centralbank.gov.in",
-        "hashed_password": pwd_context.hash("analyst123"),
+        "hashed_password": ANALYST_PASSWORD_HASH,
         "disabled": False,
         "roles": ["fraud_analyst"]
     }
 }
 
+class TokenCache:
+    """Verified tokens mapped to the user they resolve to
+
+    Entries expire at the token's exp claim, or ttl_seconds after being
+    cached if that comes first; the least recently used go beyond
+    max_entries. Each entry also records when the token was last checked
+    against the shared revocation list. Revoked tokens are remembered
+    until their exp. Only used from the event loop, so there is no
+    locking.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE, ttl_seconds: int = TOKEN_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, UserInDB, float]]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional["UserInDB"]:
+        entry = self._entries.get(token)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, user: "UserInDB", exp: float):
+        now = time.time()
+        self._entries[token] = (min(exp, now + self.ttl_seconds), user, now)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def revoke(self, token: str, exp: float):
+        """Reject the token from now on, until it would have expired anyway"""
+        self._entries.pop(token, None)
+        now = time.time()
+        self._revoked = {t: e for t, e in self._revoked.items() if e > now}
+        self._revoked[token] = exp
+
+    def is_revoked(self, token: str) -> bool:
+        return token in self._revoked
+
+    def check_due(self, token: str, interval: float) -> bool:
+        """True when a cached token was last checked for revocation interval seconds ago or more"""
+        entry = self._entries.get(token)
+        return entry is None or entry[2] + interval <= time.time()
+
+    def mark_checked(self, token: str):
+        entry = self._entries.get(token)
+        if entry is not None:
+            self._entries[token] = (entry[0], entry[1], time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "revoked": len(self._revoked),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+token_cache = TokenCache()
+
+class RevocationList:
+    """Revoked tokens shared by all workers through Redis
+
+    Tokens are stored as SHA-256 hashes under keys that expire with the
+    token. While Redis is missing or failing, contains() answers False
+    and revocations reach Redis only if it is back by then, so only the
+    worker that revoked a token rejects it.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, client=None):
+        self.redis_url = redis_url
+        self._client = client
+        self._redis_retry_at = 0.0
+        self.redis_errors = 0
+
+    def _key(self, token: str) -> str:
+        return "revoked_token:" + hashlib.sha256(token.encode()).hexdigest()
+
+    def _redis(self):
+        """Client on first use, None while Redis is off or in its retry pause"""
+        if time.time() < self._redis_retry_at:
+            return None
+        if self._client is None and self.redis_url:
+            import redis.asyncio as aioredis
+            self._client = aioredis.from_url(self.redis_url, socket_connect_timeout=2, socket_timeout=2)
+        return self._client
+
+    def _failed(self):
+        self.redis_errors += 1
+        self._redis_retry_at = time.time() + REDIS_RETRY_SECONDS
+
+    async def add(self, token: str, exp: float) -> bool:
+        """Publish a revocation until exp, returns False when Redis was unavailable"""
+        client = self._redis()
+        ttl = int(exp - time.time()) + 1
+        if client is None or ttl <= 0:
+            return False
+        try:
+            await client.set(self._key(token), 1, ex=ttl)
+        except Exception:
+            self._failed()
+            return False
+        return True
+
+    async def contains(self, token: str) -> bool:
+        client = self._redis()
+        if client is None:
+            return False
+        try:
+            return bool(await client.exists(self._key(token)))
+        except Exception:
+            self._failed()
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "redis_errors": self.redis_errors,
+            "redis_active": bool(self.redis_url or self._client) and time.time() >= self._redis_retry_at
+        }
+
+revocation_list = RevocationList(REVOCATION_REDIS_URL)
+
 def verify_password(plain_password, hashed_password):
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -93,13 +247,54 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_user(token: str) -> Optional[str]:
+    """Username of a valid, unrevoked token, None otherwise; never raises"""
+    if token_cache.is_revoked(token):
+        return None
+    user = token_cache.get(token)
+    if user is not None:
+        return user.username
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+def _token_exp(token: str) -> float:
+    return jwt.get_unverified_claims(token).get("exp", time.time())
+
+async def revoke_token(token: str) -> bool:
+    """Revoke an access token that has already been verified, in every worker
+
+    Returns False when the revocation could not be shared through Redis
+    and so only applies to this worker.
+    """
+    exp = _token_exp(token)
+    token_cache.revoke(token, exp)
+    return await revocation_list.add(token, exp)
+
+async def _revoked_elsewhere(token: str) -> bool:
+    """Check the shared revocation list, remembering a revoked token locally"""
+    if not await revocation_list.contains(token):
+        return False
+    token_cache.revoke(token, _token_exp(token))
+    return True
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Get current user from JWT token"""
+    """Get current user from JWT token, served from the token cache when possible"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if token_cache.is_revoked(token):
+        raise credentials_exception
+    user = token_cache.get(token)
+    if user is not None:
+        if token_cache.check_due(token, REVOCATION_CHECK_SECONDS):
+            if await _revoked_elsewhere(token):
+                raise credentials_exception
+            token_cache.mark_checked(token)
+        return user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -110,8 +305,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     user = get_user(username=token_data.username)
-    if user is None:
+    if user is None or await _revoked_elsewhere(token):
         raise credentials_exception
+    token_cache.put(token, user, payload.get("exp", time.time()))
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
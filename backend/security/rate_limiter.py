@@ -1,11 +1,206 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+import functools
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException
+from .auth import token_user
+
+# Token bucket updated atomically on the Redis server, one round trip per
+# check. Grants `lease` tokens at once while the bucket holds at least
+# twice that, otherwise one token if available. Uses the server clock so
+# workers with skewed clocks share one view of time.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = 0
+if tokens >= 2 * lease then
+    granted = lease
+elseif tokens >= 1 then
+    granted = 1
+end
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {granted, tostring((1 - tokens) / rate)}
+"""
+
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Share of a bucket a worker may take from Redis in one go while the
+# client is well under its limit; the rest of the lease is spent locally
+LEASE_FRACTION = 0.1
+
+# Keys each worker keeps leases and fallback buckets for
+DEFAULT_LOCAL_KEYS = 10000
+
+# After a Redis failure, limits are counted in process this long before retrying
+REDIS_RETRY_SECONDS = 30
+
+
+class RateLimitExceeded(HTTPException):
+    """Raised when a client has no tokens left for an endpoint"""
+
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(status_code=429, detail=limit)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def parse_rate(limit: str) -> Tuple[int, float]:
+    """"5/minute" -> (bucket capacity, tokens refilled per second)"""
+    count, period = limit.split("/")
+    period = period.strip().rstrip("s")
+    if period not in RATE_PERIODS:
+        raise ValueError(f"Unknown rate limit period: {limit}")
+    capacity = int(count)
+    return capacity, capacity / RATE_PERIODS[period]
+
+
+def client_key(request: Request) -> str:
+    """The verified user when the request carries a valid token, else the client address"""
+    authorization = request.headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        username = token_user(authorization[7:])
+        if username:
+            return f"user:{username}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimiter:
+    """Token-bucket rate limits shared by all workers through Redis
+
+    limit("5/minute") decorates an endpoint that takes `request: Request`.
+    Buckets are per endpoint and per key_func(request). Tokens leased
+    from Redis are spent locally without a round trip. While Redis is
+    missing or failing, buckets are kept in process instead.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, key_func: Callable[[Request], str] = client_key,
+                 lease_fraction: float = LEASE_FRACTION, max_local_keys: int = DEFAULT_LOCAL_KEYS,
+                 client=None):
+        self.redis_url = redis_url
+        self.key_func = key_func
+        self.lease_fraction = lease_fraction
+        self.max_local_keys = max_local_keys
+        self._redis_client = client
+        self._script = None
+        self._redis_retry_at = 0.0
+        # bucket key -> leased tokens not yet spent
+        self._leases: "OrderedDict[str, int]" = OrderedDict()
+        # bucket key -> (tokens, last refill), used without Redis
+        self._local_buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.checks = 0
+        self.redis_calls = 0
+        self.rejected = 0
+
+    def limit(self, limit: str):
+        capacity, rate = parse_rate(limit)
+        lease = max(1, int(capacity * self.lease_fraction))
+
+        def decorator(func):
+            scope = func.__name__
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs.get("request")
+                if request is None:
+                    request = next(arg for arg in args if isinstance(arg, Request))
+                bucket = f"rate_limit:{scope}:{self.key_func(request)}"
+                allowed, retry_after = await self.hit(bucket, capacity, rate, lease)
+                if not allowed:
+                    raise RateLimitExceeded(limit, retry_after)
+                return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    async def hit(self, bucket: str, capacity: int, rate: float, lease: int = 1) -> Tuple[bool, float]:
+        """Take one token from a bucket; returns (allowed, seconds until a token is free)"""
+        self.checks += 1
+        leased = self._leases.get(bucket)
+        if leased:
+            self._leases[bucket] = leased - 1
+            return True, 0.0
+
+        if self._redis_enabled() and time.time() >= self._redis_retry_at:
+            try:
+                granted, retry_after = await self._take_from_redis(bucket, capacity, rate, lease)
+            except Exception:
+                # Redis down or misbehaving: count in process for a while
+                self._redis_retry_at = time.time() + REDIS_RETRY_SECONDS
+            else:
+                if granted > 1:
+                    self._remember(self._leases, bucket, granted - 1)
+                if not granted:
+                    self.rejected += 1
+                return granted > 0, retry_after
+
+        allowed, retry_after = self._take_locally(bucket, capacity, rate)
+        if not allowed:
+            self.rejected += 1
+        return allowed, retry_after
+
+    async def _take_from_redis(self, bucket: str, capacity: int, rate: float, lease: int) -> Tuple[int, float]:
+        if self._script is None:
+            client = self._redis_client
+            if client is None:
+                # Imported and connected on first use, like the rest of the Redis clients
+                import redis.asyncio as aioredis
+                client = aioredis.from_url(self.redis_url, socket_connect_timeout=2)
+            # Load up front so the first checks do not all start with NOSCRIPT
+            await client.script_load(TOKEN_BUCKET_SCRIPT)
+            self._redis_client = client
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.redis_calls += 1
+        granted, retry_after = await self._script(keys=[bucket], args=[capacity, rate, lease])
+        return int(granted), max(0.0, float(retry_after))
+
+    def _redis_enabled(self) -> bool:
+        return bool(self.redis_url) or self._redis_client is not None
+
+    def _take_locally(self, bucket: str, capacity: int, rate: float,
+                      now: Optional[float] = None) -> Tuple[bool, float]:
+        now = time.monotonic() if now is None else now
+        tokens, last = self._local_buckets.get(bucket, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._remember(self._local_buckets, bucket, (tokens, now))
+        return allowed, (1 - tokens) / rate
+
+    def _remember(self, store: OrderedDict, bucket: str, value: Any):
+        store[bucket] = value
+        store.move_to_end(bucket)
+        while len(store) > self.max_local_keys:
+            store.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checks": self.checks,
+            "redis_calls": self.redis_calls,
+            "rejected": self.rejected,
+            "leased_keys": len(self._leases),
+            "local_buckets": len(self._local_buckets),
+            "redis_active": self._redis_enabled() and time.time() >= self._redis_retry_at
+        }
+
 
 # Create limiter instance
-limiter = Limiter(key_func=get_remote_address)
+limiter = RateLimiter(os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379")))
 
 # Rate limit error handler
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded) -> Response:
@@ -14,4 +209,4 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded) -> Respon
         content={"detail": f"Rate limit exceeded: {exc.detail}"}
     )
     response.headers["Retry-After"] = str(exc.retry_after)
-    return response
\ No newline at end of file
+    return response
@@ -1,4 +1,5 @@
-from typing import List
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List
 from fastapi import HTTPException, status, Depends
 from functools import wraps
 from .auth import get_current_active_user, User
@@ -10,6 +11,17 @@ ROLES = {
     "viewer": ["read"]
 }
 
+# Permission sets per role, built once
+ROLE_PERMISSIONS = {role: frozenset(permissions) for role, permissions in ROLES.items()}
+
+@lru_cache(maxsize=256)
+def _permissions_for(roles: FrozenSet[str]) -> FrozenSet[str]:
+    return frozenset().union(*(ROLE_PERMISSIONS.get(role, frozenset()) for role in roles))
+
+def permissions_for(roles: Iterable[str]) -> FrozenSet[str]:
+    """Permissions granted by a set of roles, cached per role combination"""
+    return _permissions_for(frozenset(roles))
+
 def check_permissions(required_permissions: List[str]):
     """Decorator to check if user has required permissions"""
     def decorator(func):
@@ -24,11 +36,7 @@ def check_permissions(required_permissions: List[str]):
                 )
             
             # Check permissions
-            user_permissions = set()
-            for role in current_user.roles:
-                user_permissions.update(ROLES.get(role, []))
-            
-            if not all(perm in user_permissions for perm in required_permissions):
+            if not permissions_for(current_user.roles).issuperset(required_permissions):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Insufficient permissions"
@@ -40,10 +48,11 @@ def check_permissions(required_permissions: List[str]):
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
-        self.allowed_roles = allowed_roles
+        self.allowed_roles = frozenset(allowed_roles)
 
-    def __call__(self, current_user: User = Depends(get_current_active_user)):
-        if not any(role in self.allowed_roles for role in current_user.roles):
+    # async so FastAPI calls it on the event loop instead of a worker thread
+    async def __call__(self, current_user: User = Depends(get_current_active_user)):
+        if self.allowed_roles.isdisjoint(current_user.roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Operation not permitted"
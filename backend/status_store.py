@@ -0,0 +1,182 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from database import Database, DEFAULT_DATABASE_URL, psycopg2
+
+STATUSES = ("blocked", "verified")
+
+# Analyst actions and the status they set
+STATUS_ACTIONS = {"block": "blocked", "blocked": "blocked", "verify": "verified", "verified": "verified"}
+
+# Ids per IN (...) lookup, below SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+
+# Rows per INSERT statement in Postgres bulk updates
+POSTGRES_PAGE_SIZE = 1000
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transaction_status (
+    transaction_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_by TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transaction_status_by_status ON transaction_status (status, updated_at);
+CREATE TABLE IF NOT EXISTS status_counts (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS transaction_status_inserted AFTER INSERT ON transaction_status
+BEGIN
+    UPDATE status_counts SET count = count + 1 WHERE status = NEW.status;
+END;
+CREATE TRIGGER IF NOT EXISTS transaction_status_updated AFTER UPDATE OF status ON transaction_status
+WHEN OLD.status <> NEW.status
+BEGIN
+    UPDATE status_counts SET count = count - 1 WHERE status = OLD.status;
+    UPDATE status_counts SET count = count + 1 WHERE status = NEW.status;
+END;
+CREATE TRIGGER IF NOT EXISTS transaction_status_deleted AFTER DELETE ON transaction_status
+BEGIN
+    UPDATE status_counts SET count = count - 1 WHERE status = OLD.status;
+END;
+"""
+
+POSTGRES_SCHEMA = """
+-- Workers starting together would otherwise race on CREATE OR REPLACE
+SELECT pg_advisory_xact_lock(hashtext('transaction_status_schema'));
+CREATE TABLE IF NOT EXISTS transaction_status (
+    transaction_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_by TEXT,
+    updated_at DOUBLE PRECISION NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transaction_status_by_status ON transaction_status (status, updated_at);
+CREATE TABLE IF NOT EXISTS status_counts (
+    status TEXT PRIMARY KEY,
+    count BIGINT NOT NULL
+);
+CREATE OR REPLACE FUNCTION transaction_status_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.status = NEW.status THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE status_counts SET count = count - 1 WHERE status = OLD.status;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE status_counts SET count = count + 1 WHERE status = NEW.status;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS transaction_status_counted ON transaction_status;
+CREATE TRIGGER transaction_status_counted
+AFTER INSERT OR DELETE OR UPDATE OF status ON transaction_status
+FOR EACH ROW
+EXECUTE FUNCTION transaction_status_count();
+"""
+
+UPSERT_SQL = """
+INSERT INTO transaction_status (transaction_id, status, updated_by, updated_at) VALUES {values}
+ON CONFLICT (transaction_id) DO UPDATE SET
+    status = excluded.status, updated_by = excluded.updated_by, updated_at = excluded.updated_at
+"""
+
+
+def normalize_status(action: str) -> str:
+    """Status set by a verify/block action, ValueError for anything else"""
+    status = STATUS_ACTIONS.get(action)
+    if status is None:
+        raise ValueError(f"Unknown transaction action: {action}")
+    return status
+
+
+class StatusStore:
+    """Analyst verify/block decisions, durable and shared by all workers
+
+    Kept in the DATABASE_URL database (SQLite or Postgres, see Database).
+    Rows are keyed by transaction id and indexed by status. Per-status
+    counts are maintained by triggers in the same database transaction
+    as each write, so reading them never scans the table. Calls block;
+    run them off the event loop.
+    """
+
+    def __init__(self, database_url: str = DEFAULT_DATABASE_URL):
+        self.database = Database(database_url, SQLITE_SCHEMA, POSTGRES_SCHEMA, self._seed_counts)
+
+    def get(self, transaction_id: str) -> Optional[str]:
+        return self.get_many([transaction_id]).get(transaction_id)
+
+    def get_many(self, transaction_ids: Iterable[str]) -> Dict[str, str]:
+        """Statuses of the given transactions; ids without one are left out"""
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        statuses = {}
+        with self.database.transaction() as cursor:
+            for start in range(0, len(transaction_ids), LOOKUP_CHUNK):
+                chunk = transaction_ids[start:start + LOOKUP_CHUNK]
+                cursor.execute(
+                    "SELECT transaction_id, status FROM transaction_status WHERE transaction_id IN "
+                    f"({self.database.placeholders(len(chunk))})",
+                    chunk
+                )
+                statuses.update(cursor.fetchall())
+        return statuses
+
+    def with_status(self, status: str, limit: int = 1000) -> List[str]:
+        """Ids of transactions with a status, most recently changed first"""
+        param = self.database.param
+        with self.database.transaction() as cursor:
+            cursor.execute(
+                f"SELECT transaction_id FROM transaction_status WHERE status = {param} "
+                f"ORDER BY updated_at DESC LIMIT {param}",
+                (status, limit)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        """Transactions per status, from the maintained counters"""
+        with self.database.transaction() as cursor:
+            cursor.execute("SELECT status, count FROM status_counts")
+            counts = dict(cursor.fetchall())
+        return {status: int(counts.get(status, 0)) for status in STATUSES}
+
+    def set(self, transaction_id: str, action: str, updated_by: Optional[str] = None) -> str:
+        """Apply one verify/block action, returns the status set"""
+        status = normalize_status(action)
+        self.set_many([(transaction_id, status)], updated_by)
+        return status
+
+    def set_many(self, actions: Iterable[Tuple[str, str]], updated_by: Optional[str] = None) -> int:
+        """Apply (transaction_id, action) pairs in one database transaction
+
+        All or nothing: an unknown action raises ValueError before anything
+        is written. The last action given for an id wins. Returns the
+        number of transactions updated.
+        """
+        latest = {transaction_id: normalize_status(action) for transaction_id, action in actions}
+        now = time.time()
+        rows = [(transaction_id, status, updated_by, now) for transaction_id, status in latest.items()]
+        if not rows:
+            return 0
+        with self.database.transaction(write=True) as cursor:
+            if self.database.postgres:
+                psycopg2.extras.execute_values(
+                    cursor, UPSERT_SQL.format(values="%s"), rows, page_size=POSTGRES_PAGE_SIZE
+                )
+            else:
+                cursor.executemany(UPSERT_SQL.format(values="(?, ?, ?, ?)"), rows)
+        return len(rows)
+
+    def close(self):
+        self.database.close()
+
+    def _seed_counts(self, cursor):
+        # Counter rows exist up front so the triggers only ever UPDATE them
+        param = self.database.param
+        for status in STATUSES:
+            cursor.execute(
+                "INSERT INTO status_counts (status, count) "
+                f"SELECT {param}, COUNT(*) FROM transaction_status WHERE status = {param} "
+                "ON CONFLICT (status) DO NOTHING",
+                (status, status)
+            )
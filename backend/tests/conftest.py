@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_CSV = os.path.join(BACKEND_DIR, 'data', 'anonymized_sample_fraud_txn.csv')
+
+
+@pytest.fixture(scope='session')
+def sample_df() -> pd.DataFrame:
+    return pd.read_csv(SAMPLE_CSV)
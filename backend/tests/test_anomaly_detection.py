@@ -0,0 +1,56 @@
+from security.anomaly_detection import MemoryEventStore
+
+
+def test_counts_events_in_window():
+    store = MemoryEventStore(horizon=60)
+    for now in (1000.2, 1000.9, 1001.5):
+        store.add("k", now=now)
+    assert store.count("k", 60, now=1001) == 3
+    assert store.count("k", 1, now=1001) == 1
+    assert store.count("other", 60, now=1001) == 0
+
+
+def test_window_wraps_around_the_ring():
+    store = MemoryEventStore(horizon=5)
+    # Seconds 3..6 land in buckets 3, 4, 0 and 1
+    for second in (3, 4, 5, 6):
+        store.add("k", now=second)
+    assert store.count("k", 5, now=6) == 4
+    assert store.count("k", 2, now=6) == 2
+    assert store.count("k", 5, now=7) == 4
+    assert store.count("k", 5, now=8) == 3
+    # Windows longer than the horizon are capped to it
+    assert store.count("k", 60, now=8) == 3
+
+
+def test_advance_clears_elapsed_seconds():
+    store = MemoryEventStore(horizon=5)
+    for _ in range(3):
+        store.add("k", now=10)
+    # Bucket 0 held second 10; reaching second 15 must clear it first
+    store.add("k", now=14)
+    assert store.count("k", 5, now=14) == 4
+    store.add("k", now=15)
+    assert store.count("k", 5, now=15) == 2
+    # A gap of a whole horizon starts from an empty ring
+    store.add("k", now=40)
+    assert store.count("k", 5, now=40) == 1
+    assert list(store._keys["k"][1]) == [1, 0, 0, 0, 0]
+
+
+def test_evicts_least_recently_written_keys():
+    store = MemoryEventStore(horizon=5, max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        store.add(key, now=100)
+    assert list(store._keys) == ["a", "c"]
+    assert store.count("b", 5, now=100) == 0
+
+
+def test_evicts_keys_idle_for_the_horizon():
+    store = MemoryEventStore(horizon=5)
+    store.add("old", now=100)
+    store.add("new", now=104)
+    assert len(store) == 2
+    store.add("new", now=105)
+    assert len(store) == 1
+    assert store.count("old", 5, now=105) == 0
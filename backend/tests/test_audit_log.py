@@ -0,0 +1,53 @@
+import glob
+import logging
+
+import pytest
+
+from security import audit_log
+from security.audit_log import AuditLogWriter
+
+
+def record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("audit", logging.INFO, __file__, 0, message, None, None)
+
+
+def logged_lines(path: str):
+    lines = []
+    for name in glob.glob(path + "*"):
+        if not name.endswith(".lock"):
+            with open(name) as f:
+                lines.extend(f.read().splitlines())
+    return lines
+
+
+def test_rotates_by_size(tmp_path):
+    path = str(tmp_path / "audit.log")
+    writer = AuditLogWriter(path, max_bytes=200, backup_count=3, formatter=logging.Formatter("%(message)s"))
+    for i in range(10):
+        writer._write([record(f"event {i:02d} " + "x" * 30)])
+    assert writer.rotations > 0
+    with open(path + ".1") as f:
+        assert f.read().splitlines()[-1].startswith("event")
+    assert len(logged_lines(path)) <= 10
+    assert not glob.glob(path + ".4")
+
+
+@pytest.mark.skipif(audit_log.fcntl is None, reason="needs advisory file locks")
+def test_writers_sharing_a_file_rotate_once(tmp_path):
+    # Two writers stand in for two worker processes appending to one file
+    path = str(tmp_path / "audit.log")
+    writers = [
+        AuditLogWriter(path, max_bytes=400, backup_count=20, formatter=logging.Formatter("%(message)s"))
+        for _ in range(2)
+    ]
+    for i in range(40):
+        writers[i % 2]._write([record(f"worker {i % 2} event {i:02d} " + "x" * 20)])
+
+    lines = logged_lines(path)
+    assert len(lines) == 40
+    assert len(set(lines)) == 40
+    # Every backup holds at most max_bytes plus one batch; none was rotated twice
+    assert sum(w.rotations for w in writers) == len(glob.glob(path + ".[0-9]*"))
+    for name in glob.glob(path + ".[0-9]*"):
+        with open(name) as f:
+            assert len(f.read()) <= 400 + 50
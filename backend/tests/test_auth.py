@@ -0,0 +1,66 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from security import auth
+from security.auth import RevocationList, TokenCache, create_access_token, get_current_user, revoke_token
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Fresh per-worker auth state; returns a function that swaps in another worker's"""
+    def switch(revocations: RevocationList):
+        monkeypatch.setattr(auth, "token_cache", TokenCache())
+        monkeypatch.setattr(auth, "revocation_list", revocations)
+    switch(RevocationList())
+    return switch
+
+
+def analyst_token() -> str:
+    return create_access_token({"sub": "analyst", "roles": ["fraud_analyst"]}, timedelta(minutes=5))
+
+
+def authenticate(token: str):
+    return asyncio.run(get_current_user(token))
+
+
+def test_revoked_token_is_rejected_without_redis(worker):
+    token = analyst_token()
+    assert authenticate(token).username == "analyst"
+    assert asyncio.run(revoke_token(token)) is False
+    with pytest.raises(HTTPException):
+        authenticate(token)
+
+
+def test_revocation_reaches_other_workers(worker, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(auth, "REVOCATION_CHECK_SECONDS", 0)
+    token = analyst_token()
+
+    # Worker A has the token cached, worker B logs it out
+    worker(RevocationList(client=fakeredis.FakeAsyncRedis(server=server)))
+    assert authenticate(token).username == "analyst"
+    worker_a = (auth.token_cache, auth.revocation_list)
+    worker(RevocationList(client=fakeredis.FakeAsyncRedis(server=server)))
+    assert asyncio.run(revoke_token(token)) is True
+
+    monkeypatch.setattr(auth, "token_cache", worker_a[0])
+    monkeypatch.setattr(auth, "revocation_list", worker_a[1])
+    with pytest.raises(HTTPException):
+        authenticate(token)
+
+    # A worker that never saw the token rejects it on its first lookup
+    worker(RevocationList(client=fakeredis.FakeAsyncRedis(server=server)))
+    with pytest.raises(HTTPException):
+        authenticate(token)
+
+
+def test_cached_token_is_rechecked_after_interval(worker, monkeypatch):
+    monkeypatch.setattr(auth, "REVOCATION_CHECK_SECONDS", 60)
+    token = analyst_token()
+    authenticate(token)
+    assert not auth.token_cache.check_due(token, 60)
+    assert auth.token_cache.check_due(token, 0)
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import columnar_store
+from columnar_store import ColumnarStore, DETECTION_COLUMNS
+
+pytestmark = pytest.mark.skipif(not columnar_store.ARROW_AVAILABLE, reason='needs pyarrow')
+
+
+@pytest.fixture
+def csv_path(sample_df, tmp_path):
+    path = tmp_path / 'transactions.csv'
+    sample_df.head(100).to_csv(path, index=False)
+    return str(path)
+
+
+def test_load_converts_once(csv_path):
+    store = ColumnarStore(csv_path)
+    assert store.ensure_current()
+    assert store.is_current()
+    assert not store.ensure_current()
+    df = store.load(DETECTION_COLUMNS)
+    assert len(df) == 100
+    assert df['TXN_TIME'].notna().all()
+
+
+def test_csv_replaced_with_older_mtime_is_reconverted(sample_df, csv_path):
+    store = ColumnarStore(csv_path)
+    store.ensure_current()
+    stat = os.stat(csv_path)
+
+    # e.g. a restore or `cp -p`: new contents, mtime older than the Arrow file
+    sample_df.head(60).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))
+    assert not store.is_current()
+    assert len(store.load(DETECTION_COLUMNS)) == 60
+
+
+def test_float_fraud_flags(sample_df, tmp_path):
+    df = sample_df.head(50).copy()
+    df['IS_FRAUD'] = df['IS_FRAUD'].astype(float)
+    path = tmp_path / 'float_flags.csv'
+    df.to_csv(path, index=False)
+    assert '1.0' in path.read_text()
+
+    loaded = ColumnarStore(str(path)).load(DETECTION_COLUMNS)
+    assert loaded['IS_FRAUD'].tolist() == df['IS_FRAUD'].tolist()
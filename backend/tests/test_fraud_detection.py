@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud_detection import FraudDetector
+from benchmarks.synthetic import make_transactions
+
+
+def both(df: pd.DataFrame):
+    """detect_fraud results from the row loop and from the vectorized path"""
+    return FraudDetector(vectorized=False).detect_fraud(df), FraudDetector().detect_fraud(df)
+
+
+def assert_same(expected, actual):
+    # repr keeps NaN comparable, and also catches int/float or bool/int drift
+    assert repr(actual) == repr(expected)
+
+
+def test_sample_matches_row_loop(sample_df):
+    rows, vectorized = both(sample_df)
+    assert vectorized == rows
+    assert vectorized['fraud_count'] == int(sample_df['IS_FRAUD'].sum())
+
+
+def test_synthetic_matches_row_loop():
+    rows, vectorized = both(make_transactions(3000, seed=7))
+    assert_same(rows, vectorized)
+    assert any(r['transaction']['suspicious_patterns'] for r in vectorized['detailed_results'])
+
+
+def test_nan_flags_and_vpas():
+    df = make_transactions(200, seed=1)
+    df.loc[3, 'IS_FRAUD'] = np.nan
+    df.loc[4, 'PAYER_VPA'] = np.nan
+    df.loc[5, 'BENEFICIARY_VPA'] = np.nan
+    df.loc[6, 'AMOUNT'] = np.nan
+    df.loc[7, 'TXN_TIMESTAMP'] = np.nan
+    assert_same(*both(df))
+
+
+def test_numeric_vpas():
+    df = make_transactions(50, seed=2)
+    df['PAYER_VPA'] = np.arange(len(df)) * 1000
+    df['BENEFICIARY_VPA'] = np.arange(len(df), dtype=float)
+    assert_same(*both(df))
+
+
+@pytest.mark.parametrize('columns', [
+    ['AMOUNT'],
+    ['AMOUNT', 'PAYER_VPA'],
+    ['TRANSACTION_ID', 'IS_FRAUD'],
+])
+def test_missing_columns(sample_df, columns):
+    assert_same(*both(sample_df[columns].head(300)))
+
+
+def test_empty_frame(sample_df):
+    rows, vectorized = both(sample_df.iloc[:0])
+    assert vectorized == rows == {"fraud_count": 0, "fraud_transactions": [], "detailed_results": []}
+
+
+def test_precomputed_frame_is_reused(sample_df):
+    detector = FraudDetector()
+    frame = detector.result_frame(sample_df)
+    assert detector.detect_fraud(sample_df, frame) == detector.detect_fraud(sample_df)
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_summary_matches_detect_fraud(sample_df, vectorized):
+    detector = FraudDetector(vectorized=vectorized)
+    expected = detector.detect_fraud(sample_df)
+    del expected['detailed_results']
+    assert detector.detect_fraud_summary(sample_df) == expected
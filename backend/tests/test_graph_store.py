@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import graph_store
+from graph_analyzer import GraphAnalyzer
+from graph_store import GraphStore
+
+pytestmark = pytest.mark.skipif(not graph_store.ARROW_AVAILABLE, reason='snapshots need pyarrow')
+
+analyzer = GraphAnalyzer()
+
+
+def sorted_edges(edges: pd.DataFrame) -> pd.DataFrame:
+    edges = edges.astype({'source': str, 'target': str})
+    return edges.sort_values(['source', 'target']).reset_index(drop=True)[['source', 'target', 'count', 'amount', 'fraud_count']]
+
+
+def assert_same_edges(actual: pd.DataFrame, expected: pd.DataFrame):
+    pd.testing.assert_frame_equal(sorted_edges(actual), sorted_edges(expected), check_dtype=False)
+
+
+def test_snapshot_round_trip(sample_df, tmp_path):
+    store = GraphStore(str(tmp_path))
+    store.open()
+    store.reseed(analyzer.aggregate_edges(sample_df.iloc[:2000]), 'v1')
+    store.add_edges(analyzer.aggregate_edges(sample_df.iloc[1500:]))
+    assert store.snapshot()
+
+    loaded = GraphStore(str(tmp_path))
+    assert loaded.load()
+    assert_same_edges(loaded.edge_table(), store.edge_table())
+    assert_same_edges(loaded.seed_edges, store.seed_edges)
+    for key in ('nodes', 'edges', 'components', 'transactions', 'fraud_transactions', 'generation', 'seed_version'):
+        assert loaded.stats()[key] == store.stats()[key]
+    vpa = sample_df['PAYER_VPA'].iloc[0]
+    assert loaded.node(vpa)['component_size'] == store.node(vpa)['component_size']
+
+
+def test_reseed_keeps_appended_batches(sample_df, tmp_path):
+    seed1, seed2 = sample_df.iloc[:1500], sample_df.iloc[1000:]
+    uploads = [sample_df.iloc[200:900], sample_df.iloc[2500:]]
+
+    store = GraphStore(str(tmp_path))
+    store.reseed(analyzer.aggregate_edges(seed1), 'v1')
+    for upload in uploads:
+        store.add_edges(analyzer.aggregate_edges(upload))
+    store.reseed(analyzer.aggregate_edges(seed2), 'v2')
+
+    expected = GraphStore()
+    expected.add_edges(analyzer.aggregate_edges(pd.concat([seed2] + uploads)))
+    assert_same_edges(store.edge_table(), expected.edge_table())
+    assert store.seed_version == 'v2'
+    assert store.stats()['components'] == expected.stats()['components']
+    assert store.stats()['transactions'] == len(seed2) + sum(len(u) for u in uploads)
+
+
+def test_reseed_adopts_seed_of_unversioned_store(sample_df):
+    edges = analyzer.aggregate_edges(sample_df)
+    store = GraphStore()
+    store.add_edges(edges)
+    version = store.version
+    store.reseed(edges, 'v1')
+    assert store.version == version
+    assert store.seed_version == 'v1'
+    assert store.stats()['transactions'] == len(sample_df)
+
+
+@pytest.mark.skipif(graph_store.fcntl is None, reason='needs advisory file locks')
+def test_second_writer_does_not_snapshot(sample_df, tmp_path):
+    first = GraphStore(str(tmp_path))
+    first.open()
+    first.add_edges(analyzer.aggregate_edges(sample_df.iloc[:500]))
+    assert first.snapshot()
+
+    second = GraphStore(str(tmp_path))
+    assert second.open()
+    assert second.writer is False
+    second.add_edges(analyzer.aggregate_edges(sample_df.iloc[500:]))
+    assert not second.snapshot()
+
+    reloaded = GraphStore(str(tmp_path))
+    reloaded.load()
+    assert_same_edges(reloaded.edge_table(), first.edge_table())
+    assert sorted(p.name for p in tmp_path.glob('*.arrow')) == ['edges-1.arrow', 'nodes-1.arrow']
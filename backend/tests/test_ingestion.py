@@ -0,0 +1,21 @@
+import io
+
+from fraud_detection import FraudDetector
+from graph_analyzer import GraphAnalyzer
+from ingestion import detect_stream_with_graph
+
+
+def detect(csv: bytes):
+    results, _ = detect_stream_with_graph(io.BytesIO(csv), FraudDetector(), GraphAnalyzer())
+    return results
+
+
+def test_float_fraud_flags(sample_df):
+    df = sample_df.head(500).copy()
+    df['IS_FRAUD'] = df['IS_FRAUD'].astype(float)
+    csv = df.to_csv(index=False).encode()
+    assert b',1.0\n' in csv
+
+    results = detect(csv)
+    assert results['fraud_detected'] == int(df['IS_FRAUD'].sum()) > 0
+    assert results == detect(sample_df.head(500).to_csv(index=False).encode())
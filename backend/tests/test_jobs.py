@@ -0,0 +1,36 @@
+import asyncio
+import io
+
+from jobs import JobManager
+
+
+def test_job_is_queued_until_its_worker_starts(tmp_path):
+    manager = JobManager(spool_dir=str(tmp_path))
+
+    async def scenario():
+        slot = asyncio.Event()
+        statuses = []
+
+        async def runner(job):
+            # Waiting for an execution slot; the worker reports once it runs
+            await slot.wait()
+            job.progress.update({"rows_processed": 0, "fraud_detected": 0})
+            await asyncio.sleep(0)
+            statuses.append(manager.get(job.id).to_dict()["status"])
+            job.progress.update({"rows_processed": 10, "fraud_detected": 1})
+            return {"total_transactions": 10, "fraud_detected": 1}
+
+        job = await manager.submit("analyst", io.BytesIO(b"A\n1\n"), {}, runner)
+        await asyncio.sleep(0.01)
+        queued = job.to_dict()
+        slot.set()
+        while job.status != "completed":
+            await asyncio.sleep(0.01)
+        return queued, statuses, job.to_dict()
+
+    queued, statuses, done = asyncio.run(scenario())
+    assert queued["status"] == "queued" and queued["started_at"] is None
+    assert statuses == ["running"]
+    assert done["status"] == "completed"
+    assert done["rows_processed"] == 10
+    assert done["created_at"] <= done["started_at"] <= done["finished_at"]
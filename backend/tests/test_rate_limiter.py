@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from security.rate_limiter import RateLimiter, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("5/minute") == (5, 5 / 60)
+    assert parse_rate("100/hours") == (100, 100 / 3600)
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
+
+
+def test_local_bucket_refills_with_time():
+    limiter = RateLimiter()
+    take = lambda now: limiter._take_locally("k", 3, 1.0, now=now)
+
+    assert [take(100.0)[0] for _ in range(3)] == [True, True, True]
+    assert take(100.0) == (False, 1.0)
+    # 1.5 seconds refill 1.5 tokens: one request, then half a token short
+    assert take(101.5) == (True, 0.5)
+    assert take(101.5) == (False, 0.5)
+    # A long idle period refills to capacity, not beyond
+    assert [take(1000.0)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_local_buckets_keep_recently_used_keys():
+    limiter = RateLimiter(max_local_keys=2)
+    for key in ("a", "b", "a", "c"):
+        limiter._take_locally(key, 1, 1.0, now=0.0)
+    assert list(limiter._local_buckets) == ["a", "c"]
+    # "b" was evicted, so it starts again from a full bucket
+    assert limiter._take_locally("b", 1, 1.0, now=0.0)[0]
+
+
+class BrokenRedis:
+    async def script_load(self, script):
+        raise ConnectionError("redis is down")
+
+
+def test_redis_failure_falls_back_to_local_buckets():
+    limiter = RateLimiter(client=BrokenRedis())
+
+    async def run():
+        return [await limiter.hit("k", 2, 1 / 60) for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert limiter.stats()["redis_active"] is False
+    assert limiter.rejected == 1
+
+
+@pytest.fixture
+def server():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeServer()
+
+
+def worker_limiter(server) -> RateLimiter:
+    """A limiter as one worker process would have it, on the shared server"""
+    import fakeredis
+    return RateLimiter(client=fakeredis.FakeAsyncRedis(server=server))
+
+
+async def rewind(client, bucket: str, seconds: float):
+    """Move the bucket's last refill back, as if `seconds` had passed"""
+    ts = float(await client.hget(bucket, "ts"))
+    await client.hset(bucket, "ts", str(ts - seconds))
+
+
+def test_redis_bucket_leases_and_refills(server):
+    limiter = worker_limiter(server)
+    capacity, rate = parse_rate("20/hour")
+
+    async def run():
+        allowed = [(await limiter.hit("k", capacity, rate, lease=2))[0] for _ in range(25)]
+        rejected = await limiter.hit("k", capacity, rate, lease=2)
+        calls = limiter.redis_calls
+        await rewind(limiter._redis_client, "k", 1800)
+        refilled = [(await limiter.hit("k", capacity, rate, lease=2))[0] for _ in range(12)]
+        ttl = await limiter._redis_client.pttl("k")
+        return allowed, rejected, calls, refilled, ttl
+
+    allowed, (rejected, retry_after), calls, refilled, ttl = asyncio.run(run())
+    assert allowed == [True] * 20 + [False] * 5
+    assert not rejected and 179 < retry_after <= 180
+    # Leases save round trips while the bucket holds at least two of them
+    assert calls == 17
+    # Half an hour refills half the bucket
+    assert refilled == [True] * 10 + [False] * 2
+    # The key outlives a full refill, then expires
+    assert 0 < ttl <= 3600 * 1000 + 1000
+
+
+def test_workers_share_one_redis_bucket(server):
+    workers = [worker_limiter(server), worker_limiter(server)]
+
+    async def run():
+        return [(await workers[i % 2].hit("k", 10, 10 / 60, lease=2))[0] for i in range(16)]
+
+    assert sum(asyncio.run(run())) == 10
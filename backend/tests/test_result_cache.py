@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('A\n1\n')
+    return str(path)
+
+
+def test_concurrent_misses_compute_once(csv_file):
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'value': len(calls)}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute_async(csv_file, 'detection', compute) for _ in range(8)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{'value': 1}] * 8
+    assert cache.get_or_compute(csv_file, 'detection', lambda: None) == {'value': 1}
+
+
+def test_failed_compute_is_retried(csv_file):
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0)
+        if len(calls) == 1:
+            raise ValueError('boom')
+        return 'ok'
+
+    async def run():
+        results = await asyncio.gather(
+            *(cache.get_or_compute_async(csv_file, 'detection', compute) for _ in range(3)),
+            return_exceptions=True
+        )
+        return results, await cache.get_or_compute_async(csv_file, 'detection', compute)
+
+    results, retried = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert retried == 'ok'
+    assert len(calls) == 2
+
+
+def test_changed_file_is_recomputed(csv_file):
+    cache = ResultCache()
+    assert cache.get_or_compute(csv_file, 'rows', lambda: 1) == 1
+    with open(csv_file, 'a') as f:
+        f.write('2\n')
+    assert cache.get_or_compute(csv_file, 'rows', lambda: 2) == 2
@@ -0,0 +1,47 @@
+import io
+from datetime import datetime
+
+import pytest
+
+from fraud_detection import FraudDetector
+from graph_analyzer import GraphAnalyzer
+from ingestion import detect_stream_with_graph
+from transaction_repository import TransactionQuery, TransactionRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return TransactionRepository(f"sqlite:///{tmp_path / 'transactions.db'}")
+
+
+def mixed_layout_csv(sample_df) -> bytes:
+    """Sample rows in d/m/Y layout followed by rows in ISO layout"""
+    df = sample_df.head(40).copy()
+    df.loc[30:, 'TXN_TIMESTAMP'] = '2025-03-02 10:15:00'
+    return df.to_csv(index=False).encode()
+
+
+def test_upload_rows_keep_txn_time(sample_df, repository):
+    results, _ = detect_stream_with_graph(
+        io.BytesIO(mixed_layout_csv(sample_df)), FraudDetector(), GraphAnalyzer(), keep_frame=True
+    )
+    scored = results["scored_frame"]
+    assert scored["txn_time"].notna().all()
+    repository.append("upload:test", scored, "analyst")
+
+    page = repository.query(TransactionQuery(
+        limit=100, start=datetime(2025, 3, 2, 10, 0), end=datetime(2025, 3, 2, 11, 0)
+    ))
+    assert page["count"] == 10
+    assert {item["timestamp"] for item in page["items"]} == {'2025-03-02 10:15:00'}
+
+
+def test_frames_without_txn_time_are_parsed_per_value(sample_df, repository):
+    frame = FraudDetector().result_frame(sample_df.head(4))
+    frame["timestamp"] = ['01/03/2025 13:51', '2025-03-01 13:51:00', 'not a time', '13/03/2025 09:00']
+    repository.append("upload:test", frame)
+
+    page = repository.query(TransactionQuery(start=datetime(2025, 3, 1), end=datetime(2025, 3, 2)))
+    assert page["count"] == 2
+    page = repository.query(TransactionQuery(start=datetime(2025, 3, 13), end=datetime(2025, 3, 14)))
+    assert page["count"] == 1
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from vpa_matcher import (AUTOMATON_THRESHOLD, DEFAULT_VPA_PATTERNS, PREFIX_MARKER, AhoCorasickMatcher,
+                         PatternMatcher, SubstringMatcher, build_matcher, parse_patterns)
+
+
+def substring_search(patterns, vpa):
+    """Plain per-pattern substring / prefix test, the behaviour every matcher must reproduce"""
+    found = []
+    for i, pattern in enumerate(parse_patterns(patterns)):
+        if pattern.startswith(PREFIX_MARKER):
+            if vpa.startswith(pattern[len(PREFIX_MARKER):]):
+                found.append(i)
+        elif pattern in vpa:
+            found.append(i)
+    return tuple(found)
+
+
+def random_vpas(rnd, count):
+    alphabet = 'abcdefpaywinrzp0123456789'
+    return [''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 24))) + '@ybl' for _ in range(count)]
+
+
+@pytest.fixture(scope='module')
+def vpas():
+    rnd = random.Random(3)
+    return random_vpas(rnd, 500) + ['', 'paytm@ybl', 'rzpwin@axl', 'lucky.prize@okaxis', 'nan']
+
+
+@pytest.mark.parametrize('matcher_cls', [SubstringMatcher, AhoCorasickMatcher])
+def test_default_patterns_match_substring_search(matcher_cls, vpas):
+    matcher = matcher_cls(DEFAULT_VPA_PATTERNS)
+    expected = [substring_search(DEFAULT_VPA_PATTERNS, v) for v in vpas]
+    assert matcher.match_many(vpas) == expected
+    assert [matcher.match(v) for v in vpas] == expected
+
+
+@pytest.mark.parametrize('matcher_cls', [SubstringMatcher, AhoCorasickMatcher])
+def test_large_pattern_set_with_prefixes(matcher_cls, vpas):
+    rnd = random.Random(5)
+    patterns = [''.join(rnd.choice('abcdef0123') for _ in range(rnd.randint(1, 4))) for _ in range(200)]
+    patterns += ['^' + p for p in patterns[:20]] + ['a', 'ab', 'b', 'abc']
+    expected = [substring_search(patterns, v) for v in vpas]
+    assert matcher_cls(patterns).match_many(vpas) == expected
+
+
+def test_parse_patterns():
+    assert parse_patterns([' Pay ', '', '# note', '^', 'pay', '^RZP']) == ['pay', '^rzp']
+
+
+def test_build_matcher_picks_automaton_for_large_sets():
+    assert isinstance(build_matcher(DEFAULT_VPA_PATTERNS), SubstringMatcher)
+    patterns = [f'p{i}' for i in range(AUTOMATON_THRESHOLD + 1)]
+    assert isinstance(build_matcher(patterns), AhoCorasickMatcher)
+
+
+def test_pattern_matcher_is_abstract():
+    with pytest.raises(TypeError):
+        PatternMatcher(DEFAULT_VPA_PATTERNS)
@@ -0,0 +1,313 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from columnar_store import parse_timestamps
+from database import Database, DEFAULT_DATABASE_URL
+from result_store import RESULT_FIELDS, RISK_LEVELS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Rows per executemany() call (SQLite) or COPY stream (Postgres) in bulk loads
+INSERT_BATCH_ROWS = 20000
+
+# Stored uploads are deleted this long after they were loaded
+DEFAULT_UPLOAD_TTL_SECONDS = 7 * 24 * 3600
+
+# Columns stored per transaction, besides the generated id
+STORED_COLUMNS = ("source", "txn_time") + RESULT_FIELDS
+
+# Columns with an index; each ends in id so keyset pages on one filter
+# read the index in order instead of sorting
+INDEXED_COLUMNS = ("transaction_id", "payer_vpa", "beneficiary_vpa", "txn_time", "risk_level", "source")
+
+TABLE_COLUMNS = """
+    source TEXT NOT NULL,
+    txn_time BIGINT,
+    transaction_id TEXT NOT NULL,
+    timestamp TEXT,
+    amount DOUBLE PRECISION,
+    payer_vpa TEXT,
+    beneficiary_vpa TEXT,
+    is_fraud BOOLEAN NOT NULL,
+    risk_score INTEGER,
+    risk_level TEXT,
+    suspicious_patterns TEXT,
+    explanation TEXT
+"""
+
+SOURCES_TABLE = """
+CREATE TABLE IF NOT EXISTS transaction_sources (
+    source TEXT PRIMARY KEY,
+    version TEXT,
+    rows BIGINT NOT NULL,
+    loaded_by TEXT,
+    loaded_at DOUBLE PRECISION NOT NULL
+);
+"""
+
+INDEXES = "".join(
+    f"CREATE INDEX IF NOT EXISTS transactions_by_{column} ON transactions ({column}, id);\n"
+    for column in INDEXED_COLUMNS
+)
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,{TABLE_COLUMNS});
+{INDEXES}{SOURCES_TABLE}"""
+
+POSTGRES_SCHEMA = f"""
+SELECT pg_advisory_xact_lock(hashtext('transactions_schema'));
+CREATE TABLE IF NOT EXISTS transactions (
+    id BIGSERIAL PRIMARY KEY,{TABLE_COLUMNS});
+{INDEXES}{SOURCES_TABLE}"""
+
+
+def epoch_seconds(moment: datetime) -> int:
+    """Seconds since the epoch; naive datetimes are read like the stored timestamps"""
+    stamp = pd.Timestamp(moment)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(None)
+    return int(stamp.value // 10 ** 9)
+
+
+class TransactionQuery:
+    """Filters and keyset cursor for one page of stored transactions
+
+    cursor is the id of the last row of the previous page (0 for the
+    first); rows come back in id order, i.e. load order. With owner, only
+    the reference data and sources loaded by owner are visible.
+    """
+
+    def __init__(self, cursor: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+                 transaction_id: Optional[str] = None, payer_vpa: Optional[str] = None,
+                 beneficiary_vpa: Optional[str] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, risk_level: Optional[str] = None,
+                 fraud_only: bool = False, min_amount: Optional[float] = None,
+                 max_amount: Optional[float] = None, source: Optional[str] = None,
+                 owner: Optional[str] = None):
+        if cursor < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"Cursor must be non-negative and limit between 1 and {MAX_PAGE_SIZE}")
+        if risk_level is not None and risk_level not in RISK_LEVELS:
+            raise ValueError(f"Unknown risk level: {risk_level}")
+        self.cursor = cursor
+        self.limit = limit
+        self.equals = {
+            "transaction_id": transaction_id,
+            "payer_vpa": payer_vpa,
+            "beneficiary_vpa": beneficiary_vpa,
+            "risk_level": risk_level,
+            "source": source
+        }
+        self.start = epoch_seconds(start) if start is not None else None
+        self.end = epoch_seconds(end) if end is not None else None
+        self.fraud_only = fraud_only
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.owner = owner
+
+    def where(self, param: str) -> Tuple[str, List[Any]]:
+        """SQL condition and its parameters"""
+        conditions = [f"id > {param}"]
+        params: List[Any] = [self.cursor]
+        for column, value in self.equals.items():
+            if value is not None:
+                conditions.append(f"{column} = {param}")
+                params.append(value)
+        for condition, value in (
+            (f"txn_time >= {param}", self.start),
+            (f"txn_time < {param}", self.end),
+            (f"amount >= {param}", self.min_amount),
+            (f"amount <= {param}", self.max_amount)
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if self.fraud_only:
+            conditions.append(f"is_fraud = {param}")
+            params.append(True)
+        if self.owner is not None:
+            conditions.append(
+                f"(source = {param} OR source IN "
+                f"(SELECT source FROM transaction_sources WHERE loaded_by = {param}))"
+            )
+            params.extend(["reference", self.owner])
+        return " AND ".join(conditions), params
+
+
+class TransactionRepository:
+    """Scored transactions in the DATABASE_URL database, queryable by index
+
+    Every row belongs to a source: "reference" for the reference CSV,
+    "upload:<id>" for stored uploads. Rows are indexed by transaction id,
+    payer and beneficiary VPA, timestamp, risk level and source, so
+    targeted lookups touch only the matching rows however large the
+    table grows. Bulk loads use batched inserts (SQLite) or COPY
+    (Postgres) in one database transaction. Calls block; run them off
+    the event loop.
+    """
+
+    def __init__(self, database_url: str = DEFAULT_DATABASE_URL):
+        self.database = Database(database_url, SQLITE_SCHEMA, POSTGRES_SCHEMA)
+
+    def source_version(self, source: str) -> Optional[str]:
+        """Version recorded by the last replace_source(), None when never loaded"""
+        with self.database.transaction() as cursor:
+            cursor.execute(
+                f"SELECT version FROM transaction_sources WHERE source = {self.database.param}", (source,)
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def replace_source(self, source: str, frame: pd.DataFrame, version: Optional[str] = None,
+                       loaded_by: Optional[str] = None) -> bool:
+        """Swap all rows of a source for a result frame, atomically
+
+        Skipped (returns False) when the source is already at version,
+        e.g. because another worker loaded it first.
+        """
+        param = self.database.param
+        with self.database.transaction(write=True) as cursor:
+            if self.database.postgres:
+                # SQLite's BEGIN IMMEDIATE already serializes this check
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (source,))
+            if version is not None:
+                cursor.execute(f"SELECT version FROM transaction_sources WHERE source = {param}", (source,))
+                row = cursor.fetchone()
+                if row is not None and row[0] == version:
+                    return False
+            cursor.execute(f"DELETE FROM transactions WHERE source = {param}", (source,))
+            cursor.execute(f"DELETE FROM transaction_sources WHERE source = {param}", (source,))
+            self._insert(cursor, source, frame)
+            self._record_source(cursor, source, version, len(frame), loaded_by)
+        return True
+
+    def append(self, source: str, frame: pd.DataFrame, loaded_by: Optional[str] = None) -> int:
+        """Add a result frame's rows under a new source, returns the row count
+
+        A txn_time column (the transactions' TXN_TIME) is stored for time
+        range queries; without one, the timestamp text is parsed.
+        """
+        with self.database.transaction(write=True) as cursor:
+            self._insert(cursor, source, frame)
+            self._record_source(cursor, source, None, len(frame), loaded_by)
+        return len(frame)
+
+    def query(self, query: TransactionQuery) -> Dict[str, Any]:
+        """One page of matching transactions, with the cursor of the next page"""
+        where, params = query.where(self.database.param)
+        with self.database.transaction() as cursor:
+            # One extra row tells whether another page exists
+            cursor.execute(
+                f"SELECT id, {', '.join(STORED_COLUMNS)} FROM transactions WHERE {where} "
+                f"ORDER BY id LIMIT {query.limit + 1}",
+                params
+            )
+            rows = cursor.fetchall()
+        has_more = len(rows) > query.limit
+        rows = rows[:query.limit]
+        items = []
+        for row in rows:
+            item = dict(zip(STORED_COLUMNS, row[1:]))
+            item.pop("txn_time")
+            item["is_fraud"] = bool(item["is_fraud"])
+            item["suspicious_patterns"] = json.loads(item["suspicious_patterns"] or "[]")
+            items.append(item)
+        return {
+            "items": items,
+            "count": len(items),
+            "cursor": query.cursor,
+            "next_cursor": rows[-1][0] if has_more else None
+        }
+
+    def delete_source(self, source: str, owner: Optional[str] = None) -> bool:
+        """Delete a source and its rows, returns False when there is none
+
+        With owner, only a source loaded by owner is deleted.
+        """
+        param = self.database.param
+        with self.database.transaction(write=True) as cursor:
+            cursor.execute(f"SELECT loaded_by FROM transaction_sources WHERE source = {param}", (source,))
+            row = cursor.fetchone()
+            if row is None or (owner is not None and row[0] != owner):
+                return False
+            cursor.execute(f"DELETE FROM transactions WHERE source = {param}", (source,))
+            cursor.execute(f"DELETE FROM transaction_sources WHERE source = {param}", (source,))
+        return True
+
+    def expire_sources(self, ttl_seconds: int, prefix: str = "upload:") -> int:
+        """Delete sources named prefix* loaded more than ttl_seconds ago, returns how many"""
+        param = self.database.param
+        expired = f"SELECT source FROM transaction_sources WHERE source LIKE {param} AND loaded_at < {param}"
+        params = (prefix + "%", time.time() - ttl_seconds)
+        with self.database.transaction(write=True) as cursor:
+            cursor.execute(expired, params)
+            sources = [row[0] for row in cursor.fetchall()]
+            if sources:
+                cursor.execute(f"DELETE FROM transactions WHERE source IN ({expired})", params)
+                cursor.execute(f"DELETE FROM transaction_sources WHERE source IN ({expired})", params)
+        return len(sources)
+
+    def sources(self) -> List[Dict[str, Any]]:
+        with self.database.transaction() as cursor:
+            cursor.execute(
+                "SELECT source, version, rows, loaded_by, loaded_at FROM transaction_sources ORDER BY loaded_at"
+            )
+            return [
+                dict(zip(("source", "version", "rows", "loaded_by", "loaded_at"), row))
+                for row in cursor.fetchall()
+            ]
+
+    def close(self):
+        self.database.close()
+
+    def _insert(self, cursor, source: str, frame: pd.DataFrame):
+        for start in range(0, len(frame), INSERT_BATCH_ROWS):
+            rows = self._rows(source, frame.iloc[start:start + INSERT_BATCH_ROWS])
+            if self.database.postgres:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY transactions ({', '.join(STORED_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            else:
+                cursor.executemany(
+                    f"INSERT INTO transactions ({', '.join(STORED_COLUMNS)}) "
+                    f"VALUES ({self.database.placeholders(len(STORED_COLUMNS))})",
+                    rows
+                )
+
+    def _rows(self, source: str, frame: pd.DataFrame) -> List[tuple]:
+        # txn_time is the frame's TXN_TIME; frames without it are parsed the same way
+        if "txn_time" in frame.columns:
+            times = frame["txn_time"]
+        else:
+            times = parse_timestamps(frame["timestamp"])
+        stamps = times.to_numpy(dtype="datetime64[s]")
+        txn_times = np.where(np.isnat(stamps), None, stamps.astype(np.int64)).tolist()
+
+        # Pattern lists repeat a lot: encode each distinct one once
+        encoded = {}
+        patterns = []
+        for p in frame["suspicious_patterns"].tolist():
+            key = tuple(p)
+            if key not in encoded:
+                encoded[key] = json.dumps(list(key))
+            patterns.append(encoded[key])
+        columns = [
+            frame[field].tolist() if field != "suspicious_patterns" else patterns
+            for field in RESULT_FIELDS
+        ]
+        return [(source, txn_time, *values) for txn_time, *values in zip(txn_times, *columns)]
+
+    def _record_source(self, cursor, source: str, version: Optional[str], rows: int, loaded_by: Optional[str]):
+        cursor.execute(
+            f"INSERT INTO transaction_sources (source, version, rows, loaded_by, loaded_at) "
+            f"VALUES ({self.database.placeholders(5)}) "
+            f"ON CONFLICT (source) DO UPDATE SET rows = transaction_sources.rows + excluded.rows, "
+            f"loaded_by = excluded.loaded_by, loaded_at = excluded.loaded_at",
+            (source, version, rows, loaded_by, time.time())
+        )
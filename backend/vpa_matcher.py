@@ -0,0 +1,219 @@
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Built-in fraud indicators for VPA patterns
+DEFAULT_VPA_PATTERNS = [
+    'pay', 'rzp', 'bonus', 'win', 'loan', 'cashback',
+    'credit', 'reward', 'prize', 'offer', 'lucky'
+]
+
+# Pattern sets larger than this are compiled into an Aho-Corasick automaton
+AUTOMATON_THRESHOLD = 32
+
+# Entries starting with this marker only match at the start of a VPA
+PREFIX_MARKER = '^'
+
+
+def parse_patterns(lines: Sequence[str]) -> List[str]:
+    """Normalize raw pattern entries: lowercase, drop blanks, comments and duplicates"""
+    patterns = []
+    seen = set()
+    for line in lines:
+        pattern = line.strip().lower()
+        if not pattern or pattern.startswith('#') or pattern == PREFIX_MARKER:
+            continue
+        if pattern not in seen:
+            seen.add(pattern)
+            patterns.append(pattern)
+    return patterns
+
+
+def load_patterns_file(path: str) -> List[str]:
+    """Read one pattern per line from a keyword file"""
+    with open(path, encoding='utf-8') as f:
+        return parse_patterns(f)
+
+
+class PatternMatcher(ABC):
+    """Base class for VPA pattern matchers
+
+    Patterns are matched as substrings of the lowercased VPA, or only at
+    its start when written with a leading '^'. Matches are reported as
+    sorted tuples of pattern indices so callers keep the pattern order.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = parse_patterns(patterns)
+        self._compile()
+
+    @abstractmethod
+    def _compile(self):
+        """Build the matcher's internal structures from self.patterns"""
+
+    @abstractmethod
+    def match(self, vpa: str) -> Tuple[int, ...]:
+        """Indices of all patterns found in one lowercased VPA"""
+
+    def match_many(self, vpas: Sequence[str]) -> List[Tuple[int, ...]]:
+        """Indices of all patterns found in each lowercased VPA"""
+        return [self.match(vpa) for vpa in vpas]
+
+    def pattern_names(self, indices: Sequence[int]) -> List[str]:
+        """Pattern strings for a tuple of match indices"""
+        return [self.patterns[i] for i in indices]
+
+
+class SubstringMatcher(PatternMatcher):
+    """Scan the whole VPA array once per pattern, fast for small pattern sets"""
+
+    def _compile(self):
+        self._terms = [
+            (p[len(PREFIX_MARKER):], True) if p.startswith(PREFIX_MARKER) else (p, False)
+            for p in self.patterns
+        ]
+
+    def match(self, vpa: str) -> Tuple[int, ...]:
+        return tuple(
+            i for i, (term, anchored) in enumerate(self._terms)
+            if (vpa.startswith(term) if anchored else term in vpa)
+        )
+
+    def match_many(self, vpas: Sequence[str]) -> List[Tuple[int, ...]]:
+        n = len(vpas)
+        if n == 0 or not self._terms:
+            return [()] * n
+
+        values = np.array(vpas, dtype=str)
+        hits = np.zeros((n, len(self._terms)), dtype=bool)
+        for j, (term, anchored) in enumerate(self._terms):
+            if anchored:
+                hits[:, j] = np.char.startswith(values, term)
+            else:
+                hits[:, j] = np.char.find(values, term) >= 0
+
+        matches = [()] * n
+        for i in np.flatnonzero(hits.any(axis=1)).tolist():
+            matches[i] = tuple(np.flatnonzero(hits[i]).tolist())
+        return matches
+
+
+class AhoCorasickMatcher(PatternMatcher):
+    """Aho-Corasick automaton, one pass per VPA regardless of pattern count"""
+
+    def _compile(self):
+        # Substring patterns go into the automaton, prefix patterns into a plain trie
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._prefix_goto: List[Dict[str, int]] = [{}]
+        self._prefix_out: List[Tuple[int, ...]] = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            if pattern.startswith(PREFIX_MARKER):
+                self._insert(self._prefix_goto, self._prefix_out, pattern[len(PREFIX_MARKER):], index)
+            else:
+                self._insert(self._goto, self._out, pattern, index)
+        self._fail = [0] * len(self._goto)
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _insert(self, goto: List[Dict[str, int]], out: List[Tuple[int, ...]], word: str, index: int):
+        """Add one word to a trie, recording its pattern index at the final node"""
+        state = 0
+        for ch in word:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                out.append(())
+            state = nxt
+        out[state] = out[state] + (index,)
+
+    def match(self, vpa: str) -> Tuple[int, ...]:
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+
+        state = 0
+        for ch in vpa:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+
+        if len(self._prefix_goto) > 1:
+            state = 0
+            for ch in vpa:
+                state = self._prefix_goto[state].get(ch)
+                if state is None:
+                    break
+                if self._prefix_out[state]:
+                    found.update(self._prefix_out[state])
+
+        return tuple(sorted(found))
+
+
+def build_matcher(patterns: Sequence[str]) -> PatternMatcher:
+    """Pick the matcher implementation that suits the size of the pattern set"""
+    patterns = parse_patterns(patterns)
+    if len(patterns) > AUTOMATON_THRESHOLD:
+        return AhoCorasickMatcher(patterns)
+    return SubstringMatcher(patterns)
+
+
+class ReloadablePatternSet:
+    """Compiled matcher that follows a pattern file and recompiles when it changes"""
+
+    def __init__(self, patterns: Optional[Sequence[str]] = None, patterns_file: Optional[str] = None):
+        self.patterns_file = patterns_file
+        self._file_stamp = None
+        # Bumped on every pattern change so cached results can be keyed on it
+        self.version = 0
+        self.matcher = build_matcher(patterns if patterns is not None else DEFAULT_VPA_PATTERNS)
+        if patterns_file:
+            self.reload(force=True)
+
+    @property
+    def patterns(self) -> List[str]:
+        return self.matcher.patterns
+
+    def set_patterns(self, patterns: Sequence[str]):
+        """Replace the pattern set in memory"""
+        self.matcher = build_matcher(patterns)
+        self.version += 1
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile from the pattern file if it changed, returns True on reload"""
+        if not self.patterns_file:
+            return False
+        try:
+            stat = os.stat(self.patterns_file)
+        except OSError:
+            return False
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if not force and stamp == self._file_stamp:
+            return False
+
+        # Compile before swapping so concurrent readers always see a full matcher
+        matcher = build_matcher(load_patterns_file(self.patterns_file))
+        self.matcher = matcher
+        self._file_stamp = stamp
+        self.version += 1
+        return True
@@ -22,13 +22,23 @@ const Dashboard = ({ data, setData }) => {
     formData.append('file', file);
 
     try {
-      const response = await api.post('/detect/', formData, {
+      // Large files run as a background job; poll until it finishes
+      const submitted = await api.post('/detect/jobs', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
 
-      setData(response.data);
+      let job = submitted.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await api.get(`/detect/jobs/${job.job_id}`)).data;
+      }
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Detection job failed');
+      }
+
+      setData(job.result);
       setLoading(false);
     } catch (error) {
       console.error('Error:', error);